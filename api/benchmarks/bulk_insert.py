@@ -0,0 +1,68 @@
+"""
+Compare le débit d'insertion de clients : un `add`/`commit`/`refresh` par client
+(chemin de POST /api/clients) contre l'insertion par lots de POST /api/clients/bulk.
+
+    python -m api.benchmarks.bulk_insert
+"""
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from sqlalchemy.orm import sessionmaker
+
+from api.database import Base, build_engine
+from api.models import Client as ClientModel
+from api.queries import insert_clients
+
+CLIENT = {
+    'age': 35,
+    'sport_licence': True,
+    'niveau_etude': 'bac',
+    'region': 'Bretagne',
+    'revenu_estime_mois': 2500,
+    'situation_familiale': 'marié',
+    'historique_credits': 2.0,
+    'risque_personnel': 0.5,
+    'score_credit': 600.0,
+    'loyer_mensuel': 800.0,
+    'montant_pret': 0.0,
+    'date_creation_compte': '2022-01-01',
+    'nb_enfants': 1,
+    'quotient_caf': 200.0,
+}
+
+def insert_one_by_one(engine, records):
+    with sessionmaker(bind=engine, autoflush=False)() as db:
+        for record in records:
+            client = ClientModel(**record)
+            db.add(client)
+            db.commit()
+            db.refresh(client)
+
+def insert_in_bulk(engine, records, chunk_size):
+    with sessionmaker(bind=engine, autoflush=False)() as db:
+        return insert_clients(db, records, chunk_size=chunk_size)
+
+def run(n_rows=5000, chunk_sizes=(100, 1000, 5000)):
+    records = [dict(CLIENT) for _ in range(n_rows)]
+    with TemporaryDirectory() as tmp:
+        url = f"sqlite:///{join(tmp, 'benchmark.db')}"
+        engine = build_engine(url)
+        Base.metadata.create_all(bind=engine)
+
+        started = perf_counter()
+        insert_one_by_one(engine, records)
+        single = n_rows / (perf_counter() - started)
+        print(f"{'ligne à ligne':>16} | {single:>10.0f} lignes/s")
+
+        for chunk_size in chunk_sizes:
+            started = perf_counter()
+            ids = insert_in_bulk(engine, records, chunk_size)
+            bulk = n_rows / (perf_counter() - started)
+            assert len(ids) == n_rows and ids == sorted(ids)
+            print(f"{f'lots de {chunk_size}':>16} | {bulk:>10.0f} lignes/s | {bulk / single:>6.1f}x")
+        engine.dispose()
+
+if __name__ == "__main__":
+    print(f"{' Benchmark insertion de clients ':=^60}")
+    run()
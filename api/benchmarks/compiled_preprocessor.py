@@ -0,0 +1,100 @@
+"""
+Compare `CompiledPreprocessor` à `preprocessor.transform` de scikit-learn pour les
+artefacts strict et lâche : sorties identiques sur de vrais clients, y compris des
+valeurs manquantes et des catégories inconnues, puis temps d'exécution.
+
+    python -m api.benchmarks.compiled_preprocessor
+"""
+from datetime import datetime
+from os.path import join
+from timeit import repeat
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from api.modules.compiled_preprocessor import FACTORIZE_MIN_ROWS, compile_preprocessor
+from api.modules.preprocess import TARGET_COL, apply_manual_transformations, transform_record
+from api.modules.registry import LOOSE_ONLY_FIELDS
+
+DATA_PATH = join('.', 'data', 'raw_new_data.csv')
+MODELS_DIR = join('.', 'models')
+PARITY_ROWS = 2000
+RECORD_ROWS = 200
+
+# Valeurs absentes des données d'entraînement, ignorées par le OneHotEncoder (handle_unknown='ignore')
+UNKNOWN_CATEGORIES = {
+    'niveau_etude': 'bac+8',
+    'region': 'Martinique',
+    'situation_familiale': 'pacsé',
+    'sport_licence': 'peut-être',
+}
+
+def parity_frame(raw, ethically_strict, n_rows=PARITY_ROWS, seed=42):
+    """
+    Clients réels préparés comme à l'inférence, avec en plus des lignes entièrement
+    manquantes, des valeurs manquantes isolées et des catégories inconnues.
+    """
+    df = raw.head(n_rows).drop(columns=[TARGET_COL]).reset_index(drop=True)
+    if not ethically_strict:
+        df = df.assign(**{col: None for col in LOOSE_ONLY_FIELDS})
+    df = df.astype(object)
+    rng = np.random.default_rng(seed)
+    fields = [col for col in df.columns if col != 'date_creation_compte']
+    # Lignes 0 à 9 : tous les champs manquants (sauf la date, requise par les transformations manuelles)
+    df.loc[:9, fields] = None
+    for col in fields:
+        rows = rng.choice(len(df), size=len(df) // 20, replace=False)
+        df.loc[rows, col] = np.nan
+    for col, value in UNKNOWN_CATEGORIES.items():
+        rows = rng.choice(len(df), size=len(df) // 20, replace=False)
+        df.loc[rows, col] = value
+    return df.infer_objects()
+
+def check_parity(raw, models_dir=MODELS_DIR):
+    """
+    Vérifie, pour chaque preprocessor, que la version compilée produit la même matrice
+    que scikit-learn sur un DataFrame (petit et grand lot) et sur des dictionnaires.
+    """
+    for mode in ('strict', 'loose'):
+        ethically_strict = mode == 'strict'
+        preprocessor = joblib.load(join(models_dir, f'ethically_{mode}_preprocessor.pkl'))
+        compiled = compile_preprocessor(preprocessor)
+        df = parity_frame(raw, ethically_strict)
+        manual = apply_manual_transformations(df, ethically_strict)
+        expected = preprocessor.transform(manual)
+
+        np.testing.assert_allclose(compiled.transform(manual), expected, rtol=1e-12, atol=1e-12)
+        small = manual.head(FACTORIZE_MIN_ROWS - 1)
+        np.testing.assert_allclose(compiled.transform(small), expected[:len(small)], rtol=1e-12, atol=1e-12)
+
+        now = datetime.now()
+        records = [transform_record(record, ethically_strict, now=now) for record in df.head(RECORD_ROWS).to_dict('records')]
+        np.testing.assert_allclose(compiled.transform(records), preprocessor.transform(pd.DataFrame(records)),
+                                   rtol=1e-12, atol=1e-12)
+        print(f"✅ {mode} : {expected.shape[1]} colonnes identiques sur {len(manual)} lignes")
+
+def best_time(func, number):
+    return min(repeat(func, number=number, repeat=5)) / number
+
+def run(sizes=(1, 100, 10000)):
+    raw = pd.read_csv(DATA_PATH)
+    check_parity(raw)
+
+    print(f"{'lignes':>8} | {'mode':>6} | {'scikit-learn':>12} | {'compilé':>12} | {'gain':>6}")
+    for mode in ('strict', 'loose'):
+        ethically_strict = mode == 'strict'
+        preprocessor = joblib.load(join(MODELS_DIR, f'ethically_{mode}_preprocessor.pkl'))
+        compiled = compile_preprocessor(preprocessor)
+        manual = apply_manual_transformations(parity_frame(raw, ethically_strict, n_rows=len(raw)), ethically_strict)
+        for size in sizes:
+            df = pd.concat([manual] * (size // len(manual) + 1), ignore_index=True).head(size)
+            number = max(1, 2000 // size)
+            sklearn_time = best_time(lambda: preprocessor.transform(df), number)
+            compiled_time = best_time(lambda: compiled.transform(df), number)
+            print(f"{size:>8} | {mode:>6} | {sklearn_time * 1e3:>9.3f} ms | {compiled_time * 1e3:>9.3f} ms | "
+                  f"{sklearn_time / compiled_time:>5.1f}x")
+
+if __name__ == "__main__":
+    print(f"{' Benchmark CompiledPreprocessor ':=^60}")
+    run()
@@ -0,0 +1,125 @@
+"""
+Compare le débit de lectures et d'écritures concurrentes sur la table `clients` :
+moteur historique (options par défaut), moteur synchrone configuré (pool, pragmas
+SQLite/WAL) et moteur asynchrone.
+
+    python -m api.benchmarks.database [DATABASE_URL]
+
+Sans argument, chaque moteur utilise sa propre base SQLite temporaire. Avec une URL, la table
+`clients` de cette base reçoit des lignes de test, supprimées à la fin.
+"""
+import asyncio
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from api.database import Base, build_async_engine, build_engine, async_database_url, normalize_database_url
+from api.models import Client as ClientModel
+
+WORKERS = 8
+OPERATIONS_PER_WORKER = 200
+BENCHMARK_REGION = 'benchmark'
+
+def new_client():
+    return ClientModel(age=random.randint(18, 80), region=BENCHMARK_REGION, niveau_etude='bac',
+                       situation_familiale='marié', revenu_estime_mois=2500.0, date_creation_compte='2022-01-01')
+
+def legacy_engine(url):
+    """Moteur tel qu'il était créé avant la configuration par backend"""
+    return create_engine(normalize_database_url(url), connect_args={"check_same_thread": False})
+
+def run_sync(engine, operation, ids):
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    def worker(_):
+        with Session() as db:
+            for _ in range(OPERATIONS_PER_WORKER):
+                if operation == 'write':
+                    db.add(new_client())
+                    db.commit()
+                else:
+                    db.get(ClientModel, random.choice(ids))
+                    db.rollback()
+
+    started = perf_counter()
+    with ThreadPoolExecutor(WORKERS) as pool:
+        list(pool.map(worker, range(WORKERS)))
+    return WORKERS * OPERATIONS_PER_WORKER / (perf_counter() - started)
+
+async def run_async(engine, operation, ids):
+    Session = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def worker():
+        async with Session() as db:
+            for _ in range(OPERATIONS_PER_WORKER):
+                if operation == 'write':
+                    db.add(new_client())
+                    await db.commit()
+                else:
+                    await db.get(ClientModel, random.choice(ids))
+                    await db.rollback()
+
+    started = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(WORKERS)))
+    return WORKERS * OPERATIONS_PER_WORKER / (perf_counter() - started)
+
+def seed(engine):
+    """Crée la table si besoin, insère les lignes de test et retourne leurs ids"""
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add_all([new_client() for _ in range(1000)])
+        db.commit()
+        return [client_id for (client_id,) in db.query(ClientModel.id).filter(ClientModel.region == BENCHMARK_REGION)]
+
+def cleanup(engine):
+    with sessionmaker(bind=engine)() as db:
+        db.execute(delete(ClientModel).where(ClientModel.region == BENCHMARK_REGION))
+        db.commit()
+    engine.dispose()
+
+def run(urls):
+    """
+    args:
+    - urls: URL de base par moteur ('historique', 'configuré', 'asynchrone'). Des
+      fichiers SQLite distincts évitent que le mode WAL, persistant, ne profite au
+      moteur historique.
+    """
+    print(f"{'moteur':>12} | {'écritures/s':>12} | {'lectures/s':>12}")
+    for name, build in (('historique', legacy_engine), ('configuré', build_engine)):
+        engine = build(urls[name])
+        try:
+            ids = seed(engine)
+            writes, reads = run_sync(engine, 'write', ids), run_sync(engine, 'read', ids)
+            print(f"{name:>12} | {writes:>12.0f} | {reads:>12.0f}")
+        finally:
+            cleanup(engine)
+
+    async def run_all_async(ids):
+        engine = build_async_engine(async_database_url(urls['asynchrone']))
+        try:
+            return await run_async(engine, 'write', ids), await run_async(engine, 'read', ids)
+        finally:
+            await engine.dispose()
+    setup_engine = build_engine(urls['asynchrone'])
+    try:
+        writes, reads = asyncio.run(run_all_async(seed(setup_engine)))
+        print(f"{'asynchrone':>12} | {writes:>12.0f} | {reads:>12.0f}")
+    finally:
+        cleanup(setup_engine)
+
+if __name__ == "__main__":
+    print(f"{' Benchmark base de données ':=^60}")
+    print(f"{WORKERS} workers concurrents, {OPERATIONS_PER_WORKER} opérations chacun")
+    names = ('historique', 'configuré', 'asynchrone')
+    if len(sys.argv) > 1:
+        run(dict.fromkeys(names, sys.argv[1]))
+    else:
+        with TemporaryDirectory() as tmp:
+            run({name: f"sqlite:///{join(tmp, f'benchmark_{position}.db')}" for position, name in enumerate(names)})
@@ -0,0 +1,90 @@
+"""
+Compare la version vectorisée de `apply_manual_transformations` (et le chemin
+dictionnaire `transform_record`) à l'implémentation historique : résultats
+identiques en mode strict et lâche, puis temps d'exécution.
+
+    python -m api.benchmarks.manual_transformations
+"""
+from datetime import datetime
+from os.path import join
+from timeit import repeat
+
+import pandas as pd
+
+from api.modules.preprocess import apply_manual_transformations, transform_record
+from api.utils.helpers import replace_by_dict
+
+DATA_PATH = join('.', 'data', 'raw_new_data.csv')
+
+def legacy_apply_manual_transformations(df, ethically_strict=True):
+    """Implémentation historique, conservée comme référence de résultat et de performance."""
+    df = df.copy()
+    cols_to_drop = ['id', 'sexe', 'taille', 'poids', 'smoker'] if ethically_strict else ['id']
+    for col in cols_to_drop:
+        if col in df.columns:
+            df = df.drop(columns=col)
+    if ethically_strict and 'age' in df.columns:
+        df['age_group'] = pd.cut(df['age'], bins=[17, 30, 45, 60, 100], labels=['18-29', '30-44', '45-59', '60+'], right=True)
+        df = df.drop(columns='age')
+    if 'region' in df.columns:
+        economy_based_regions = {
+            'region_parisienne' : ['Île-de-France'],
+            'regions_industrielles': ['Hauts-de-France', 'Grand-Est', 'Bourgogne-Franche-Comté'],
+            'regions_tertiaires': ['Bretagne', 'Pays-de-la-Loire', 'Centre-Val-de-Loire', 'Normandie'],
+            'regions_touristiques_services': ['Nouvelle-Aquitaine', 'Occitanie', 'Auvergne-Rhône-Alpes', 'PACA', 'Corse'],
+        }
+        df['region'] = df['region'].apply(lambda x: replace_by_dict(x, economy_based_regions))
+    if 'date_creation_compte' in df.columns:
+        df['date_creation_compte'] = pd.to_datetime(df['date_creation_compte'], errors='coerce')
+        df['anciennete_mois'] = ((pd.Timestamp.now() - df['date_creation_compte']) / pd.Timedelta(days=30)).astype(int)
+        df = df.drop(columns='date_creation_compte')
+    for col in ['historique_credits', 'score_credit', 'loyer_mensuel', 'situation_familiale', 'quotient_caf', 'nb_enfants']:
+        if col in df.columns:
+            df[f'{col}_missing_value'] = df[col].isna().astype(int)
+    if 'loyer_mensuel' in df.columns:
+        df['loyer_mensuel'] = df['loyer_mensuel'].mask(df['loyer_mensuel'] < 0)
+    df.rename(str, axis='columns', inplace=True)
+    return df
+
+def check_parity(df):
+    """Vérifie que les deux implémentations (et le chemin dictionnaire) donnent le même résultat."""
+    for ethically_strict in (True, False):
+        expected = legacy_apply_manual_transformations(df, ethically_strict)
+        pd.testing.assert_frame_equal(apply_manual_transformations(df, ethically_strict), expected)
+
+        now = datetime.now()
+        records = [transform_record(record, ethically_strict, now=now) for record in df.head(200).to_dict('records')]
+        from_records = pd.DataFrame(records, index=df.index[:200])
+        from_records['anciennete_mois'] = from_records['anciennete_mois'].astype(int)
+        for col in expected.columns:
+            if isinstance(expected[col].dtype, pd.CategoricalDtype):
+                from_records[col] = pd.Categorical(from_records[col], dtype=expected[col].dtype)
+        pd.testing.assert_frame_equal(from_records[expected.columns], expected.head(200), check_dtype=False)
+
+def best_time(func, number):
+    return min(repeat(func, number=number, repeat=5)) / number
+
+def run(sizes=(1, 100, 10000)):
+    raw = pd.read_csv(DATA_PATH)
+    check_parity(raw)
+    print("✅ Résultats identiques (strict et lâche)")
+
+    print(f"{'lignes':>8} | {'mode':>6} | {'historique':>12} | {'vectorisé':>12} | {'gain':>6}")
+    for size in sizes:
+        df = pd.concat([raw] * (size // len(raw) + 1), ignore_index=True).head(size)
+        number = max(1, 2000 // size)
+        for ethically_strict in (True, False):
+            legacy = best_time(lambda: legacy_apply_manual_transformations(df, ethically_strict), number)
+            vectorized = best_time(lambda: apply_manual_transformations(df, ethically_strict), number)
+            mode = 'strict' if ethically_strict else 'lâche'
+            print(f"{size:>8} | {mode:>6} | {legacy * 1e3:>9.3f} ms | {vectorized * 1e3:>9.3f} ms | {legacy / vectorized:>5.1f}x")
+
+    record = raw.head(1).to_dict('records')[0]
+    one_row = raw.head(1)
+    legacy = best_time(lambda: legacy_apply_manual_transformations(one_row), 2000)
+    record_path = best_time(lambda: transform_record(record), 2000)
+    print(f"{'1 (dict)':>8} | {'strict':>6} | {legacy * 1e3:>9.3f} ms | {record_path * 1e3:>9.3f} ms | {legacy / record_path:>5.1f}x")
+
+if __name__ == "__main__":
+    print(f"{' Benchmark apply_manual_transformations ':=^60}")
+    run()
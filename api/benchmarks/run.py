@@ -0,0 +1,279 @@
+"""
+Suite de micro-benchmarks des chemins critiques du service et de l'entraînement, sur
+des données synthétiques générées à partir du schéma de `data/raw_new_data.csv` :
+
+- `apply_manual_transformations` (1, 100, 10 000 et 1 000 000 lignes, strict et lâche) ;
+- `preprocessor.transform` des artefacts strict et lâche ;
+- `model_predict` à plusieurs tailles de lot ;
+- `import_csv_to_db` dans une base SQLite temporaire ;
+- lecture des clients (`read_clients_page`, `stream_clients_ndjson`).
+
+Les résultats sont écrits en JSON puis comparés à la référence enregistrée : une
+mesure plus lente que la référence au-delà de la tolérance fait échouer la commande.
+
+    python -m api.benchmarks.run
+    python -m api.benchmarks.run --quick --only manual_transformations,predict
+    python -m api.benchmarks.run --save-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from os.path import dirname, join
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from api.benchmarks.synthetic import load_schema, synthetic_clients, write_synthetic_csv
+
+BASELINE_PATH = join(dirname(__file__), 'baseline.json')
+RESULTS_PATH = join(dirname(__file__), 'results.json')
+MODELS_DIR = join('.', 'models')
+TOLERANCE = 0.25
+# Écart absolu (médiane par appel) en dessous duquel un ralentissement est considéré comme du bruit
+NOISE_FLOOR_SECONDS = 0.001
+RETRIES = 2
+# Durée minimale d'une répétition : les appels très courts sont enchaînés pour lisser le bruit
+MIN_REPEAT_SECONDS = 0.2
+
+MANUAL_SIZES = (1, 100, 10000, 1000000)
+TRANSFORM_SIZES = (1, 10000)
+PREDICT_BATCH_SIZES = (1, 32, 1024, 10000)
+IMPORT_ROWS = 20000
+
+def measure(func, rows=1, repeat=7, number=None):
+    """
+    Chronomètre `func` : `repeat` répétitions de `number` appels (calculé pour qu'une
+    répétition dure au moins MIN_REPEAT_SECONDS si absent).
+
+    returns:
+    - dictionnaire {'seconds' (meilleur temps par appel), 'median_seconds',
+      'rows_per_second', 'rows', 'repeat', 'number'}.
+    """
+    if number is None:
+        started = perf_counter()
+        func()
+        single = perf_counter() - started
+        number = max(1, int(MIN_REPEAT_SECONDS / single)) if single else 1000
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((perf_counter() - started) / number)
+    best = min(timings)
+    return {'seconds': best, 'median_seconds': median(timings), 'rows_per_second': rows / best if best else None,
+            'rows': rows, 'repeat': repeat, 'number': number}
+
+def bench_manual_transformations(context):
+    from api.modules.preprocess import apply_manual_transformations
+
+    for size in context['manual_sizes']:
+        df = context['frame'](size)
+        for ethically_strict in (True, False):
+            mode = 'strict' if ethically_strict else 'loose'
+            yield (f'manual_transformations.{mode}.{size}',
+                   measure(lambda: apply_manual_transformations(df, ethically_strict), rows=size,
+                           repeat=3 if size >= 1000000 else 7))
+
+def bench_preprocessor_transform(context):
+    import joblib
+
+    from api.modules.preprocess import apply_manual_transformations
+
+    for mode in ('strict', 'loose'):
+        preprocessor = joblib.load(join(context['models_dir'], f'ethically_{mode}_preprocessor.pkl'))
+        for size in TRANSFORM_SIZES:
+            manual = apply_manual_transformations(context['frame'](size).drop(columns=['montant_pret']), mode == 'strict')
+            yield f'preprocessor_transform.{mode}.{size}', measure(lambda: preprocessor.transform(manual), rows=size)
+
+def bench_predict(context):
+    import tensorflow as tf
+
+    from api.modules.models import model_predict
+
+    model = tf.keras.models.load_model(join(context['models_dir'], 'ethically_strict_model.keras'), compile=False)
+    rng = np.random.default_rng(42)
+    for batch_size in PREDICT_BATCH_SIZES:
+        X = rng.standard_normal((batch_size, model.input_shape[1])).astype(np.float32)
+        with redirect_stdout(StringIO()):
+            result = measure(lambda: model_predict(model, X), rows=batch_size, repeat=3)
+        yield f'model_predict.{batch_size}', result
+
+def bench_database(context):
+    """
+    Import du CSV synthétique puis lectures, dans la base SQLite temporaire
+    configurée par `main()` avant l'import de `api.database`.
+    """
+    from api.database import SessionLocal, create_db_tables
+    from api.queries import parse_fields, read_clients_page, stream_clients_ndjson
+    from api.seed import import_csv_to_db
+
+    create_db_tables()
+    csv_path = write_synthetic_csv(join(context['tmp_dir'], 'clients.csv'), context['import_rows'])
+    with redirect_stdout(StringIO()):
+        result = measure(lambda: import_csv_to_db(csv_path, 'clients', if_exists='replace'),
+                         rows=context['import_rows'], repeat=3, number=1)
+    yield f"import_csv_to_db.{context['import_rows']}", result
+
+    fields = parse_fields(None)
+    with SessionLocal() as db:
+        for limit in (100, 1000):
+            yield f'read_clients.page.{limit}', measure(lambda: read_clients_page(db, fields, limit=limit), rows=limit)
+    yield (f"read_clients.ndjson.{context['import_rows']}", measure(lambda: sum(len(part) for part in stream_clients_ndjson(fields)),
+                                                                    rows=context['import_rows'], repeat=3))
+
+BENCHMARKS = {
+    'manual_transformations': bench_manual_transformations,
+    'preprocessor_transform': bench_preprocessor_transform,
+    'predict': bench_predict,
+    'database': bench_database,
+}
+
+def median_seconds(result):
+    """Médiane par appel d'une mesure (meilleur temps pour une référence antérieure aux médianes)"""
+    return result.get('median_seconds', result['seconds'])
+
+def compare(results, baseline, tolerance=TOLERANCE, noise_floor=NOISE_FLOOR_SECONDS):
+    """
+    Compare chaque mesure à la référence (médiane par appel). Une mesure n'est une
+    régression que si elle est plus lente de plus de `tolerance` et d'au moins
+    `noise_floor` secondes par appel : les cas de moins d'une milliseconde ne
+    font pas échouer la suite sur du bruit.
+
+    returns:
+    - liste de lignes (nom, référence, mesure, rapport, statut), statut parmi 'ok',
+      'plus rapide', 'RÉGRESSION' et 'nouveau'.
+    """
+    rows = []
+    for name, result in results.items():
+        seconds = median_seconds(result)
+        reference = baseline.get(name)
+        if reference is None:
+            rows.append((name, None, seconds, None, 'nouveau'))
+            continue
+        reference_seconds = median_seconds(reference)
+        ratio = seconds / reference_seconds
+        if ratio > 1 + tolerance and seconds - reference_seconds >= noise_floor:
+            status = 'RÉGRESSION'
+        else:
+            status = 'plus rapide' if ratio < 1 / (1 + tolerance) else 'ok'
+        rows.append((name, reference_seconds, seconds, ratio, status))
+    return rows
+
+def run_groups(names, context, results, groups):
+    """Lance les groupes de benchmarks `names` ; pour une mesure déjà faite, la meilleure médiane est conservée."""
+    for group in names:
+        for name, result in BENCHMARKS[group](context):
+            if name not in results or median_seconds(result) < median_seconds(results[name]):
+                results[name] = result
+            groups[name] = group
+            print(f"⏱️ {name:<40} {median_seconds(result) * 1e3:>10.3f} ms")
+
+def load_baseline(path):
+    """Mesures de référence, ou None (avec un avertissement) si le fichier n'existe pas."""
+    try:
+        with open(path, encoding='utf-8') as baseline_file:
+            return json.load(baseline_file)['results']
+    except FileNotFoundError:
+        print(f"⚠️ Pas de référence ({path}) : lancer avec --save-baseline")
+        return None
+
+def environment():
+    import sklearn
+
+    return {'date': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+            'platform': platform.platform(), 'cpu_count': os.cpu_count(), 'numpy': np.__version__,
+            'pandas': pd.__version__, 'sklearn': sklearn.__version__}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks des chemins critiques")
+    parser.add_argument('--only', help=f"Groupes à lancer, séparés par des virgules ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--quick', action='store_true', help="Sans le cas à 1 000 000 lignes, import réduit")
+    parser.add_argument('--models-dir', default=MODELS_DIR, help="Dossier des artefacts strict et lâche")
+    parser.add_argument('--output', default=RESULTS_PATH, help="Fichier JSON des résultats")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Fichier JSON de référence")
+    parser.add_argument('--save-baseline', action='store_true', help="Fusionner les résultats dans la référence (les autres mesures sont conservées)")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="Ralentissement toléré (0.25 = 25 %%)")
+    parser.add_argument('--noise-floor', type=float, default=NOISE_FLOOR_SECONDS,
+                        help="Ralentissement absolu ignoré, en secondes par appel (0.001 = 1 ms)")
+    parser.add_argument('--retries', type=int, default=RETRIES, help="Nouvelles mesures d'une régression avant d'échouer")
+    args = parser.parse_args(argv)
+    args.groups = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [group for group in args.groups if group not in BENCHMARKS]
+    if unknown:
+        parser.error(f"groupes inconnus : {', '.join(unknown)}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    reference = load_schema()
+    frames = {}
+
+    def frame(size):
+        if size not in frames:
+            frames[size] = synthetic_clients(size, reference=reference)
+        return frames[size]
+
+    baseline = None if args.save_baseline else load_baseline(args.baseline)
+    results, groups = {}, {}
+    with TemporaryDirectory() as tmp_dir:
+        # Base temporaire : doit être configurée avant le premier import de api.database
+        os.environ['DATABASE_URL'] = f"sqlite:///{join(tmp_dir, 'benchmark.db')}"
+        context = {
+            'frame': frame,
+            'models_dir': args.models_dir,
+            'tmp_dir': tmp_dir,
+            'manual_sizes': MANUAL_SIZES[:-1] if args.quick else MANUAL_SIZES,
+            'import_rows': IMPORT_ROWS // 4 if args.quick else IMPORT_ROWS,
+        }
+        run_groups(args.groups, context, results, groups)
+        # Une régression doit se reproduire : les groupes concernés sont remesurés
+        # (meilleur temps conservé) avant de conclure, pour écarter le bruit ponctuel
+        for attempt in range(1, args.retries + 1):
+            regressed = [row[0] for row in compare(results, baseline or {}, args.tolerance, args.noise_floor) if row[4] == 'RÉGRESSION']
+            if not regressed:
+                break
+            print(f"🔁 Nouvelle mesure ({attempt}/{args.retries}) : {', '.join(regressed)}")
+            run_groups(sorted({groups[name] for name in regressed}), context, results, groups)
+
+    report = {'environment': environment(), 'results': results}
+    os.makedirs(dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as output:
+        json.dump(report, output, indent=2)
+    print(f"✅ Résultats écrits dans {args.output}")
+
+    if args.save_baseline:
+        # Les mesures des groupes non lancés (--only, --quick) sont conservées
+        saved = {**(load_baseline(args.baseline) or {}), **results}
+        with open(args.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump({'environment': report['environment'], 'results': saved}, baseline_file, indent=2)
+        print(f"✅ Référence enregistrée dans {args.baseline} ({len(results)} mesures mises à jour sur {len(saved)})")
+        return 0
+    if baseline is None:
+        return 0
+
+    rows = compare(results, baseline, args.tolerance, args.noise_floor)
+    print(f"{'mesure':<40} | {'référence':>12} | {'mesure':>12} | {'rapport':>7} | statut")
+    for name, reference_seconds, seconds, ratio, status in rows:
+        reference_text = f'{reference_seconds * 1e3:.3f} ms' if reference_seconds is not None else '-'
+        ratio_text = f'{ratio:.2f}x' if ratio is not None else '-'
+        print(f"{name:<40} | {reference_text:>12} | {seconds * 1e3:>9.3f} ms | {ratio_text:>7} | {status}")
+    regressions = [row for row in rows if row[4] == 'RÉGRESSION']
+    if regressions:
+        print(f"❌ {len(regressions)} régression(s) au-delà de {args.tolerance:.0%} et {args.noise_floor * 1e3:g} ms : "
+              f"{', '.join(row[0] for row in regressions)}")
+        return 1
+    print("✅ Aucune régression")
+    return 0
+
+if __name__ == "__main__":
+    print(f"{' Benchmarks ':=^60}")
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Données synthétiques pour les benchmarks, générées à partir du schéma de
+`data/raw_new_data.csv` : mêmes colonnes, mêmes types et même taux de valeurs
+manquantes, valeurs tirées indépendamment colonne par colonne (aucune ligne réelle
+n'est reproduite).
+"""
+from os.path import join
+
+import numpy as np
+import pandas as pd
+
+DATA_PATH = join('.', 'data', 'raw_new_data.csv')
+DATE_COLS = ['date_creation_compte']
+
+def load_schema(path=DATA_PATH):
+    """Échantillon de référence dont on reprend les colonnes, types et distributions."""
+    return pd.read_csv(path)
+
+def synthetic_clients(n_rows, seed=42, reference=None):
+    """
+    Génère `n_rows` clients synthétiques.
+
+    - colonnes numériques et catégorielles : tirage avec remise parmi les valeurs de
+      la colonne de référence (valeurs manquantes comprises, donc même taux de NaN) ;
+    - dates : tirage uniforme entre la plus ancienne et la plus récente date de
+      référence, au format ISO, avec le même taux de valeurs manquantes.
+
+    args:
+    - n_rows: nombre de lignes.
+    - seed: graine du générateur (données identiques d'un lancement à l'autre).
+    - reference: DataFrame de référence (`data/raw_new_data.csv` par défaut).
+
+    returns:
+    - DataFrame brut, comme lu depuis le CSV.
+    """
+    reference = load_schema() if reference is None else reference
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for col in reference.columns:
+        values = reference[col]
+        if col in DATE_COLS:
+            dates = pd.to_datetime(values, errors='coerce')
+            low, high = dates.min().value, dates.max().value
+            drawn = pd.to_datetime(rng.integers(low, high, size=n_rows, endpoint=True)).normalize()
+            missing = rng.random(n_rows) < dates.isna().mean()
+            columns[col] = pd.Series(drawn.strftime('%Y-%m-%d'), dtype=object).mask(missing)
+        else:
+            columns[col] = values.to_numpy()[rng.integers(0, len(values), size=n_rows)]
+    return pd.DataFrame(columns)
+
+def write_synthetic_csv(path, n_rows, seed=42):
+    """Écrit un CSV synthétique au format de `data/raw_new_data.csv`."""
+    synthetic_clients(n_rows, seed).to_csv(path, index=False)
+    return path
@@ -5,8 +5,99 @@ from os.path import join
 load_dotenv()
 
 ENVIRONMENT = getenv('ENVIRONMENT', 'development')
+# Niveau minimal des journaux loguru (TRACE, DEBUG, INFO, WARNING, ERROR)
+LOG_LEVEL = getenv('LOG_LEVEL', 'INFO')
 DATABASE_URL = getenv('DATABASE_URL', 'sqlite:///:memory:')
+# URL du moteur asynchrone, déduite de DATABASE_URL si absente (aiosqlite, asyncpg)
+ASYNC_DATABASE_URL = getenv('ASYNC_DATABASE_URL')
 DEFAULT_MODEL_FILENAME = getenv('MODEL_FILENAME', 'new_ethically_strict_model.keras')
 DEFAULT_MODEL_PATH = getenv('MODEL_PATH', join('.', 'models', DEFAULT_MODEL_FILENAME))
 DEFAULT_PREPROCESSOR_FILENAME = getenv('PREPROCESSOR_FILENAME', 'new_ethically_strict_preprocessor.pkl')
-DEFAULT_PREPROCESSOR_PATH = getenv('PREPROCESSOR_PATH', join('.', 'models', DEFAULT_PREPROCESSOR_FILENAME))
\ No newline at end of file
+DEFAULT_PREPROCESSOR_PATH = getenv('PREPROCESSOR_PATH', join('.', 'models', DEFAULT_PREPROCESSOR_FILENAME))
+MODELS_DIR = getenv('MODELS_DIR', join('.', 'models'))
+# Variante servie au démarrage (ex. 'ethically_strict', 'new_ethically_loose')
+DEFAULT_MODEL_VARIANT = getenv('MODEL_VARIANT', DEFAULT_MODEL_FILENAME.rsplit('_model', 1)[0])
+# Couple modèle/preprocessor imposé par l'environnement plutôt que découvert dans MODELS_DIR
+DEFAULT_MODEL_PATHS_SET = any(getenv(name) for name in ('MODEL_FILENAME', 'MODEL_PATH', 'PREPROCESSOR_FILENAME', 'PREPROCESSOR_PATH'))
+
+# Démarrage rapide : imports lourds et chargement du modèle en tâche de fond après le démarrage
+# (les routes de prédiction répondent 503 jusqu'à la fin du warm-up)
+FAST_STARTUP = getenv('FAST_STARTUP', 'false').lower() in ('1', 'true', 'yes')
+
+# Micro-batching des prédictions
+PREDICT_BATCH_MAX_SIZE = int(getenv('PREDICT_BATCH_MAX_SIZE', '64'))
+PREDICT_BATCH_MAX_WAIT_MS = float(getenv('PREDICT_BATCH_MAX_WAIT_MS', '5'))
+PREDICT_BATCH_MAX_ROWS = int(getenv('PREDICT_BATCH_MAX_ROWS', '100000'))
+
+# Backend d'inférence : 'keras' (TensorFlow) ou 'numpy' (poids exportés par api/scripts/export_weights.py)
+INFERENCE_BACKEND = getenv('INFERENCE_BACKEND', 'keras')
+# Précision des poids servis : 'float32', ou 'float16' / 'int8' (archives de api/scripts/quantize_models.py, backend 'numpy')
+INFERENCE_PRECISION = getenv('INFERENCE_PRECISION', 'float32')
+
+# Backend de preprocessing : 'sklearn' (ColumnTransformer chargé tel quel) ou 'compiled' (version NumPy précalculée)
+PREPROCESSOR_BACKEND = getenv('PREPROCESSOR_BACKEND', 'sklearn')
+
+# Cache des prédictions (PREDICTION_CACHE_SIZE=0 pour le désactiver)
+PREDICTION_CACHE_SIZE = int(getenv('PREDICTION_CACHE_SIZE', '10000'))
+PREDICTION_CACHE_TTL_SECONDS = float(getenv('PREDICTION_CACHE_TTL_SECONDS', '3600'))
+
+# Exécution de l'inférence hors de la boucle asyncio : pool 'thread' ou 'process',
+# file d'admission bornée (503 + Retry-After une fois pleine) et timeout par requête (504)
+INFERENCE_EXECUTOR = getenv('INFERENCE_EXECUTOR', 'thread')
+INFERENCE_WORKERS = int(getenv('INFERENCE_WORKERS', '4'))
+INFERENCE_QUEUE_SIZE = int(getenv('INFERENCE_QUEUE_SIZE', '256'))
+INFERENCE_TIMEOUT_SECONDS = float(getenv('INFERENCE_TIMEOUT_SECONDS', '10'))
+INFERENCE_RETRY_AFTER_SECONDS = int(getenv('INFERENCE_RETRY_AFTER_SECONDS', '1'))
+
+# Lecture des clients : taille de page par défaut et maximale, taille des morceaux du mode NDJSON
+CLIENTS_PAGE_SIZE = int(getenv('CLIENTS_PAGE_SIZE', '100'))
+CLIENTS_PAGE_MAX_SIZE = int(getenv('CLIENTS_PAGE_MAX_SIZE', '1000'))
+CLIENTS_STREAM_CHUNK_SIZE = int(getenv('CLIENTS_STREAM_CHUNK_SIZE', '1000'))
+# Cache des agrégats de GET /api/clients/stats, vidé à chaque écriture de clients par l'API (0 désactive le cache)
+CLIENTS_STATS_CACHE_SIZE = int(getenv('CLIENTS_STATS_CACHE_SIZE', '256'))
+CLIENTS_STATS_CACHE_TTL_SECONDS = float(getenv('CLIENTS_STATS_CACHE_TTL_SECONDS', '300'))
+
+# Pool de connexions à la base de données
+DB_POOL_SIZE = int(getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT_SECONDS = float(getenv('DB_POOL_TIMEOUT_SECONDS', '30'))
+DB_POOL_RECYCLE_SECONDS = int(getenv('DB_POOL_RECYCLE_SECONDS', '1800'))
+DB_POOL_PRE_PING = getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+# Import de clients en masse (POST /api/clients/bulk)
+CLIENTS_BULK_CHUNK_SIZE = int(getenv('CLIENTS_BULK_CHUNK_SIZE', '1000'))
+CLIENTS_BULK_MAX_ROWS = int(getenv('CLIENTS_BULK_MAX_ROWS', '100000'))
+
+# Métriques Prometheus (GET /metrics) et profilage à la demande d'une requête (en-tête X-Profile)
+METRICS_ENABLED = getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+PROFILING_ENABLED = getenv('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+PROFILING_TOKEN = getenv('PROFILING_TOKEN')
+PROFILING_INTERVAL_MS = float(getenv('PROFILING_INTERVAL_MS', '5'))
+PROFILING_DIR = getenv('PROFILING_DIR', join('.', 'api', 'logs', 'profiles'))
+
+# Journal structuré des prédictions (fichiers Arrow IPC écrits en arrière-plan), avec échantillonnage
+PREDICTION_LOG_ENABLED = getenv('PREDICTION_LOG_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+PREDICTION_LOG_DIR = getenv('PREDICTION_LOG_DIR', join('.', 'api', 'logs', 'predictions'))
+PREDICTION_LOG_SAMPLE_RATE = float(getenv('PREDICTION_LOG_SAMPLE_RATE', '1.0'))
+PREDICTION_LOG_ERROR_SAMPLE_RATE = float(getenv('PREDICTION_LOG_ERROR_SAMPLE_RATE', '1.0'))
+PREDICTION_LOG_BUFFER_SIZE = int(getenv('PREDICTION_LOG_BUFFER_SIZE', '100000'))
+PREDICTION_LOG_FLUSH_INTERVAL_SECONDS = float(getenv('PREDICTION_LOG_FLUSH_INTERVAL_SECONDS', '1'))
+PREDICTION_LOG_ROTATE_ROWS = int(getenv('PREDICTION_LOG_ROTATE_ROWS', '1000000'))
+
+# Table d'audit des prédictions, remplie par lots en arrière-plan (write-behind)
+PREDICTION_AUDIT_ENABLED = getenv('PREDICTION_AUDIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+PREDICTION_AUDIT_BUFFER_SIZE = int(getenv('PREDICTION_AUDIT_BUFFER_SIZE', '100000'))
+PREDICTION_AUDIT_BATCH_SIZE = int(getenv('PREDICTION_AUDIT_BATCH_SIZE', '500'))
+PREDICTION_AUDIT_FLUSH_INTERVAL_SECONDS = float(getenv('PREDICTION_AUDIT_FLUSH_INTERVAL_SECONDS', '1'))
+# Politique de file pleine : 'block' (attente d'une place), 'drop_new' ou 'drop_oldest'
+PREDICTION_AUDIT_OVERFLOW = getenv('PREDICTION_AUDIT_OVERFLOW', 'block')
+PREDICTION_AUDIT_BLOCK_TIMEOUT_SECONDS = float(getenv('PREDICTION_AUDIT_BLOCK_TIMEOUT_SECONDS', '1'))
+PREDICTION_AUDIT_RETRIES = int(getenv('PREDICTION_AUDIT_RETRIES', '3'))
+
+# Suivi de dérive des clients prédits par rapport aux statistiques du preprocessor
+DRIFT_MONITOR_ENABLED = getenv('DRIFT_MONITOR_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+DRIFT_WINDOW_ROWS = int(getenv('DRIFT_WINDOW_ROWS', '10000'))
+DRIFT_SKETCH_SIZE = int(getenv('DRIFT_SKETCH_SIZE', '200'))
+# Clients nécessaires avant d'évaluer la fenêtre courante
+DRIFT_MIN_ROWS = int(getenv('DRIFT_MIN_ROWS', '1000'))
+DRIFT_BUFFER_SIZE = int(getenv('DRIFT_BUFFER_SIZE', '10000'))
@@ -1,13 +1,144 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import StaticPool
+from time import perf_counter
 
-from api.config import DATABASE_URL
+from api.config import DATABASE_URL, ASYNC_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT_SECONDS, DB_POOL_RECYCLE_SECONDS, DB_POOL_PRE_PING, METRICS_ENABLED
+from api.modules.metrics import metrics
 
-engine = create_engine(DATABASE_URL,
-                       connect_args={"check_same_thread": False})
+# Pilotes asynchrones utilisés par défaut pour chaque backend
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+# Base SQLite en mémoire nommée et partagée : le moteur synchrone et le moteur
+# asynchrone doivent voir les mêmes tables au sein du processus.
+SHARED_MEMORY_DATABASE = 'file:clients_db?mode=memory&cache=shared&uri=true'
+
+# Pragmas appliqués à chaque connexion SQLite (journal_mode uniquement pour un fichier)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'foreign_keys': 'ON',
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+
+# Opérations SQL distinguées dans les métriques (les autres sont regroupées sous 'OTHER')
+SQL_OPERATIONS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'PRAGMA', 'CREATE')
+
+DB_QUERY_SECONDS = metrics.histogram('db_query_duration_seconds', "Durée d'exécution des requêtes SQL", ('engine', 'operation'))
+DB_QUERY_ERRORS = metrics.counter('db_query_errors_total', 'Requêtes SQL en erreur', ('engine', 'operation'))
+
+def is_sqlite_memory(url):
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and (url.database in (None, '', ':memory:') or 'mode=memory' in str(url))
+
+def normalize_database_url(url):
+    """Remplace une base SQLite en mémoire anonyme par la base en mémoire partagée"""
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return f'{url.drivername}:///{SHARED_MEMORY_DATABASE}'
+    return url.render_as_string(hide_password=False)
+
+def async_database_url(url):
+    """Déduit l'URL asynchrone (aiosqlite, asyncpg) de l'URL synchrone"""
+    url = make_url(normalize_database_url(url))
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f'Pas de pilote asynchrone connu pour {url.get_backend_name()}, définir ASYNC_DATABASE_URL')
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+def engine_options(url):
+    """
+    Options de `create_engine` adaptées au backend.
+
+    - SQLite en mémoire : une connexion unique partagée entre les threads.
+    - SQLite fichier : pool de connexions, sans pre-ping (pas de coupure réseau possible).
+    - Autres backends : pool dimensionné, pre-ping et recyclage des connexions.
+    """
+    if make_url(url).get_backend_name() == 'sqlite':
+        options = {'connect_args': {'check_same_thread': False}}
+        if is_sqlite_memory(url):
+            options['poolclass'] = StaticPool
+        else:
+            options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT_SECONDS)
+        return options
+    return {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT_SECONDS,
+        'pool_recycle': DB_POOL_RECYCLE_SECONDS,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+
+def configure_sqlite(sync_engine, url):
+    """Applique les pragmas SQLite à chaque nouvelle connexion du moteur"""
+    if make_url(url).get_backend_name() != 'sqlite':
+        return
+    pragmas = {name: value for name, value in SQLITE_PRAGMAS.items()
+               if not (name == 'journal_mode' and is_sqlite_memory(url))}
+
+    @event.listens_for(sync_engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+def sql_operation(statement):
+    words = statement.lstrip().split(None, 1)
+    operation = words[0].upper() if words else ''
+    return operation if operation in SQL_OPERATIONS else 'OTHER'
+
+def instrument_queries(sync_engine, name):
+    """
+    Mesure la durée d'exécution de chaque requête SQL du moteur (hors lecture des
+    lignes d'un curseur côté serveur), par opération, et compte les erreurs.
+    """
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def observe_query(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        DB_QUERY_SECONDS.labels(name, sql_operation(statement)).observe(perf_counter() - started)
+
+    @event.listens_for(sync_engine, 'handle_error')
+    def count_query_error(context):
+        connection = context.connection
+        if connection is not None and connection.info.get('query_started'):
+            connection.info['query_started'].pop()
+        DB_QUERY_ERRORS.labels(name, sql_operation(context.statement or '')).inc()
+
+def build_engine(url):
+    url = normalize_database_url(url)
+    sync_engine = create_engine(url, **engine_options(url))
+    configure_sqlite(sync_engine, url)
+    if METRICS_ENABLED:
+        instrument_queries(sync_engine, 'sync')
+    return sync_engine
+
+def build_async_engine(url):
+    async_engine = create_async_engine(url, **engine_options(url))
+    configure_sqlite(async_engine.sync_engine, url)
+    if METRICS_ENABLED:
+        instrument_queries(async_engine.sync_engine, 'async')
+    return async_engine
+
+engine = build_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = build_async_engine(ASYNC_DATABASE_URL or async_database_url(DATABASE_URL))
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -18,6 +149,11 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Générateur de session asynchrone de base de données, pour les routes `async def`"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def create_db_tables():
     """Crée les tables de la base de données"""
     Base.metadata.create_all(bind=engine)
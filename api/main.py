@@ -1,10 +1,33 @@
+import asyncio
 from contextlib import asynccontextmanager
 from loguru import logger
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 
-from api.routes import router
+from api.config import LOG_LEVEL, FAST_STARTUP, METRICS_ENABLED, PROFILING_ENABLED, PROFILING_TOKEN, PROFILING_INTERVAL_MS, PROFILING_DIR
+from api.routes import router, monitoring_router, batcher, prediction_log, prediction_audit, drift_tracker
+from api.serving import registry, executor, readiness, warm_up
+from api.modules.registry import ModelUnavailableError
+from api.modules.instrumentation import MetricsMiddleware
+from api.modules.metrics import metrics
 from api.database import create_db_tables
 
+async def warm_up_serving():
+    """Imports lourds et chargement de la variante active hors de la boucle asyncio, puis passage à l'état prêt"""
+    logger.info(f"Loading and warming up model variant {registry.active_variant}...")
+    try:
+        await run_in_threadpool(warm_up)
+    except ModelUnavailableError as err:
+        logger.error(f"Active model variant is unavailable, predictions will fail until another one is activated: {err}")
+        readiness.mark_degraded(err)
+        return
+    except Exception as err:
+        logger.error(f"Warm-up failed: {err}")
+        readiness.mark_failed(err)
+        return
+    readiness.mark_ready()
+    logger.info(f"Application ready after {readiness.warm_up_seconds:.2f}s")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Application startup: Creating database tables if they don't exist...")
@@ -14,21 +37,44 @@ async def lifespan(app: FastAPI):
     except Exception as err:
         logger.error(f"Failed to create database tables: {err}")
         raise
+
+    # FAST_STARTUP : l'API accepte les connexions tout de suite, le warm-up continue en tâche de fond
+    warm_up_task = None
+    if FAST_STARTUP:
+        warm_up_task = asyncio.create_task(warm_up_serving())
+    else:
+        await warm_up_serving()
     
     yield
     
     logger.info("Application shutdown: Cleaning up resources...")
+    if warm_up_task is not None and not warm_up_task.done():
+        warm_up_task.cancel()
+    await batcher.stop()
+    executor.shutdown()
+    await run_in_threadpool(prediction_log.close, 10)
+    await run_in_threadpool(prediction_audit.close, 30)
+    await run_in_threadpool(drift_tracker.close, 10)
 
 app = FastAPI(lifespan=lifespan)
 
 app.include_router(router)
 
+metrics.enabled = METRICS_ENABLED
+if METRICS_ENABLED:
+    app.include_router(monitoring_router)
+    app.add_middleware(MetricsMiddleware,
+                       profiling=PROFILING_ENABLED,
+                       profiling_token=PROFILING_TOKEN,
+                       profiling_dir=PROFILING_DIR,
+                       profiling_interval=PROFILING_INTERVAL_MS / 1000)
+
 logger.remove()
 
 logger.add("./api/logs/dev_api.log",
           rotation="10 MB",
           retention="7 days",
           compression="zip",
-          level="TRACE",
+          level=LOG_LEVEL,
           enqueue=True,
           format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}")
\ No newline at end of file
@@ -1,7 +1,13 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, Date
+from sqlalchemy import Column, Integer, String, Boolean, Float, Date, DateTime, Index, JSON
 
 from api.database import Base
 
+# Index composites (colonne de regroupement, colonne agrégée) de GET /api/clients/stats :
+# agrégats et quantiles lus dans l'index, déjà trié par valeur au sein de chaque groupe.
+# Les colonnes agrégées ont aussi leur propre index, pour les statistiques sans regroupement
+STATS_GROUP_COLUMNS = ('region', 'niveau_etude', 'situation_familiale')
+STATS_INDEXED_COLUMNS = ('montant_pret', 'revenu_estime_mois')
+
 class Client(Base):
     __tablename__ = 'clients'
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -10,17 +16,41 @@ class Client(Base):
     poids = Column(Float, nullable=True)
     sexe = Column(String, nullable=True)
     sport_licence = Column(Boolean, nullable=True)
-    niveau_etude = Column(String, nullable=True)
-    region = Column(String, nullable=True)
+    niveau_etude = Column(String, nullable=True, index=True)
+    region = Column(String, nullable=True, index=True)
     smoker = Column(Boolean, nullable=True)
-    revenu_estime_mois = Column(Float, nullable=True)
-    situation_familiale = Column(String, nullable=True)
+    revenu_estime_mois = Column(Float, nullable=True, index=True)
+    situation_familiale = Column(String, nullable=True, index=True)
     historique_credits = Column(Float, nullable=True)
     risque_personnel = Column(Float, nullable=True)
     score_credit = Column(Float, nullable=True)
     loyer_mensuel = Column(Float, nullable=True)
-    montant_pret = Column(Float, nullable=True)
+    montant_pret = Column(Float, nullable=True, index=True)
     date_creation_compte = Column(String, nullable=True) # Changed to String for pandas compatibility
     # new data columns
     nb_enfants = Column(Integer, nullable=True)
     quotient_caf = Column(Float, nullable=True)
+
+    __table_args__ = tuple(Index(f'ix_clients_{group}_{column}', group, column)
+                           for group in STATS_GROUP_COLUMNS for column in STATS_INDEXED_COLUMNS)
+
+class SeedCheckpoint(Base):
+    """Avancement d'un import CSV, mis à jour dans la même transaction que chaque morceau importé"""
+    __tablename__ = 'seed_checkpoints'
+    source = Column(String, primary_key=True) # chemin du CSV et table de destination
+    fingerprint = Column(String, nullable=False) # taille et date de modification du CSV
+    rows_done = Column(Integer, nullable=False, default=0)
+
+class PredictionAudit(Base):
+    """Prédiction (ou erreur) servie par l'API, conservée pour l'audit et écrite par lots en arrière-plan"""
+    __tablename__ = 'prediction_audit'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    endpoint = Column(String, nullable=False) # 'predict' ou 'predict_batch'
+    variant = Column(String, nullable=False)
+    model_version = Column(String, nullable=False)
+    prediction = Column(Float, nullable=True) # null en cas d'erreur
+    cached = Column(Boolean, nullable=False, default=False)
+    latency_ms = Column(Float, nullable=True)
+    error = Column(String, nullable=True)
+    client = Column(JSON, nullable=False) # champs validés du client
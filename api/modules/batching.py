@@ -0,0 +1,166 @@
+import asyncio
+from time import perf_counter
+from loguru import logger
+
+from api.modules.executor import SaturatedError
+from api.modules.metrics import Histogram
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+QUEUE_WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+class MicroBatcher:
+    """
+    Regroupe dynamiquement les appels concurrents en micro-lots.
+
+    Chaque appel à `submit()` dépose un élément dans une file. Une tâche de fond
+    collecte les éléments jusqu'à atteindre `max_batch_size` ou jusqu'à ce que
+    `max_wait_ms` se soit écoulé depuis le premier élément du lot, puis appelle
+    `process_batch(items)` une seule fois, hors de la boucle asyncio.
+    `process_batch` doit retourner une liste de résultats alignée sur `items` ; avec
+    un pool de processus, elle doit être définie au niveau d'un module et les
+    éléments doivent être sérialisables.
+
+    args:
+    - process_batch: fonction synchrone `list -> list`.
+    - max_batch_size: taille maximale d'un lot.
+    - max_wait_ms: attente maximale (en millisecondes) pour compléter un lot.
+    - max_concurrency: nombre de lots pouvant être traités simultanément.
+    - executor: BoundedExecutor utilisé pour `process_batch` (executor par défaut de la boucle si None).
+    - max_queue: nombre maximal d'éléments en attente ; au-delà, `submit()` lève
+      `SaturatedError` (0 pour une file non bornée).
+    """
+    def __init__(self, process_batch, max_batch_size=64, max_wait_ms=5.0, max_concurrency=1, executor=None, max_queue=0):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.executor = executor
+        self.max_queue = max(0, int(max_queue))
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait = Histogram(QUEUE_WAIT_BUCKETS)
+        self._queue = None
+        self._slots = None
+        self._worker = None
+        self._pending_batches = set()
+
+    async def start(self):
+        """Démarre la tâche de collecte si elle ne tourne pas déjà."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._worker = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        """Arrête la collecte, attend les lots en cours et rejette les éléments restants."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        if self._pending_batches:
+            await asyncio.gather(*self._pending_batches, return_exceptions=True)
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError('Micro-batcher stopped'))
+
+    async def submit(self, item):
+        """Ajoute un élément au prochain lot et attend son résultat."""
+        await self.start()
+        if self.max_queue and self._queue.qsize() >= self.max_queue:
+            raise SaturatedError(f'Prediction queue is full ({self.max_queue} pending items)')
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future, perf_counter()))
+        return await future
+
+    def metrics(self):
+        return {
+            'batch_size': self.batch_size.snapshot(),
+            'queue_wait_seconds': self.queue_wait.snapshot(),
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+        }
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._slots.acquire()
+                self._spawn_dispatch(batch)
+                batch = []
+        except asyncio.CancelledError:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError('Micro-batcher stopped'))
+            raise
+
+    def _spawn_dispatch(self, batch):
+        task = asyncio.create_task(self._dispatch(batch))
+        self._pending_batches.add(task)
+        task.add_done_callback(self._pending_batches.discard)
+
+    async def _dispatch(self, batch):
+        try:
+            started = perf_counter()
+            self.batch_size.observe(len(batch))
+            for _, _, enqueued_at in batch:
+                self.queue_wait.observe(started - enqueued_at)
+
+            items = [item for item, _, _ in batch]
+            try:
+                if self.executor is None:
+                    results = await asyncio.get_running_loop().run_in_executor(None, process_items, self.process_batch, items)
+                else:
+                    results = await self.executor.run(process_items, self.process_batch, items)
+            except Exception as err:
+                results = [err] * len(batch)
+
+            for (_, future, _), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+def process_items(process_batch, items):
+    """
+    Traite un lot. Si le lot échoue, chaque élément est retraité seul afin
+    qu'un élément invalide ne fasse pas échouer les autres.
+    """
+    try:
+        results = process_batch(items)
+        if len(results) != len(items):
+            raise ValueError(f'process_batch returned {len(results)} results for {len(items)} items')
+        return results
+    except Exception as err:
+        if len(items) == 1:
+            return [err]
+        logger.warning(f'Batch of {len(items)} items failed ({err}), retrying items one by one.')
+
+    results = []
+    for item in items:
+        try:
+            results.append(process_batch([item])[0])
+        except Exception as err:
+            results.append(err)
+    return results
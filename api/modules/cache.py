@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+from time import monotonic
+import json
+
+class PredictionCache:
+    """
+    Cache borné des prédictions, avec éviction LRU et durée de vie (TTL).
+
+    La clé est un hash canonique des champs du client et de la version du couple
+    modèle/preprocessor : changer de modèle rend toutes les entrées précédentes
+    inaccessibles, et `clear()` les libère immédiatement. La date de création du
+    compte est remplacée dans la clé par l'ancienneté en mois réellement vue par le
+    modèle, si bien qu'une entrée ne peut pas survivre au changement de mois.
+
+    args:
+    - max_size: nombre maximal d'entrées (0 désactive le cache).
+    - ttl_seconds: durée de vie d'une entrée.
+    """
+    def __init__(self, max_size=10000, ttl_seconds=3600, clock=monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def key(self, record, model_version):
+        """Clé canonique d'un client (dictionnaire des champs du schéma) pour une version de modèle."""
+        # Import différé : api.modules.preprocess charge pandas et scikit-learn
+        from api.modules.preprocess import months_since
+
+        canonical = dict(record)
+        if 'date_creation_compte' in canonical:
+            try:
+                canonical['anciennete_mois'] = months_since(canonical.pop('date_creation_compte'))
+            except ValueError:
+                canonical['date_creation_compte'] = record['date_creation_compte']
+        payload = json.dumps([model_version, canonical], sort_keys=True, separators=(',', ':'), default=str)
+        return blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get(self, key):
+        """Retourne la valeur en cache, ou None si absente ou expirée."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (value, self._clock() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Vide le cache (à appeler lors d'un changement de modèle)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            'size': size,
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+class QueryResultCache(PredictionCache):
+    """
+    Cache borné de résultats de requêtes (LRU et TTL), invalidé par les écritures.
+
+    La clé inclut un numéro de version incrémenté par `invalidate()` : un résultat
+    calculé pendant une écriture est rangé sous l'ancienne version et ne peut donc
+    plus être servi. Le TTL borne l'obsolescence quand la table est modifiée hors
+    du processus (autres workers, scripts d'import).
+    """
+    def __init__(self, max_size=256, ttl_seconds=300, clock=monotonic):
+        super().__init__(max_size=max_size, ttl_seconds=ttl_seconds, clock=clock)
+        self.version = 0
+        self.invalidations = 0
+
+    def key(self, *parts):
+        payload = json.dumps([self.version, parts], sort_keys=True, separators=(',', ':'), default=str)
+        return blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def invalidate(self):
+        """Rend inaccessibles tous les résultats en cache (à appeler après chaque écriture)."""
+        with self._lock:
+            self.version += 1
+            self.invalidations += 1
+            self._entries.clear()
+
+    def stats(self):
+        return {**super().stats(), 'version': self.version, 'invalidations': self.invalidations}
@@ -0,0 +1,155 @@
+import numpy as np
+
+from api.modules.preprocess import apply_manual_transformations, TARGET_COL
+
+# Hachage multiplicatif de Knuth : répartit les ids uniformément sur [0, 1)
+HASH_MULTIPLIER = 2654435761
+HASH_MODULUS = 2 ** 32
+
+def iter_parquet_chunks(path, chunk_size=50000, columns=None):
+    """
+    Lit un fichier Parquet par morceaux de `chunk_size` lignes (DataFrames pandas).
+    """
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+        yield batch.to_pandas()
+
+def export_chunks_to_parquet(chunks, path):
+    """
+    Écrit un flux de DataFrames dans un fichier Parquet, morceau par morceau.
+
+    returns:
+    - nombre de lignes écrites.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    n_rows = 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            n_rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_rows
+
+def validation_mask(ids, validation_fraction=0.2):
+    """
+    Affecte chaque ligne à la validation selon un hash de son id : la répartition
+    est stable d'une époque et d'un entraînement à l'autre, sans garder d'état.
+    """
+    ids = np.asarray(ids, dtype=np.uint64)
+    return (ids * np.uint64(HASH_MULTIPLIER)) % np.uint64(HASH_MODULUS) < np.uint64(validation_fraction * HASH_MODULUS)
+
+def processed_chunks(chunks, preprocessor, ethically_strict=True, subset='train', validation_fraction=0.2):
+    """
+    Applique les transformations manuelles et le preprocessor entraîné à chaque morceau.
+
+    args:
+    - chunks: itérable de DataFrames bruts, avec une colonne `id`.
+    - preprocessor: preprocessor entraîné.
+    - ethically_strict: Booléen pour choisir entre le preprocessing strict ou lâche.
+    - subset: 'train', 'validation' ou 'all'.
+    - validation_fraction: part des lignes réservée à la validation.
+
+    returns:
+    - générateur de couples (X, y) en float32.
+    """
+    for chunk in chunks:
+        if subset != 'all':
+            in_validation = validation_mask(chunk['id'], validation_fraction)
+            chunk = chunk[in_validation if subset == 'validation' else ~in_validation]
+        if not len(chunk):
+            continue
+        manual = apply_manual_transformations(chunk, ethically_strict=ethically_strict)
+        X = preprocessor.transform(manual.drop(columns=[TARGET_COL]))
+        yield np.asarray(X, dtype=np.float32), manual[TARGET_COL].to_numpy(dtype=np.float32)
+
+def make_dataset(chunk_factory, preprocessor, ethically_strict=True, subset='train', validation_fraction=0.2,
+                 batch_size=32, shuffle_buffer=10000, seed=42):
+    """
+    Construit un `tf.data.Dataset` de (X, y) alimenté morceau par morceau, pour
+    entraîner sur tout l'historique sans le charger en mémoire.
+
+    Les lignes sont mélangées dans un tampon de `shuffle_buffer` lignes (jeu
+    d'entraînement uniquement), regroupées en lots puis préchargées pendant que le
+    modèle calcule le lot précédent.
+
+    args:
+    - chunk_factory: fonction sans argument retournant un nouvel itérable de DataFrames
+      bruts (appelée à chaque époque), ex. `lambda: iter_client_chunks(engine)`.
+    - preprocessor: preprocessor entraîné.
+    - subset: 'train', 'validation' ou 'all'.
+    - batch_size: taille des lots.
+    - shuffle_buffer: taille du tampon de mélange (0 pour ne pas mélanger).
+
+    returns:
+    - tf.data.Dataset
+    """
+    n_features = len(preprocessor.get_feature_names_out())
+    return batched_dataset(
+        lambda: processed_chunks(chunk_factory(), preprocessor, ethically_strict, subset, validation_fraction),
+        n_features, shuffle=subset == 'train', batch_size=batch_size, shuffle_buffer=shuffle_buffer, seed=seed)
+
+def array_chunks(X, y, ids, subset='train', validation_fraction=0.2, chunk_size=50000):
+    """
+    Équivalent de `processed_chunks()` pour des matrices déjà calculées (par exemple
+    les tableaux projetés en mémoire du cache de features) : seules les lignes d'un
+    morceau sont lues à la fois.
+    """
+    for start in range(0, len(y), chunk_size):
+        X_chunk, y_chunk = X[start:start + chunk_size], y[start:start + chunk_size]
+        if subset != 'all':
+            in_validation = validation_mask(ids[start:start + chunk_size], validation_fraction)
+            keep = in_validation if subset == 'validation' else ~in_validation
+            X_chunk, y_chunk = X_chunk[keep], y_chunk[keep]
+        if len(y_chunk):
+            yield np.asarray(X_chunk, dtype=np.float32), np.asarray(y_chunk, dtype=np.float32)
+
+def make_array_dataset(X, y, ids, subset='train', validation_fraction=0.2, batch_size=32, shuffle_buffer=10000,
+                       seed=42, chunk_size=50000):
+    """
+    Construit le même `tf.data.Dataset` que `make_dataset()` à partir de matrices
+    déjà calculées (voir `api.modules.feature_store`), sans refaire le preprocessing.
+    """
+    return batched_dataset(
+        lambda: array_chunks(X, y, ids, subset, validation_fraction, chunk_size),
+        X.shape[1], shuffle=subset == 'train', batch_size=batch_size, shuffle_buffer=shuffle_buffer, seed=seed)
+
+def batched_dataset(generator_factory, n_features, shuffle=True, batch_size=32, shuffle_buffer=10000, seed=42):
+    """
+    Dataset de lots préchargés alimenté par un générateur de morceaux (X, y), mélangé
+    dans un tampon de `shuffle_buffer` lignes si `shuffle`.
+    """
+    import tensorflow as tf
+
+    dataset = tf.data.Dataset.from_generator(
+        generator_factory,
+        output_signature=(
+            tf.TensorSpec(shape=(None, n_features), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.float32),
+        ),
+    ).unbatch()
+    if shuffle and shuffle_buffer:
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+def predict_dataset(model, dataset):
+    """
+    Prédit un dataset (non mélangé) lot par lot, en un seul passage.
+
+    returns:
+    - (y_true, y_pred) sous forme de tableaux NumPy.
+    """
+    y_true, y_pred = [], []
+    for X, y in dataset:
+        y_true.append(y.numpy())
+        y_pred.append(np.asarray(model.predict_on_batch(X)).flatten())
+    return np.concatenate(y_true), np.concatenate(y_pred)
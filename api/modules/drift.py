@@ -0,0 +1,350 @@
+import math
+from random import Random
+from threading import Lock
+
+import numpy as np
+from loguru import logger
+
+from api.modules.write_behind import WriteBehindBuffer
+
+# Nombre de classes du PSI (déciles de la fenêtre de comparaison)
+PSI_BINS = 10
+# Proportion minimale d'une classe, pour que le PSI reste fini
+PSI_EPSILON = 1e-4
+SKETCH_SIZE = 200
+
+DRIFT_STATUSES = ('stable', 'moderate', 'significant')
+# Seuils (dérive modérée, significative) de chaque score
+PSI_THRESHOLDS = (0.1, 0.25)
+MEAN_SHIFT_THRESHOLDS = (0.1, 0.25) # en écarts-types du preprocessor
+STD_RATIO_THRESHOLDS = (1.25, 1.5) # rapport des écarts-types, dans un sens ou dans l'autre
+UNSEEN_RATE_THRESHOLDS = (0.01, 0.05)
+
+class QuantileSketch:
+    """
+    Résumé en mémoire bornée d'une distribution numérique (compacteurs de type KLL).
+
+    Les valeurs arrivent au niveau 0 ; un niveau qui atteint `k` valeurs est trié
+    et une valeur sur deux (décalage aléatoire) est promue au niveau suivant, où
+    elle compte double. La mémoire est en O(k·log(n/k)) et l'erreur de rang en
+    O(1/k) : `cdf()` et `quantile()` ne parcourent que le résumé.
+
+    args:
+    - k: nombre de valeurs par niveau (précision du résumé).
+    - seed: graine des décalages de compaction.
+    """
+    def __init__(self, k=SKETCH_SIZE, seed=None):
+        self.k = max(2, int(k))
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = Random(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self.k:
+                items = np.sort(items)
+                # Un nombre pair de valeurs est compacté, la dernière reste au niveau courant
+                kept = items[len(items) - len(items) % 2:]
+                promoted = items[:len(items) - len(kept)][self._rng.randint(0, 1)::2]
+                self.levels[level] = kept
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def weighted_items(self):
+        """Valeurs du résumé triées et fonction de répartition (continue à droite) en chacune d'elles."""
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        values, weights = values[order], weights[order]
+        return values, np.cumsum(weights) / weights.sum(), weights / weights.sum()
+
+    def cdf(self, x):
+        values, cumulative, _ = self.weighted_items()
+        if not len(values):
+            return np.full(np.shape(x), np.nan)
+        index = np.searchsorted(values, x, side='right')
+        return np.where(index > 0, cumulative[np.maximum(index - 1, 0)], 0.0)
+
+    def quantile(self, q):
+        values, cumulative, _ = self.weighted_items()
+        if not len(values):
+            return np.nan
+        return float(values[min(np.searchsorted(cumulative, q, side='left'), len(values) - 1)])
+
+def drift_reference(preprocessor):
+    """
+    Statistiques de référence d'un preprocessor entraîné (scikit-learn ou compilé) :
+    moyenne et écart-type de la standardisation et valeur d'imputation pour les
+    colonnes numériques, catégories de l'encodeur pour les colonnes catégorielles.
+
+    Le preprocessor ne conserve ni la forme des distributions ni la fréquence des
+    catégories : ces statistiques servent aux écarts de moments et au taux de
+    catégories inconnues, la forme étant comparée d'une fenêtre à la suivante.
+    """
+    from api.modules.compiled_preprocessor import CompiledPreprocessor, compile_preprocessor
+
+    if not isinstance(preprocessor, CompiledPreprocessor):
+        preprocessor = compile_preprocessor(preprocessor)
+    numeric, categorical = {}, {}
+    for block in preprocessor.numeric_blocks:
+        for column, mean, scale, fill in zip(block['columns'], block['mean'], block['scale'], block['fill']):
+            numeric[column] = {'mean': float(mean), 'std': float(scale), 'fill': float(fill)}
+    for block in preprocessor.categorical_blocks:
+        for column, table in zip(block['columns'], block['tables']):
+            categorical[column] = set(table)
+    return {'numeric': numeric, 'categorical': categorical}
+
+def population_stability_index(actual, expected):
+    """
+    PSI entre des proportions observées et attendues par classe :
+    somme de (observé - attendu) · ln(observé / attendu).
+    """
+    actual = np.maximum(np.asarray(actual, dtype=np.float64), PSI_EPSILON)
+    expected = np.maximum(np.asarray(expected, dtype=np.float64), PSI_EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+def sketch_psi(current, baseline):
+    """PSI de `current` sur les classes équiprobables (déciles) de `baseline`, calculé sur les résumés."""
+    edges = np.unique([baseline.quantile(i / PSI_BINS) for i in range(1, PSI_BINS)])
+    bounds = lambda sketch: np.concatenate([[0.0], sketch.cdf(edges), [1.0]])
+    return population_stability_index(np.diff(bounds(current)), np.diff(bounds(baseline)))
+
+def sketch_ks(current, baseline):
+    """Écart maximal entre les fonctions de répartition de deux résumés (statistique de Kolmogorov-Smirnov)."""
+    points = np.concatenate([current.weighted_items()[0], baseline.weighted_items()[0]])
+    return float(np.max(np.abs(current.cdf(points) - baseline.cdf(points))))
+
+def drift_level(value, thresholds):
+    """0 (stable), 1 (modérée) ou 2 (significative) selon les seuils ; None sans valeur."""
+    if value is None:
+        return None
+    return sum(value >= threshold for threshold in thresholds)
+
+def drift_status(levels):
+    levels = [level for level in levels if level is not None]
+    return DRIFT_STATUSES[max(levels)] if levels else 'no_data'
+
+class DriftWindow:
+    """
+    Statistiques d'une fenêtre de clients, mises à jour par lots sans conserver les
+    données : par colonne numérique, la somme et la somme des carrés des valeurs
+    imputées (comparées à la moyenne et à l'écart-type du preprocessor) et un
+    `QuantileSketch` des valeurs observées ; par colonne catégorielle, les effectifs
+    par valeur.
+    """
+    def __init__(self, reference, sketch_size=SKETCH_SIZE):
+        self.reference = reference
+        self.rows = 0
+        self.sketches = {column: QuantileSketch(sketch_size) for column in reference['numeric']}
+        self.moments = {column: np.zeros(3) for column in reference['numeric']}
+        self.missing = dict.fromkeys(list(reference['numeric']) + list(reference['categorical']), 0)
+        self.categories = {column: {} for column in reference['categorical']}
+
+    def update(self, df):
+        """Ajoute un DataFrame de clients (après `apply_manual_transformations`) à la fenêtre."""
+        self.rows += len(df)
+        for column, sketch in self.sketches.items():
+            if column not in df.columns:
+                continue
+            values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            missing = np.isnan(values)
+            self.missing[column] += int(missing.sum())
+            # Valeurs telles que les voit la standardisation : manquants remplacés par la valeur d'imputation
+            imputed = np.where(missing, self.reference['numeric'][column]['fill'], values)
+            self.moments[column] += (len(imputed), imputed.sum(), np.square(imputed).sum())
+            sketch.update(values[~missing])
+        for column, counts in self.categories.items():
+            if column not in df.columns:
+                continue
+            values = df[column]
+            missing = values.isna()
+            self.missing[column] += int(missing.sum())
+            for value, count in values[~missing].astype(object).value_counts().items():
+                counts[value] = counts.get(value, 0) + int(count)
+
+    def report(self, baseline=None, min_rows=0):
+        """
+        Scores de la fenêtre : écart au preprocessor et, si `baseline` (fenêtre
+        précédente) est fournie, PSI et KS par rapport à elle. En dessous de
+        `min_rows` clients, les scores valent None et le statut est 'no_data'.
+        """
+        scored = self.rows >= min_rows
+        numeric = {}
+        for column, sketch in self.sketches.items():
+            stats = self.reference['numeric'][column]
+            count, total, squares = self.moments[column]
+            scores = {'count': int(count), 'missing': self.missing[column], 'reference_mean': stats['mean'],
+                      'reference_std': stats['std'], 'mean': None, 'std': None, 'mean_shift': None, 'std_ratio': None,
+                      'median': sketch.quantile(0.5) if sketch.count else None, 'psi': None, 'ks': None}
+            if count:
+                mean = float(total / count)
+                std = math.sqrt(max(squares / count - mean ** 2, 0.0))
+                scores.update(mean=mean, std=std)
+                if scored:
+                    scale = stats['std'] or 1.0
+                    scores.update(mean_shift=(mean - stats['mean']) / scale, std_ratio=std / scale)
+            baseline_sketch = baseline.sketches[column] if baseline is not None else None
+            if scored and sketch.count and baseline_sketch is not None and baseline_sketch.count:
+                scores.update(psi=sketch_psi(sketch, baseline_sketch), ks=sketch_ks(sketch, baseline_sketch))
+            std_ratio = scores['std_ratio']
+            scores['status'] = drift_status([
+                drift_level(abs(scores['mean_shift']), MEAN_SHIFT_THRESHOLDS) if scores['mean_shift'] is not None else None,
+                drift_level(max(std_ratio, 1 / std_ratio), STD_RATIO_THRESHOLDS) if std_ratio else None,
+                drift_level(scores['psi'], PSI_THRESHOLDS),
+            ])
+            numeric[column] = scores
+        categorical = {}
+        for column, counts in self.categories.items():
+            total = sum(counts.values())
+            known = self.reference['categorical'][column]
+            unseen = {str(value): count for value, count in counts.items() if value not in known}
+            scores = {
+                'count': total,
+                'missing': self.missing[column],
+                'frequencies': {str(value): count / total for value, count in counts.items()} if total else {},
+                'unseen_rate': sum(unseen.values()) / total if total and scored else None,
+                'unseen': unseen,
+                'psi': None,
+            }
+            baseline_counts = baseline.categories[column] if baseline is not None else {}
+            baseline_total = sum(baseline_counts.values())
+            if scored and total and baseline_total:
+                values = set(counts) | set(baseline_counts)
+                scores['psi'] = population_stability_index([counts.get(value, 0) / total for value in values],
+                                                           [baseline_counts.get(value, 0) / baseline_total for value in values])
+            scores['status'] = drift_status([drift_level(scores['unseen_rate'], UNSEEN_RATE_THRESHOLDS),
+                                             drift_level(scores['psi'], PSI_THRESHOLDS)])
+            categorical[column] = scores
+        status = drift_status([DRIFT_STATUSES.index(scores['status'])
+                               for scores in list(numeric.values()) + list(categorical.values())
+                               if scores['status'] != 'no_data'])
+        return {'rows': self.rows, 'min_rows': min_rows, 'status': status, 'numeric': numeric, 'categorical': categorical}
+
+class DriftMonitor:
+    """
+    Suivi de dérive d'une version de modèle, par fenêtres de `window_rows` clients :
+    la fenêtre courante et les deux dernières fenêtres complètes sont conservées.
+    Le PSI et le KS de la fenêtre courante sont calculés par rapport à la dernière
+    fenêtre complète, et ceux de la dernière fenêtre complète par rapport à celle
+    qui la précède. La fenêtre courante n'est évaluée qu'à partir de `min_rows`
+    clients (un dixième de la fenêtre par défaut).
+    """
+    def __init__(self, reference, window_rows=10000, sketch_size=SKETCH_SIZE, min_rows=None):
+        self.reference = reference
+        self.window_rows = window_rows
+        self.sketch_size = sketch_size
+        self.min_rows = min(window_rows, window_rows // 10 if min_rows is None else min_rows)
+        self.current = DriftWindow(reference, sketch_size)
+        self.previous = None
+        self.before_previous = None
+        self.total_rows = 0
+        self._lock = Lock()
+
+    def update(self, df):
+        """Ajoute des clients (après `apply_manual_transformations`), en changeant de fenêtre si besoin."""
+        with self._lock:
+            position = 0
+            while position < len(df):
+                chunk = df.iloc[position:position + self.window_rows - self.current.rows]
+                self.current.update(chunk)
+                self.total_rows += len(chunk)
+                position += len(chunk)
+                if self.current.rows >= self.window_rows:
+                    self.before_previous, self.previous = self.previous, self.current
+                    self.current = DriftWindow(self.reference, self.sketch_size)
+
+    def report(self):
+        with self._lock:
+            return {
+                'window_rows': self.window_rows,
+                'total_rows': self.total_rows,
+                'current': self.current.report(baseline=self.previous, min_rows=self.min_rows),
+                'previous': self.previous.report(baseline=self.before_previous) if self.previous is not None else None,
+            }
+
+class DriftTracker:
+    """
+    Alimente un `DriftMonitor` par version de modèle avec les clients prédits.
+
+    `observe()` ne fait que mettre les clients en file (sans bloquer, les clients en
+    excès sont ignorés) ; les transformations manuelles et la mise à jour des résumés
+    sont faites par lots dans un thread de fond, hors du chemin des requêtes.
+
+    args:
+    - max_items / flush_interval: voir `WriteBehindBuffer`.
+    - window_rows: nombre de clients par fenêtre de suivi.
+    - sketch_size: précision des résumés de quantiles.
+    - min_rows: clients nécessaires pour évaluer la fenêtre courante (voir `DriftMonitor`).
+    - enabled: False pour ne rien suivre.
+    """
+    def __init__(self, max_items=10000, flush_interval=1.0, window_rows=10000, sketch_size=SKETCH_SIZE, min_rows=None,
+                 enabled=True):
+        self.window_rows = window_rows
+        self.sketch_size = sketch_size
+        self.min_rows = min_rows
+        self.enabled = enabled
+        self.monitors = {}
+        self.errors = {}
+        self.buffer = WriteBehindBuffer(self._update, max_items=max_items, batch_size=1000,
+                                        flush_interval=flush_interval, name='drift-monitor')
+
+    def observe(self, entry, clients):
+        """
+        Met en file des clients prédits par `entry` : un dictionnaire (un client) ou
+        un DataFrame de clients validés.
+        """
+        if self.enabled:
+            self.buffer.put((entry, clients))
+
+    def report(self, variant=None):
+        return {
+            f'{entry_variant}@{version}': {'variant': entry_variant, 'version': version, **monitor.report()}
+            for (entry_variant, version), monitor in list(self.monitors.items())
+            if variant is None or entry_variant == variant
+        }
+
+    def close(self, timeout=None):
+        self.buffer.close(timeout)
+
+    def stats(self):
+        return {**self.buffer.stats(), 'monitors': len(self.monitors), 'errors': dict(self.errors)}
+
+    def _monitor(self, entry):
+        key = (entry.variant, entry.version)
+        if key not in self.monitors:
+            self.monitors[key] = DriftMonitor(drift_reference(entry.preprocessor), self.window_rows, self.sketch_size,
+                                              self.min_rows)
+        return self.monitors[key]
+
+    def _update(self, items):
+        """Regroupe les clients par version de modèle et met à jour les résumés (thread de fond)."""
+        import pandas as pd
+        from api.modules.preprocess import apply_manual_transformations
+
+        grouped = {}
+        for entry, clients in items:
+            grouped.setdefault((entry.variant, entry.version), (entry, []))[1].append(clients)
+        for key, (entry, batches) in grouped.items():
+            try:
+                records = [batch for batch in batches if isinstance(batch, dict)]
+                frames = [batch for batch in batches if not isinstance(batch, dict)]
+                if records:
+                    frames.append(pd.DataFrame(records))
+                df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+                self._monitor(entry).update(apply_manual_transformations(df, ethically_strict=entry.ethically_strict))
+            except Exception as err:
+                self.errors[f'{key[0]}@{key[1]}'] = str(err)
+                logger.warning(f'Drift monitor update failed for {key[0]}@{key[1]}: {err}')
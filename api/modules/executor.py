@@ -0,0 +1,113 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Lock
+
+from api.modules.metrics import call_collecting_stages, metrics, replay_stages
+
+class SaturatedError(RuntimeError):
+    """La file d'admission est pleine : la requête doit être réessayée plus tard."""
+
+class BoundedExecutor:
+    """
+    Pool de threads ou de processus avec une admission bornée, pour exécuter le
+    code CPU (pandas, scikit-learn, Keras) hors de la boucle asyncio.
+
+    Au plus `max_workers + max_queue` tâches peuvent être admises en même temps ;
+    au-delà, `run()` lève immédiatement `SaturatedError` au lieu de laisser la
+    file grossir. Une tâche dont l'attente dépasse son timeout continue de
+    s'exécuter dans le pool et garde sa place jusqu'à la fin.
+
+    args:
+    - kind: 'thread' ou 'process' (processus lancés en mode spawn ; les fonctions
+      et arguments doivent alors être sérialisables).
+    - max_workers: nombre de threads ou de processus.
+    - max_queue: nombre de tâches pouvant attendre un worker libre.
+    - initializer: fonction appelée au démarrage de chaque worker (ex. chargement du modèle).
+    """
+    def __init__(self, kind='thread', max_workers=4, max_queue=64, initializer=None):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Type d'executor inconnu : {kind}")
+        self.kind = kind
+        self.max_workers = max(1, int(max_workers))
+        self.capacity = self.max_workers + max(0, int(max_queue))
+        self.initializer = initializer
+        self._pool = None
+        self._lock = Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.kind == 'process':
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=self.initializer)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='inference',
+                                                initializer=self.initializer)
+        return self._pool
+
+    async def run(self, fn, *args, timeout=None):
+        """
+        Exécute `fn(*args)` dans le pool et attend son résultat.
+
+        raises:
+        - SaturatedError si la capacité d'admission est atteinte.
+        - asyncio.TimeoutError si le résultat n'est pas disponible après `timeout` secondes.
+        """
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                raise SaturatedError(f'Inference executor saturated ({self._in_flight}/{self.capacity} tasks admitted)')
+            self._in_flight += 1
+        # Un worker de processus renvoie aussi la durée de ses étapes, invisibles sinon dans ce processus
+        collect_stages = self.kind == 'process' and metrics.enabled
+        try:
+            if collect_stages:
+                future = self._get_pool().submit(call_collecting_stages, fn, *args)
+            else:
+                future = self._get_pool().submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            future.cancel()
+            raise
+        if collect_stages:
+            result, stages = result
+            replay_stages(stages)
+        return result
+
+    def _release(self, future=None):
+        with self._lock:
+            self._in_flight -= 1
+            if future is not None and not future.cancelled():
+                self.completed += 1
+
+    def shutdown(self, wait=True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+    def stats(self):
+        return {
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            'capacity': self.capacity,
+            'in_flight': self._in_flight,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+        }
@@ -0,0 +1,297 @@
+import json
+import os
+import pickle
+import shutil
+from hashlib import blake2b
+from os.path import abspath, exists, getmtime, getsize, isdir, join
+from time import time
+from uuid import uuid4
+
+import joblib
+import numpy as np
+import sklearn
+
+from api.modules import incremental_preprocess, preprocess
+from api.modules.datasets import processed_chunks
+from api.modules.incremental_preprocess import client_watermark, fit_preprocessor_incremental, iter_client_chunks
+
+FEATURE_STORE_DIR = join('.', 'data', 'features')
+FORMAT_VERSION = 1
+# `anciennete_mois` dépend de la date du jour : au-delà, les features sont recalculées
+MAX_AGE_SECONDS = 24 * 3600
+TMP_PREFIX = '.tmp-'
+MANIFEST = 'manifest.json'
+
+def preprocessing_code_version():
+    """
+    Identifiant du code de preprocessing (transformations manuelles et entraînement
+    du preprocessor) et de la version de scikit-learn : modifier l'un d'eux invalide
+    toutes les entrées du cache.
+    """
+    digest = blake2b(digest_size=8)
+    digest.update(f'{FORMAT_VERSION}:{sklearn.__version__}:{np.__version__};'.encode('utf-8'))
+    for module in (preprocess, incremental_preprocess):
+        with open(module.__file__, 'rb') as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+def preprocessor_version(preprocessor=None):
+    """
+    Version du preprocessor : celle du code qui l'entraîne quand le cache l'entraîne
+    lui-même, sinon l'empreinte du preprocessor fourni (déjà entraîné).
+    """
+    code_version = preprocessing_code_version()
+    if preprocessor is None:
+        return f'fit-{code_version}'
+    digest = blake2b(pickle.dumps(preprocessor, protocol=4), digest_size=8)
+    return f'{digest.hexdigest()}-{code_version}'
+
+def parquet_watermark(path):
+    """Filigrane d'un export Parquet : chemin, taille, date de modification et nombre de lignes."""
+    import pyarrow.parquet as pq
+
+    return {'source': abspath(path), 'size': getsize(path), 'mtime': getmtime(path),
+            'rows': pq.ParquetFile(path).metadata.num_rows}
+
+class FeatureSet:
+    """Matrices (X, y) préprocessées, projetées en mémoire en lecture seule, et leur preprocessor."""
+    def __init__(self, path):
+        self.path = path
+        with open(join(path, MANIFEST), encoding='utf-8') as manifest:
+            self.manifest = json.load(manifest)
+        self.key = self.manifest['key']
+        self.X = np.load(join(path, 'X.npy'), mmap_mode='r')
+        self.y = np.load(join(path, 'y.npy'), mmap_mode='r')
+        self.ids = np.load(join(path, 'ids.npy'), mmap_mode='r')
+        self._preprocessor = None
+
+    @property
+    def preprocessor(self):
+        if self._preprocessor is None:
+            self._preprocessor = joblib.load(join(self.path, 'preprocessor.pkl'))
+        return self._preprocessor
+
+    def __len__(self):
+        return len(self.y)
+
+class FeatureStore:
+    """
+    Cache sur disque des matrices d'entraînement préprocessées.
+
+    Chaque entrée est un dossier `<clé>/` contenant X.npy, y.npy, ids.npy (lus en
+    projection mémoire), le preprocessor et un manifeste. La clé combine le mode de
+    preprocessing, la fenêtre de données, la version du preprocessor et le filigrane
+    des données (nombre de lignes et plus grand id) : toute modification de l'un
+    d'eux produit une nouvelle entrée au lieu de réutiliser une matrice périmée.
+
+    Une entrée est écrite dans un dossier temporaire puis renommée : un lecteur ne
+    voit jamais d'entrée incomplète, et deux processus qui calculent la même entrée
+    en parallèle gardent simplement la première écrite.
+    """
+    def __init__(self, root=FEATURE_STORE_DIR, max_age=MAX_AGE_SECONDS):
+        self.root = root
+        self.max_age = max_age
+
+    @staticmethod
+    def make_key(ethically_strict, window, version, watermark):
+        description = json.dumps([ethically_strict, window, version, watermark], sort_keys=True, default=str)
+        digest = blake2b(description.encode('utf-8'), digest_size=10).hexdigest()
+        return f"{'strict' if ethically_strict else 'loose'}-{window or 'all'}-{digest}"
+
+    def get(self, key):
+        """Retourne l'entrée `key` si elle existe et n'a pas expiré, sinon None."""
+        path = join(self.root, key)
+        if not exists(join(path, MANIFEST)):
+            return None
+        feature_set = FeatureSet(path)
+        if self._is_stale(feature_set.manifest):
+            return None
+        return feature_set
+
+    def materialize(self, chunk_factory, ethically_strict, watermark, window=None, preprocessor=None, refresh=False):
+        """
+        Retourne les matrices préprocessées d'un jeu de données, en les calculant et
+        en les écrivant sur disque si elles ne sont pas déjà dans le cache.
+
+        args:
+        - chunk_factory: fonction sans argument retournant un nouvel itérable de
+          DataFrames bruts (avec une colonne `id`), limité au filigrane.
+        - ethically_strict: Booléen pour choisir entre le preprocessing strict ou lâche.
+        - watermark: dictionnaire identifiant l'état des données, avec leur nombre de
+          lignes `rows` (voir `client_watermark()` et `parquet_watermark()`).
+        - window: nom de la fenêtre de données (ex. 'last_10000'), None pour tout.
+        - preprocessor: preprocessor déjà entraîné à appliquer ; par défaut, il est
+          entraîné en flux sur les mêmes données.
+        - refresh: recalculer l'entrée même si elle est en cache.
+
+        returns:
+        - FeatureSet
+        """
+        version = preprocessor_version(preprocessor)
+        key = self.make_key(ethically_strict, window, version, watermark)
+        feature_set = None if refresh else self.get(key)
+        if feature_set is not None:
+            print(f"♻️ Features réutilisées depuis le cache ({key}, {len(feature_set)} lignes)")
+            return feature_set
+
+        if preprocessor is None:
+            preprocessor = fit_preprocessor_incremental(chunk_factory(), ethically_strict=ethically_strict)
+        manifest = {
+            'key': key,
+            'mode': 'strict' if ethically_strict else 'loose',
+            'window': window,
+            'preprocessor_version': version,
+            'code_version': preprocessing_code_version(),
+            'watermark': watermark,
+            'created_at': time(),
+        }
+        path = self._write(chunk_factory, preprocessor, ethically_strict, watermark['rows'], manifest)
+        self.prune(keep=[key])
+        feature_set = FeatureSet(path)
+        print(f"💾 Features écrites dans le cache ({key}, {len(feature_set)} lignes)")
+        return feature_set
+
+    def _write(self, chunk_factory, preprocessor, ethically_strict, n_rows, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = join(self.root, f"{TMP_PREFIX}{manifest['key']}-{uuid4().hex}")
+        path = join(self.root, manifest['key'])
+        os.makedirs(tmp_path)
+        try:
+            n_features = len(preprocessor.get_feature_names_out())
+            X = np.lib.format.open_memmap(join(tmp_path, 'X.npy'), mode='w+', dtype=np.float32, shape=(n_rows, n_features))
+            y = np.lib.format.open_memmap(join(tmp_path, 'y.npy'), mode='w+', dtype=np.float32, shape=(n_rows,))
+            ids = np.lib.format.open_memmap(join(tmp_path, 'ids.npy'), mode='w+', dtype=np.int64, shape=(n_rows,))
+            written = 0
+            for chunk in chunk_factory():
+                for X_chunk, y_chunk in processed_chunks([chunk], preprocessor, ethically_strict, subset='all'):
+                    end = written + len(y_chunk)
+                    if end > n_rows:
+                        raise ValueError(f'Les données ont changé pendant le calcul des features ({n_rows} lignes attendues)')
+                    X[written:end], y[written:end], ids[written:end] = X_chunk, y_chunk, chunk['id'].to_numpy()
+                    written = end
+            for array in (X, y, ids):
+                array.flush()
+            del X, y, ids
+            if written < n_rows:
+                # Lignes supprimées entre le filigrane et la lecture : on tronque les matrices
+                for name in ('X', 'y', 'ids'):
+                    _truncate(join(tmp_path, f'{name}.npy'), written)
+
+            joblib.dump(preprocessor, join(tmp_path, 'preprocessor.pkl'))
+            manifest = {**manifest, 'rows': written, 'n_features': n_features,
+                        'feature_names': [str(name) for name in preprocessor.get_feature_names_out()]}
+            with open(join(tmp_path, MANIFEST), 'w', encoding='utf-8') as manifest_file:
+                json.dump(manifest, manifest_file, indent=2, default=str)
+
+            if isdir(path):
+                # Entrée expirée ou recalculée : elle est remplacée
+                shutil.rmtree(path, ignore_errors=True)
+            try:
+                os.replace(tmp_path, path)
+            except OSError:
+                # Un autre processus vient d'écrire la même entrée : on garde la sienne
+                shutil.rmtree(tmp_path, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        return path
+
+    def entries(self):
+        """Manifestes des entrées complètes du cache."""
+        if not isdir(self.root):
+            return []
+        manifests = []
+        for name in sorted(os.listdir(self.root)):
+            manifest_path = join(self.root, name, MANIFEST)
+            if name.startswith(TMP_PREFIX) or not exists(manifest_path):
+                continue
+            with open(manifest_path, encoding='utf-8') as manifest:
+                manifests.append(json.load(manifest))
+        return manifests
+
+    def prune(self, keep=()):
+        """
+        Supprime les entrées périmées : code de preprocessing modifié, entrée expirée,
+        ou entrée remplacée par une plus récente pour le même mode, la même fenêtre,
+        la même source de données et le même preprocessor. Les dossiers temporaires abandonnés (processus
+        interrompu) sont aussi supprimés.
+
+        args:
+        - keep: clés à conserver quoi qu'il arrive.
+
+        returns:
+        - liste des clés supprimées.
+        """
+        if not isdir(self.root):
+            return []
+        manifests = self.entries()
+        kept_groups = {_group(manifest) for manifest in manifests if manifest['key'] in keep}
+        removed, latest_groups = [], set()
+        for manifest in sorted(manifests, key=lambda manifest: manifest['created_at'], reverse=True):
+            if manifest['key'] in keep:
+                continue
+            group = _group(manifest)
+            if self._is_stale(manifest) or group in kept_groups or group in latest_groups:
+                removed.append(manifest['key'])
+            else:
+                latest_groups.add(group)
+
+        for name in os.listdir(self.root):
+            path = join(self.root, name)
+            if name.startswith(TMP_PREFIX) and time() - getmtime(path) > self.max_age:
+                removed.append(name)
+        for name in removed:
+            shutil.rmtree(join(self.root, name), ignore_errors=True)
+        return removed
+
+    def clear(self):
+        """Vide entièrement le cache."""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _is_stale(self, manifest):
+        return (manifest.get('code_version') != preprocessing_code_version()
+                or time() - manifest['created_at'] > self.max_age)
+
+def _group(manifest):
+    """Entrées qui se remplacent l'une l'autre : seul le filigrane des données diffère."""
+    return manifest['mode'], manifest['window'], manifest['watermark'].get('source'), manifest['preprocessor_version']
+
+def _truncate(path, n_rows):
+    """Réécrit un fichier .npy avec ses `n_rows` premières lignes."""
+    array = np.load(path, mmap_mode='r')
+    truncated_path = f'{path}.truncated'
+    truncated = np.lib.format.open_memmap(truncated_path, mode='w+', dtype=array.dtype, shape=(n_rows,) + array.shape[1:])
+    truncated[:] = array[:n_rows]
+    truncated.flush()
+    del array, truncated
+    os.replace(truncated_path, path)
+
+def client_features(engine, ethically_strict=True, first_n=None, last_n=None, chunk_size=50000, store=None,
+                    preprocessor=None, refresh=False):
+    """
+    Matrices préprocessées d'une fenêtre de la table `clients`, depuis le cache de
+    features (calculées et mises en cache au premier appel).
+
+    args:
+    - engine: moteur SQLAlchemy.
+    - ethically_strict: Booléen pour choisir entre le preprocessing strict ou lâche.
+    - first_n / last_n: ne garder que les clients les plus anciens / les plus récents.
+    - chunk_size: nombre de lignes lues par morceau.
+    - store: FeatureStore à utiliser (dossier par défaut sinon).
+    - preprocessor: preprocessor déjà entraîné (sinon entraîné en flux sur la fenêtre).
+    - refresh: recalculer l'entrée même si elle est en cache.
+
+    returns:
+    - FeatureSet
+    """
+    store = store or FeatureStore()
+    watermark = client_watermark(engine, first_n=first_n, last_n=last_n)
+    if not watermark['rows']:
+        raise ValueError('Aucun client dans la fenêtre demandée')
+    window = f'first_{first_n}' if first_n is not None else f'last_{last_n}' if last_n is not None else None
+
+    def chunk_factory():
+        return iter_client_chunks(engine, chunk_size, first_n=first_n, last_n=last_n, max_id=watermark['max_id'])
+
+    return store.materialize(chunk_factory, ethically_strict, {**watermark, 'source': f'{engine.url}#clients'}, window=window,
+                             preprocessor=preprocessor, refresh=refresh)
@@ -0,0 +1,185 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing._data import _handle_zeros_in_scale
+
+from api.modules.preprocess import apply_manual_transformations, build_preprocessor, pipeline_columns, TARGET_COL
+
+class NumericStats:
+    """
+    Statistiques d'une colonne numérique accumulées morceau par morceau : nombre de
+    lignes, nombre de valeurs présentes, moyenne et somme des carrés des écarts (M2),
+    fusionnées avec la formule de Chan (celle de `StandardScaler.partial_fit`).
+    """
+    def __init__(self):
+        self.n_rows = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.n_rows += len(values)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        count, mean = len(values), values.mean()
+        m2 = ((values - mean) ** 2).sum()
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    @property
+    def imputed_var(self):
+        """Variance de la colonne après imputation par la moyenne (les valeurs imputées ont un écart nul)."""
+        return self.m2 / self.n_rows
+
+class CategoricalStats:
+    """
+    Comptage des valeurs d'une colonne catégorielle. Comme `SimpleImputer`, seuls les
+    NaN sont des valeurs manquantes (None reste une catégorie).
+    """
+    def __init__(self):
+        self.counts = Counter()
+
+    def update(self, column):
+        values = column.astype(object).to_numpy()
+        present = values[values == values]
+        counts = pd.Series(present, dtype=object).value_counts(dropna=False)
+        for value, count in counts.items():
+            # Après exclusion des NaN, une clé manquante ne peut venir que de None
+            self.counts[None if value != value else value] += int(count)
+
+    def most_frequent(self):
+        """Valeur la plus fréquente, la plus petite en cas d'égalité (comme `SimpleImputer`)."""
+        top = max(self.counts.values())
+        return min(value for value, count in self.counts.items() if count == top)
+
+def fit_preprocessor_incremental(chunks, ethically_strict=True):
+    """
+    Entraîne le preprocessor "ethically strict" ou "ethically loose" sur un flux de
+    morceaux de données, sans jamais charger le jeu complet en mémoire.
+
+    Un seul passage accumule les statistiques de chaque colonne (moyenne et variance
+    pour l'imputation et la standardisation, comptages pour le mode et les catégories).
+    Le ColumnTransformer est ensuite entraîné sur un petit jeu synthétique qui contient
+    chaque catégorie observée, puis ses statistiques sont remplacées par celles du flux :
+    le résultat est égal (aux arrondis flottants près) au preprocessor entraîné en une fois
+    par `preprocessing()` ou `ethically_loose_preprocessing()`.
+
+    args:
+    - chunks: itérable de DataFrames bruts (mêmes colonnes que la table `clients`).
+    - ethically_strict: Booléen pour choisir entre le preprocessing strict ou lâche.
+
+    returns:
+    - preprocessor entraîné.
+    """
+    numeric_stats, categorical_stats = {}, {}
+    numerical_cols = categorical_cols = first_chunk = None
+    for chunk in chunks:
+        X = apply_manual_transformations(chunk, ethically_strict=ethically_strict).drop(columns=[TARGET_COL])
+        if first_chunk is None:
+            first_chunk = X
+            numerical_cols, categorical_cols = pipeline_columns(X.columns, ethically_strict=ethically_strict)
+            numeric_stats = {col: NumericStats() for col in numerical_cols}
+            categorical_stats = {col: CategoricalStats() for col in categorical_cols}
+        for col, stats in numeric_stats.items():
+            stats.update(X[col])
+        for col, stats in categorical_stats.items():
+            stats.update(X[col])
+
+    if first_chunk is None:
+        raise ValueError('Aucune donnée pour entraîner le preprocessor')
+    empty = [col for col, stats in {**numeric_stats, **categorical_stats}.items()
+             if not (stats.count if isinstance(stats, NumericStats) else stats.counts)]
+    if empty:
+        raise ValueError(f"Colonnes sans aucune valeur : {', '.join(empty)}")
+
+    preprocessor = build_preprocessor(numerical_cols, categorical_cols)
+    preprocessor.fit(seed_frame(first_chunk, numeric_stats, categorical_stats))
+
+    if numerical_cols:
+        num_imputer, scaler = (preprocessor.named_transformers_['num'].named_steps[step] for step in ('imputer', 'scaler'))
+        means = np.array([numeric_stats[col].mean for col in numerical_cols])
+        variances = np.array([numeric_stats[col].imputed_var for col in numerical_cols])
+        num_imputer.statistics_ = means
+        scaler.mean_ = means
+        scaler.var_ = variances
+        scaler.scale_ = _handle_zeros_in_scale(np.sqrt(variances), copy=False)
+        scaler.n_samples_seen_ = numeric_stats[numerical_cols[0]].n_rows
+
+    if categorical_cols:
+        cat_imputer = preprocessor.named_transformers_['cat'].named_steps['imputer']
+        cat_imputer.statistics_ = np.array([categorical_stats[col].most_frequent() for col in categorical_cols], dtype=object)
+    return preprocessor
+
+def seed_frame(first_chunk, numeric_stats, categorical_stats):
+    """
+    Jeu synthétique ayant les colonnes et types du flux, dans lequel chaque colonne
+    catégorielle contient toutes ses catégories observées : l'entraîner fixe la
+    structure du ColumnTransformer et les catégories de l'encodeur. Le mode y est
+    répété pour rester l'unique valeur la plus fréquente (pas d'égalité à départager
+    entre des types non comparables, comme None et une chaîne).
+    """
+    n_rows = max([len(stats.counts) for stats in categorical_stats.values()] + [0]) + 1
+    columns = {}
+    for col in first_chunk.columns:
+        if col in numeric_stats:
+            columns[col] = np.full(n_rows, numeric_stats[col].mean)
+        elif col in categorical_stats:
+            stats = categorical_stats[col]
+            values = list(stats.counts) + [stats.most_frequent()] * (n_rows - len(stats.counts))
+            dtype = first_chunk[col].dtype
+            columns[col] = pd.Categorical(values, dtype=dtype) if isinstance(dtype, pd.CategoricalDtype) else pd.Series(values, dtype=object)
+        else:
+            # Colonnes transmises telles quelles (remainder) : seules leur présence et leur type comptent
+            columns[col] = first_chunk[col].iloc[np.arange(n_rows) % len(first_chunk)].to_numpy()
+    return pd.DataFrame(columns)
+
+def client_window_query(columns='*', first_n=None, last_n=None, max_id=None):
+    """
+    Requête SQL sur une fenêtre de la table `clients` : les `first_n` plus anciens
+    ou les `last_n` plus récents clients (par id), bornée à `max_id` pour que la
+    fenêtre ne bouge pas si des clients sont ajoutés pendant la lecture.
+    """
+    if first_n is not None and last_n is not None:
+        raise ValueError('first_n et last_n sont exclusifs')
+    bound = f' WHERE id <= {int(max_id)}' if max_id is not None else ''
+    query = f'SELECT {columns} FROM clients'
+    if first_n is not None:
+        return query + f' WHERE id IN (SELECT id FROM clients{bound} ORDER BY id LIMIT {int(first_n)})'
+    if last_n is not None:
+        return query + f' WHERE id IN (SELECT id FROM clients{bound} ORDER BY id DESC LIMIT {int(last_n)})'
+    return query + bound
+
+def client_watermark(engine, first_n=None, last_n=None):
+    """
+    Filigrane des données d'une fenêtre de la table `clients` : nombre de lignes et
+    plus grand id. Il change dès qu'un client de la fenêtre est ajouté ou supprimé.
+
+    returns:
+    - dictionnaire {'rows', 'max_id'}.
+    """
+    from sqlalchemy import text
+
+    query = client_window_query('COUNT(*), MAX(id)', first_n=first_n, last_n=last_n)
+    with engine.connect() as connection:
+        rows, max_id = connection.execute(text(query)).one()
+    return {'rows': int(rows), 'max_id': int(max_id) if max_id is not None else None}
+
+def iter_client_chunks(engine, chunk_size=50000, last_n=None, first_n=None, max_id=None):
+    """
+    Lit la table `clients` par morceaux de `chunk_size` lignes (curseur côté serveur).
+
+    args:
+    - engine: moteur SQLAlchemy.
+    - chunk_size: nombre de lignes par morceau.
+    - last_n: ne lire que les `last_n` clients les plus récents (par id).
+    - first_n: ne lire que les `first_n` clients les plus anciens (par id).
+    - max_id: ignorer les clients d'id supérieur (ajoutés après un filigrane).
+    """
+    query = client_window_query(first_n=first_n, last_n=last_n, max_id=max_id) + ' ORDER BY id'
+    yield from pd.read_sql_query(query, engine, parse_dates=['date_creation_compte'], chunksize=chunk_size)
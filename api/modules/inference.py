@@ -0,0 +1,47 @@
+import pandas as pd
+
+from api.modules.compiled_preprocessor import CompiledPreprocessor
+from api.modules.metrics import timed_stage
+from api.modules.models import model_predict
+from api.modules.preprocess import apply_manual_transformations, transform_record
+
+def predict_frame(df, preprocessor, model, ethically_strict=True):
+    """
+    Applique la chaîne de prédiction complète à un DataFrame de clients
+    (transformations manuelles, preprocessor puis modèle) en un seul passage.
+
+    args:
+    - df: DataFrame des clients (une ligne par client).
+    - preprocessor: preprocessor entraîné.
+    - model: modèle entraîné.
+    - ethically_strict: Booléen pour choisir entre le preprocessing strict ou lâche.
+
+    returns:
+    - tableau des prédictions, aligné sur les lignes de `df`.
+    """
+    with timed_stage('manual_transformations'):
+        manually_processed = apply_manual_transformations(df, ethically_strict=ethically_strict)
+    with timed_stage('preprocessor_transform'):
+        processed = preprocessor.transform(manually_processed)
+    with timed_stage('model_predict'):
+        return model_predict(model, processed)
+
+def predict_records(records, preprocessor, model, ethically_strict=True):
+    """
+    Applique la chaîne de prédiction à une liste de clients (dictionnaires).
+    Avec un preprocessor compilé, les clients passent par `transform_record` sans
+    construire de DataFrame ; sinon ils sont regroupés dans un DataFrame.
+
+    returns:
+    - tableau des prédictions, aligné sur `records`.
+    """
+    if isinstance(preprocessor, CompiledPreprocessor):
+        with timed_stage('manual_transformations'):
+            transformed = [transform_record(record, ethically_strict) for record in records]
+        with timed_stage('preprocessor_transform'):
+            processed = preprocessor.transform(transformed)
+        with timed_stage('model_predict'):
+            return model_predict(model, processed)
+    with timed_stage('dataframe'):
+        df = pd.DataFrame(records)
+    return predict_frame(df, preprocessor, model, ethically_strict=ethically_strict)
@@ -0,0 +1,108 @@
+import os
+from datetime import datetime
+from os.path import join
+from threading import Lock
+from time import perf_counter
+
+from loguru import logger
+
+from api.modules.metrics import metrics
+from api.modules.profiler import SamplingProfiler
+
+HTTP_REQUEST_SECONDS = metrics.histogram('http_request_duration_seconds', 'Durée des requêtes HTTP par route', ('method', 'route'))
+HTTP_REQUESTS = metrics.counter('http_requests_total', 'Requêtes HTTP terminées par route et statut', ('method', 'route', 'status'))
+HTTP_ERRORS = metrics.counter('http_request_errors_total', 'Réponses 5xx et exceptions non gérées par route', ('method', 'route'))
+HTTP_IN_FLIGHT = metrics.gauge('http_requests_in_flight', 'Requêtes HTTP en cours de traitement')
+
+# Étiquette des requêtes ne correspondant à aucune route (évite une étiquette par URL inconnue)
+UNMATCHED_ROUTE = 'unmatched'
+PROFILE_HEADER = b'x-profile'
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI mesurant chaque requête HTTP : durée par méthode et modèle de
+    route (`/api/clients/{client_id}`, jamais l'URL brute), nombre de requêtes par
+    statut, erreurs (5xx et exceptions) et requêtes en cours.
+
+    Avec `profiling=True`, une requête portant l'en-tête `X-Profile` (égal à
+    `profiling_token` s'il est défini) est profilée par échantillonnage ; les piles
+    repliées sont écrites dans `profiling_dir` et le chemin du fichier est renvoyé
+    dans l'en-tête `X-Profile-File`. Une seule requête est profilée à la fois.
+
+    args:
+    - app: application ASGI.
+    - profiling: active le profilage à la demande.
+    - profiling_token: valeur attendue de l'en-tête `X-Profile` (toute valeur si None).
+    - profiling_dir: dossier des profils.
+    - profiling_interval: période d'échantillonnage en secondes.
+    """
+    def __init__(self, app, profiling=False, profiling_token=None, profiling_dir=join('.', 'api', 'logs', 'profiles'),
+                 profiling_interval=0.005):
+        self.app = app
+        self.profiling = profiling
+        self.profiling_token = profiling_token.encode() if profiling_token else None
+        self.profiling_dir = profiling_dir
+        self.profiling_interval = profiling_interval
+        self._profiling_lock = Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        profile_path = self._profile_path(scope) if self.profiling else None
+        profiler = None
+        if profile_path is not None:
+            profiler = SamplingProfiler(self.profiling_interval)
+            profiler.start()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if profile_path is not None:
+                    message['headers'] = [*message.get('headers', []), (b'x-profile-file', profile_path.encode())]
+            await send(message)
+
+        HTTP_IN_FLIGHT.labels().inc()
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            elapsed = perf_counter() - started
+            HTTP_IN_FLIGHT.labels().dec()
+            method = scope['method']
+            route = getattr(scope.get('route'), 'path', UNMATCHED_ROUTE)
+            HTTP_REQUEST_SECONDS.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            if status >= 500:
+                HTTP_ERRORS.labels(method, route).inc()
+            if profiler is not None:
+                self._save_profile(profiler, profile_path, method, route, elapsed)
+
+    def _profile_path(self, scope):
+        """Chemin du profil si la requête en demande un et qu'aucun autre n'est en cours, sinon None."""
+        requested = next((value for name, value in scope['headers'] if name == PROFILE_HEADER), None)
+        if requested is None or (self.profiling_token is not None and requested != self.profiling_token):
+            return None
+        if not self._profiling_lock.acquire(blocking=False):
+            logger.warning('Profiling request ignored: another request is already being profiled')
+            return None
+        slug = scope['path'].strip('/').replace('/', '_') or 'root'
+        return join(self.profiling_dir, f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{scope['method']}-{slug}.folded")
+
+    def _save_profile(self, profiler, path, method, route, elapsed):
+        try:
+            profiler.stop()
+            os.makedirs(self.profiling_dir, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as profile_file:
+                profile_file.write(profiler.collapsed())
+            hottest = ', '.join(f'{function} ({count})' for function, count in profiler.top(3))
+            logger.info(f'Profile of {method} {route} ({elapsed * 1e3:.1f} ms, {sum(profiler.samples.values())} samples) '
+                        f'written to {path}: {hottest}')
+        finally:
+            self._profiling_lock.release()
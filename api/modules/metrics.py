@@ -0,0 +1,230 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from math import isinf
+from threading import Lock
+from time import perf_counter
+
+# Seaux de latence (secondes), de la demi-milliseconde à 10 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """
+    Histogramme cumulatif à seaux fixes, sûr entre threads.
+    Les bornes des seaux sont inclusives (sémantique `le` de Prometheus).
+    """
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+            if value > self._max:
+                self._max = value
+
+    def snapshot(self):
+        """Retourne un instantané des compteurs (seaux cumulés)."""
+        with self._lock:
+            counts = list(self._counts)
+            total, count, maximum = self._sum, self._count, self._max
+        cumulated, buckets = 0, {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulated += bucket_count
+            buckets[str(bound)] = cumulated
+        buckets['+Inf'] = count
+        return {
+            'count': count,
+            'sum': total,
+            'mean': total / count if count else 0.0,
+            'max': maximum,
+            'buckets': buckets,
+        }
+
+class Counter:
+    """Compteur monotone, sûr entre threads."""
+    def __init__(self):
+        self._value = 0.0
+        self._lock = Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+class Gauge(Counter):
+    """Valeur instantanée pouvant monter et descendre (ex. requêtes en cours)."""
+    def dec(self, amount=1):
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value):
+        with self._lock:
+            self._value = value
+
+class MetricFamily:
+    """
+    Ensemble de métriques de même nom et de même type, une par combinaison de
+    valeurs d'étiquettes. Les étiquettes doivent prendre un petit nombre de valeurs
+    (étape, route, opération), jamais des identifiants de requête ou de client.
+    """
+    def __init__(self, name, kind, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self._children = {}
+        self._lock = Lock()
+
+    def labels(self, *values):
+        """Métrique associée aux valeurs d'étiquettes (créée au premier appel)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} attend les étiquettes {self.labelnames}, reçu {values}')
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = Histogram(self.buckets) if self.kind == 'histogram' else Counter() if self.kind == 'counter' else Gauge()
+                    self._children[values] = child
+        return child
+
+    def samples(self):
+        """Liste de (étiquettes, valeur ou instantané d'histogramme)."""
+        return [(dict(zip(self.labelnames, values)), child.snapshot() if self.kind == 'histogram' else child.value)
+                for values, child in list(self._children.items())]
+
+class MetricsRegistry:
+    """
+    Registre des métriques du processus, rendu au format texte de Prometheus.
+
+    Les collecteurs (`add_collector`) sont appelés à chaque rendu et retournent des
+    familles déjà calculées `(nom, type, aide, [(étiquettes, valeur), ...])`, pour
+    exposer des statistiques tenues ailleurs (micro-batching, executor, cache).
+    Avec `enabled = False`, les étapes ne sont plus chronométrées.
+    """
+    def __init__(self):
+        self.enabled = True
+        self._families = {}
+        self._collectors = []
+        self._lock = Lock()
+
+    def _family(self, name, kind, help, labelnames, buckets=LATENCY_BUCKETS):
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = MetricFamily(name, kind, help, labelnames, buckets)
+            elif family.kind != kind or family.labelnames != tuple(labelnames):
+                raise ValueError(f'Métrique {name} déjà déclarée comme {family.kind} {family.labelnames}')
+        return family
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._family(name, 'histogram', help, labelnames, buckets)
+
+    def counter(self, name, help, labelnames=()):
+        return self._family(name, 'counter', help, labelnames)
+
+    def gauge(self, name, help, labelnames=()):
+        return self._family(name, 'gauge', help, labelnames)
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        """Texte d'exposition Prometheus (format 0.0.4) de toutes les métriques."""
+        families = [(family.name, family.kind, family.help, family.samples()) for family in list(self._families.values())]
+        for collector in self._collectors:
+            families.extend(collector())
+        lines = []
+        for name, kind, help, samples in families:
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                if kind == 'histogram':
+                    for bound, count in value['buckets'].items():
+                        lines.append(f"{name}_bucket{format_labels({**labels, 'le': bound})} {count}")
+                    lines.append(f'{name}_sum{format_labels(labels)} {format_value(value["sum"])}')
+                    lines.append(f'{name}_count{format_labels(labels)} {value["count"]}')
+                else:
+                    lines.append(f'{name}{format_labels(labels)} {format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in labels.items()) + '}'
+
+def format_value(value):
+    value = float(value)
+    if isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(int(value)) if value.is_integer() else repr(value)
+
+# Registre par défaut du processus
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram('inference_stage_seconds', "Durée de chaque étape d'une prédiction", ('stage',))
+
+# Étapes chronométrées dans un worker de processus, renvoyées au processus principal
+_collected_stages = ContextVar('collected_stages', default=None)
+
+def observe_stage(stage, seconds):
+    """Enregistre la durée d'une étape (ou la met de côté si elle est collectée pour un autre processus)."""
+    if not metrics.enabled:
+        return
+    collected = _collected_stages.get()
+    if collected is not None:
+        collected.append((stage, seconds))
+    else:
+        STAGE_SECONDS.labels(stage).observe(seconds)
+
+@contextmanager
+def timed_stage(stage):
+    """Chronomètre le bloc comme étape `stage` de la prédiction, y compris s'il lève une exception."""
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, perf_counter() - started)
+
+@contextmanager
+def unobserved_stages():
+    """Les étapes chronométrées dans le bloc ne sont pas enregistrées (ex. prédiction de warm-up)."""
+    token = _collected_stages.set([])
+    try:
+        yield
+    finally:
+        _collected_stages.reset(token)
+
+def call_collecting_stages(fn, *args):
+    """
+    Exécute `fn(*args)` dans un worker de processus en collectant les durées
+    d'étapes, qui seraient sinon enregistrées dans le registre du worker.
+
+    returns:
+    - couple (résultat, liste de (étape, secondes)) à passer à `replay_stages()`.
+    """
+    collected = []
+    token = _collected_stages.set(collected)
+    try:
+        return fn(*args), collected
+    finally:
+        _collected_stages.reset(token)
+
+def replay_stages(collected):
+    """Enregistre dans le registre courant les durées collectées par `call_collecting_stages()`."""
+    for stage, seconds in collected:
+        observe_stage(stage, seconds)
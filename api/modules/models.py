@@ -1,29 +1,43 @@
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, Input
+DEFAULT_UNITS = (64, 32)
+DEFAULT_LEARNING_RATE = 0.001
 
-def create_nn_model(input_dim):
+def build_layers(input_dim, units=DEFAULT_UNITS):
+    """
+    Couches du réseau : entrée, couches denses ReLU de `units` neurones (nommées
+    dense_1, dense_2, ...) et sortie linéaire.
+    """
+    from tensorflow.keras.layers import Dense, Input
+
+    return ([Input(shape=(input_dim,), name=f'input_{input_dim}f')]
+            + [Dense(n_units, activation='relu', name=f'dense_{index}') for index, n_units in enumerate(units, start=1)]
+            + [Dense(1, name='output')])
+
+def create_nn_model(input_dim, units=DEFAULT_UNITS, learning_rate=DEFAULT_LEARNING_RATE):
     """
     Fonction pour créer et compiler un modèle de réseau de neurones simple.
+
+    args:
+    - input_dim: nombre de features en entrée.
+    - units: nombre de neurones de chaque couche cachée (64 puis 32 par défaut).
+    - learning_rate: taux d'apprentissage de l'optimiseur Adam.
     """
-    model = Sequential([
-        Input(shape=(input_dim,), name=f'input_{input_dim}f'),
-        Dense(64, activation='relu', name='dense_1'),
-        Dense(32, activation='relu', name='dense_2'),
-        Dense(1, name='output')
-    ])
-    model.compile(optimizer='adam', loss='mse')
+    # Import local : le service d'inférence (backend NumPy) ne doit pas charger TensorFlow
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.optimizers import Adam
+
+    model = Sequential(build_layers(input_dim, units))
+    model.compile(optimizer=Adam(learning_rate=learning_rate), loss='mse')
     return model
 
-def create_nn_model_based_on(base_model, input_dim):
+def create_nn_model_based_on(base_model, input_dim, units=DEFAULT_UNITS, learning_rate=DEFAULT_LEARNING_RATE):
     """
     Fonction pour créer un modèle de réseau de neurones basé sur un modèle existant.
+    Les poids sont repris pour chaque couche de même nom et de même forme.
     """
-    new_model = Sequential([
-        Input(shape=(input_dim,), name=f'input_{input_dim}f'),
-        Dense(64, activation='relu', name='dense_1'),
-        Dense(32, activation='relu', name='dense_2'),
-        Dense(1, name='output')
-        ])
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.optimizers import Adam
+
+    new_model = Sequential(build_layers(input_dim, units))
 
     for layer in new_model.layers:
         try:
@@ -33,15 +47,32 @@ def create_nn_model_based_on(base_model, input_dim):
         except ValueError:
             print(f"⛔ Incompatible ou nouvelle couche : {layer.name}")
 
-    new_model.compile(optimizer='adam', loss='mse')
+    new_model.compile(optimizer=Adam(learning_rate=learning_rate), loss='mse')
 
     return new_model
 
-def train_model(model, X, y, X_val=None, y_val=None, epochs=30, batch_size=32, validation_split=0.2, verbose=0 ):
+def train_model(model, X, y=None, X_val=None, y_val=None, epochs=30, batch_size=32, validation_split=0.2, verbose=0,
+                callbacks=None, initial_epoch=0):
+    """
+    Entraîne le modèle sur des tableaux (X, y) ou sur un `tf.data.Dataset` de lots
+    (X, y) passé en `X` ; `X_val` peut alors être un dataset de validation. Les
+    paramètres `batch_size` et `validation_split` ne s'appliquent qu'aux tableaux.
+    `callbacks` (ex. `EarlyStopping`) et `initial_epoch` (reprise d'un entraînement
+    jusqu'à l'époque `epochs`) sont transmis à `model.fit`.
+    """
+    import tensorflow as tf
+
+    if isinstance(X, tf.data.Dataset):
+        hist = model.fit(X,
+                    validation_data=X_val,
+                    epochs=epochs, verbose=verbose, callbacks=callbacks, initial_epoch=initial_epoch)
+        return model, hist
+
     hist = model.fit(X, y, 
                 validation_data=(X_val, y_val) if X_val is not None and y_val is not None else None,
                 epochs=epochs, batch_size=batch_size, 
-                validation_split=validation_split, verbose=verbose)
+                validation_split=validation_split, verbose=verbose,
+                callbacks=callbacks, initial_epoch=initial_epoch)
     return model , hist
 
 def model_predict(model, X):
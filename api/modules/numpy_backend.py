@@ -0,0 +1,109 @@
+from os.path import exists, splitext
+import numpy as np
+
+def _relu(x):
+    return np.maximum(x, 0, out=x)
+
+def _linear(x):
+    return x
+
+ACTIVATIONS = {'relu': _relu, 'linear': _linear}
+
+class NumpyModel:
+    """
+    Réseau de neurones dense évalué en NumPy pur, sans TensorFlow.
+
+    Reproduit le forward pass d'un `Sequential` de couches `Dense` (comme ceux
+    créés par `create_nn_model`) à partir des poids exportés. Expose la même
+    méthode `predict()` qu'un modèle Keras afin d'être utilisable avec `model_predict`.
+
+    Les noyaux peuvent être gardés en mémoire dans une précision réduite
+    (`weights_dtype`, ex. float16) : le produit matriciel les convertit à la volée
+    et les calculs restent faits dans `dtype`.
+    """
+    def __init__(self, kernels, biases, activations, dtype=np.float32, weights_dtype=None):
+        if not len(kernels) == len(biases) == len(activations):
+            raise ValueError('kernels, biases et activations doivent avoir la même longueur')
+        unknown = set(activations) - set(ACTIVATIONS)
+        if unknown:
+            raise ValueError(f'Activations non supportées : {sorted(unknown)}')
+        self.dtype = np.dtype(dtype)
+        self.weights_dtype = np.dtype(weights_dtype or dtype)
+        self.kernels = [np.ascontiguousarray(kernel, dtype=self.weights_dtype) for kernel in kernels]
+        self.biases = [np.asarray(bias, dtype=self.dtype) for bias in biases]
+        self.activations = list(activations)
+
+    @property
+    def input_dim(self):
+        return self.kernels[0].shape[0]
+
+    @property
+    def weights_nbytes(self):
+        """Mémoire occupée par les poids (noyaux et biais), en octets."""
+        return sum(kernel.nbytes + bias.nbytes for kernel, bias in zip(self.kernels, self.biases))
+
+    def predict(self, X, **kwargs):
+        """Calcule les sorties du réseau (les arguments Keras comme `verbose` sont ignorés)."""
+        outputs = np.asarray(X, dtype=self.dtype)
+        if outputs.ndim == 1:
+            outputs = outputs.reshape(1, -1)
+        if outputs.shape[1] != self.input_dim:
+            raise ValueError(f'Expected {self.input_dim} input features, got {outputs.shape[1]}')
+        for kernel, bias, activation in zip(self.kernels, self.biases, self.activations):
+            outputs = outputs @ kernel
+            outputs += bias
+            outputs = ACTIVATIONS[activation](outputs)
+        return outputs
+
+def numpy_weights_path(model_path):
+    """Chemin du fichier de poids NumPy associé à un fichier `.keras`."""
+    return splitext(model_path)[0] + '.npz'
+
+def export_keras_model(model, path):
+    """
+    Exporte les poids des couches `Dense` d'un modèle Keras dans une archive `.npz`.
+    """
+    arrays, activations = {}, []
+    for index, layer in enumerate(model.layers):
+        if layer.__class__.__name__ != 'Dense':
+            raise ValueError(f'Couche non supportée par le backend NumPy : {layer.name} ({layer.__class__.__name__})')
+        kernel, bias = layer.get_weights()
+        arrays[f'kernel_{index}'] = kernel
+        arrays[f'bias_{index}'] = bias
+        activations.append(layer.get_config()['activation'])
+    np.savez(path, activations=np.array(activations), **arrays)
+    return path
+
+def load_numpy_model(path):
+    """Charge un `NumpyModel` depuis une archive `.npz` produite par `export_keras_model`."""
+    with np.load(path, allow_pickle=False) as archive:
+        activations = [str(activation) for activation in archive['activations']]
+        kernels = [archive[f'kernel_{index}'] for index in range(len(activations))]
+        biases = [archive[f'bias_{index}'] for index in range(len(activations))]
+    return NumpyModel(kernels, biases, activations)
+
+def load_model(model_path, backend='keras', precision='float32'):
+    """
+    Charge le modèle servi selon le backend d'inférence configuré.
+
+    args:
+    - model_path: chemin du fichier `.keras`.
+    - backend: 'keras' (TensorFlow) ou 'numpy' (poids exportés à côté du `.keras`).
+    - precision: 'float32', ou 'float16' / 'int8' pour les archives produites par
+      `api.scripts.quantize_models` (backend 'numpy' uniquement).
+    """
+    if precision != 'float32':
+        from api.modules.quantization import load_quantized_model, quantized_weights_path, weights_digest
+
+        if backend != 'numpy':
+            raise ValueError(f"La précision {precision} nécessite le backend d'inférence 'numpy'")
+        weights_path = numpy_weights_path(model_path)
+        digest = weights_digest(load_numpy_model(weights_path)) if exists(weights_path) else None
+        return load_quantized_model(quantized_weights_path(model_path, precision), source_digest=digest)
+    if backend == 'numpy':
+        return load_numpy_model(numpy_weights_path(model_path))
+    if backend == 'keras':
+        import tensorflow as tf
+
+        return tf.keras.models.load_model(model_path)
+    raise ValueError(f"Backend d'inférence inconnu : {backend}")
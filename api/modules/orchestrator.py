@@ -0,0 +1,220 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from os.path import join
+from time import perf_counter
+
+MODES = ('strict', 'loose')
+# Variables lues au chargement des bibliothèques de calcul : elles doivent être
+# fixées avant le premier import de NumPy/TensorFlow dans le worker
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS')
+
+def parse_window(window):
+    """
+    Convertit une fenêtre de données ('all', 'first_N' ou 'last_N') en couple
+    (first_n, last_n) pour `client_features()`.
+    """
+    if window in (None, 'all'):
+        return None, None
+    side, _, size = window.partition('_')
+    if side not in ('first', 'last') or not size.isdigit() or not int(size):
+        raise ValueError(f"Fenêtre invalide : {window!r} (attendu 'all', 'first_N' ou 'last_N')")
+    return (int(size), None) if side == 'first' else (None, int(size))
+
+def parse_variant(text):
+    """
+    Lit une variante au format `NOM:MODE[:FENÊTRE[:MODÈLE_DE_BASE]]`, par exemple
+    `new_ethically_strict:strict:last_10000:ethically_strict`.
+
+    returns:
+    - dictionnaire {'name', 'mode', 'window', 'base_model'}.
+    """
+    parts = text.split(':')
+    if not 2 <= len(parts) <= 4 or not parts[0]:
+        raise ValueError(f"Variante invalide : {text!r} (attendu NOM:MODE[:FENÊTRE[:MODÈLE_DE_BASE]])")
+    name, mode, window, base_model = parts + [None] * (4 - len(parts))
+    if mode not in MODES:
+        raise ValueError(f"Mode de preprocessing inconnu : {mode!r} (attendu {' ou '.join(MODES)})")
+    window = window or 'all'
+    parse_window(window)
+    return {'name': name, 'mode': mode, 'window': window, 'base_model': base_model or None}
+
+def default_threads_per_worker(n_workers):
+    """Répartit les cœurs disponibles entre les workers (au moins un thread chacun)."""
+    return max(1, (os.cpu_count() or 1) // max(1, n_workers))
+
+def limit_threads(n_threads):
+    """
+    Initialisation d'un worker : limite à `n_threads` les threads de calcul de
+    NumPy/BLAS et de TensorFlow, pour que les workers ne se disputent pas les cœurs.
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(n_threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(n_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+def train_variant(spec, features_path, options):
+    """
+    Entraîne une variante dans le worker courant à partir des features en cache, puis
+    sauvegarde le modèle et son preprocessor sous `{models_dir}/{nom}_*`, journalise
+    l'entraînement dans MLflow et y enregistre le modèle (registre de modèles).
+
+    args:
+    - spec: variante (voir `parse_variant()`).
+    - features_path: dossier de l'entrée du cache de features à utiliser.
+    - options: dictionnaire des options communes (epochs, batch_size, units,
+      learning_rate, test_size, seed, models_dir, experiment, mlflow, registered_model_names).
+
+    returns:
+    - dictionnaire du résultat (métriques, chemins des artefacts, durée).
+    """
+    started = perf_counter()
+    import joblib
+    import tensorflow as tf
+
+    from api.modules.evaluate import evaluate_performance
+    from api.modules.feature_store import FeatureSet
+    from api.modules.models import (DEFAULT_LEARNING_RATE, DEFAULT_UNITS, create_nn_model, create_nn_model_based_on,
+                                    model_predict, train_model)
+    from api.modules.preprocess import split
+
+    tf.keras.utils.set_random_seed(options['seed'])
+    features = FeatureSet(features_path)
+    X_train, X_test, y_train, y_test = split(features.X, features.y, test_size=options['test_size'],
+                                             random_state=options['seed'])
+
+    architecture = dict(units=tuple(options.get('units', DEFAULT_UNITS)),
+                        learning_rate=options.get('learning_rate', DEFAULT_LEARNING_RATE))
+    if spec['base_model']:
+        base_model = tf.keras.models.load_model(join(options['models_dir'], f"{spec['base_model']}_model.keras"))
+        model = create_nn_model_based_on(base_model=base_model, input_dim=X_train.shape[1], **architecture)
+    else:
+        model = create_nn_model(input_dim=X_train.shape[1], **architecture)
+
+    model, history = train_model(model, X_train, y_train, X_val=X_test, y_val=y_test,
+                                 epochs=options['epochs'], batch_size=options['batch_size'])
+    perf = evaluate_performance(y_test, model_predict(model, X_test))
+
+    model_path = join(options['models_dir'], f"{spec['name']}_model.keras")
+    preprocessor_path = join(options['models_dir'], f"{spec['name']}_preprocessor.pkl")
+    model.save(model_path)
+    joblib.dump(features.preprocessor, preprocessor_path)
+
+    if options['mlflow']:
+        import mlflow
+        from mlflow.models import infer_signature
+
+        mlflow.set_experiment(options['experiment'])
+        with mlflow.start_run(run_name=spec['name']):
+            mlflow.log_params({**spec, **architecture, 'epochs': options['epochs'], 'batch_size': options['batch_size'],
+                               'rows': len(features), 'features_key': features.key})
+            mlflow.log_metric("R²", perf['R²'])
+            mlflow.log_metric("MSE", perf['MSE'])
+            mlflow.log_metric("MAE", perf['MAE'])
+            mlflow.set_tag("Data Processing Info", f"Ethically {spec['mode']} preprocessing")
+            mlflow.set_tag("Training Info", f"{options['epochs']} epochs, window {spec['window']}")
+            mlflow.log_artifact(model_path)
+            mlflow.log_artifact(preprocessor_path)
+            mlflow.keras.log_model(
+                model,
+                artifact_path="model",
+                signature=infer_signature(X_train, model_predict(model, X_train)),
+                input_example=X_train[:5],
+                registered_model_name=options.get('registered_model_names', {}).get(spec['name'], spec['name']),
+            )
+
+    return {**spec, **perf, 'rows': len(features), 'model_path': model_path,
+            'preprocessor_path': preprocessor_path, 'seconds': perf_counter() - started}
+
+def train_variants(specs, engine, options, workers=None, threads_per_worker=None, store=None):
+    """
+    Entraîne plusieurs variantes en parallèle, chacune dans un processus.
+
+    Les features de chaque couple (mode, fenêtre) sont d'abord calculées une seule
+    fois dans le processus principal (ou relues depuis le cache) ; les workers ne
+    font que les projeter en mémoire, le cache de pages du système étant partagé.
+    Chaque worker limite ses threads de calcul à `threads_per_worker`.
+
+    args:
+    - specs: liste de variantes (voir `parse_variant()`).
+    - engine: moteur SQLAlchemy de la base clients.
+    - options: options communes transmises à `train_variant()`.
+    - workers: nombre de processus (par défaut, un par variante dans la limite des cœurs).
+    - threads_per_worker: threads de calcul par processus (par défaut, cœurs / workers).
+    - store: FeatureStore à utiliser.
+
+    Une variante dont le modèle de base est une autre variante du lot n'est lancée
+    qu'une fois celle-ci entraînée.
+
+    returns:
+    - liste des résultats, dans l'ordre des variantes ; une variante en échec a
+      une clé 'error' au lieu de ses métriques.
+    """
+    from api.modules.feature_store import FeatureStore, client_features
+
+    names = [spec['name'] for spec in specs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Variantes en double : {', '.join(duplicates)}")
+
+    store = store or FeatureStore()
+    features_paths, results = {}, [None] * len(specs)
+    for index, spec in enumerate(specs):
+        key = (spec['mode'], spec['window'])
+        if key not in features_paths:
+            first_n, last_n = parse_window(spec['window'])
+            try:
+                features_paths[key] = client_features(engine, ethically_strict=spec['mode'] == 'strict', first_n=first_n,
+                                                      last_n=last_n, store=store).path
+            except Exception as e:
+                features_paths[key] = e
+        if isinstance(features_paths[key], Exception):
+            error = features_paths[key]
+            results[index] = {**spec, 'error': f'{type(error).__name__}: {error}'}
+            print(f"❌ {spec['name']} : preprocessing impossible ({results[index]['error']})")
+    pending = [index for index, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+
+    workers = workers or min(len(pending), os.cpu_count() or 1)
+    threads_per_worker = threads_per_worker or default_threads_per_worker(workers)
+    os.makedirs(options['models_dir'], exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=limit_threads, initargs=(threads_per_worker,)) as pool:
+        futures = {}
+        while pending or futures:
+            # Une variante reprenant les poids d'une autre variante du lot attend la fin de celle-ci
+            waiting = {specs[index]['name'] for index in pending} | {specs[index]['name'] for index in futures.values()}
+            failed = {result['name'] for result in results if result is not None and 'error' in result}
+            ready = [index for index in pending
+                     if specs[index]['base_model'] in (None, specs[index]['name']) or specs[index]['base_model'] not in waiting]
+            if not ready and not futures:
+                # Dépendances circulaires entre variantes
+                for index in pending:
+                    results[index] = {**specs[index], 'error': f"Modèle de base {specs[index]['base_model']!r} jamais entraîné"}
+                break
+            for index in ready:
+                spec = specs[index]
+                pending.remove(index)
+                if spec['base_model'] in failed:
+                    results[index] = {**spec, 'error': f"Échec du modèle de base {spec['base_model']!r}"}
+                    print(f"❌ {spec['name']} : {results[index]['error']}")
+                    continue
+                futures[pool.submit(train_variant, spec, features_paths[(spec['mode'], spec['window'])], options)] = index
+            if not futures:
+                continue
+            future = next(as_completed(futures))
+            index = futures.pop(future)
+            try:
+                results[index] = future.result()
+                print(f"✅ {specs[index]['name']} : R² {results[index]['R²']:.3f} en {results[index]['seconds']:.1f}s")
+            except Exception as e:
+                results[index] = {**specs[index], 'error': f'{type(e).__name__}: {e}'}
+                print(f"❌ {specs[index]['name']} : {results[index]['error']}")
+    return results
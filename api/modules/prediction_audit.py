@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+
+from api.models import PredictionAudit
+from api.modules.write_behind import WriteBehindBuffer
+
+class PredictionAuditStore:
+    """
+    Conserve chaque prédiction dans la table `prediction_audit`, sans écriture
+    synchrone dans la requête.
+
+    `record()` met un tuple de valeurs brutes dans un `WriteBehindBuffer` ; son
+    thread de fond insère les lignes par lots (un INSERT executemany par lot, dans
+    une transaction) dès que `batch_size` lignes sont en attente ou au plus tard
+    toutes les `flush_interval` secondes. `close()` vide la file à l'arrêt.
+
+    args:
+    - engine: moteur SQLAlchemy synchrone.
+    - max_rows / batch_size / flush_interval / overflow / block_timeout / retries:
+      voir `WriteBehindBuffer`.
+    - enabled: False pour ne rien enregistrer.
+    """
+    def __init__(self, engine, max_rows=100000, batch_size=500, flush_interval=1.0, overflow='block', block_timeout=1.0,
+                 retries=3, enabled=True):
+        self.engine = engine
+        self.table = PredictionAudit.__table__
+        self.enabled = enabled
+        self.buffer = WriteBehindBuffer(self._insert, max_items=max_rows, batch_size=batch_size,
+                                        flush_interval=flush_interval, name='prediction-audit',
+                                        overflow=overflow, block_timeout=block_timeout, retries=retries)
+
+    def would_block(self, rows=1):
+        """True si enregistrer `rows` lignes peut attendre une place dans la file (appel à faire hors de la boucle asyncio)"""
+        return self.enabled and self.buffer.overflow == 'block' and self.buffer.pending + rows > self.buffer.max_items
+
+    def record(self, endpoint, variant, version, client, prediction=None, cached=False, latency=None, error=None):
+        """
+        Enregistre une prédiction ou une erreur.
+
+        args:
+        - endpoint: route ayant servi la prédiction ('predict', 'predict_batch').
+        - variant / version: variante et version du modèle.
+        - client: dictionnaire des champs validés du client.
+        - prediction: valeur prédite (None en cas d'erreur).
+        - cached: True si la prédiction vient du cache.
+        - latency: durée de traitement en secondes.
+        - error: message d'erreur (None en cas de succès).
+
+        returns:
+        - False si la ligne a été rejetée (file pleine ou fermée).
+        """
+        if not self.enabled:
+            return False
+        return self.buffer.put((datetime.now(timezone.utc), endpoint, variant, version, prediction, cached, latency, error, client))
+
+    def record_many(self, endpoint, variant, version, clients, predictions, latency=None):
+        """Enregistre les prédictions d'un lot de clients (même horodatage et même latence pour tout le lot)"""
+        if not self.enabled:
+            return 0
+        created_at = datetime.now(timezone.utc)
+        return sum(self.buffer.put((created_at, endpoint, variant, version, prediction, False, latency, None, client))
+                   for client, prediction in zip(clients, predictions))
+
+    def close(self, timeout=None):
+        """Insère les lignes en attente puis arrête le thread de fond."""
+        self.buffer.close(timeout)
+
+    def stats(self):
+        return {**self.buffer.stats(), 'enabled': self.enabled}
+
+    def _insert(self, rows):
+        """Insère un lot de lignes dans une transaction (thread de fond)."""
+        records = [
+            {'created_at': created_at, 'endpoint': endpoint, 'variant': variant, 'model_version': version,
+             'prediction': prediction, 'cached': cached, 'latency_ms': latency * 1e3 if latency is not None else None,
+             'error': error, 'client': client}
+            for created_at, endpoint, variant, version, prediction, cached, latency, error, client in rows
+        ]
+        with self.engine.begin() as connection:
+            connection.execute(insert(self.table), records)
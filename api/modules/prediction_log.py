@@ -0,0 +1,119 @@
+import os
+from datetime import datetime
+from os.path import join
+from random import random
+from time import time_ns
+from typing import Literal, get_origin
+
+from api.modules.write_behind import WriteBehindBuffer
+
+class PredictionLog:
+    """
+    Journal structuré des prédictions, écrit en colonnes dans des fichiers Arrow IPC.
+
+    `record()` décide de l'échantillonnage puis met en file un tuple de valeurs
+    brutes, sans aucun formatage ; la conversion en colonnes et l'écriture sont
+    faites par lots dans le thread de fond d'un `WriteBehindBuffer`. Un fichier
+    `predictions-<date>.arrow` (format stream, compressé) reçoit un lot par vidage
+    et est remplacé par un nouveau fichier au-delà de `rotate_rows` lignes :
+
+        pyarrow.ipc.open_stream(path).read_all().to_pandas()
+
+    args:
+    - directory: dossier des fichiers.
+    - schema: classe pydantic du client, dont les champs deviennent des colonnes.
+    - sample_rate: proportion des prédictions réussies journalisées (0 à 1).
+    - error_sample_rate: proportion des erreurs journalisées (0 à 1).
+    - max_events / batch_size / flush_interval: voir `WriteBehindBuffer`.
+    - rotate_rows: nombre de lignes au-delà duquel un nouveau fichier est commencé.
+    - compression: compression des lots Arrow ('zstd', 'lz4' ou None).
+    """
+    def __init__(self, directory, schema, sample_rate=1.0, error_sample_rate=1.0, max_events=100000, batch_size=1000,
+                 flush_interval=1.0, rotate_rows=1000000, compression='zstd'):
+        self.directory = directory
+        self.client_fields = {name: field.annotation for name, field in schema.model_fields.items()}
+        self.sample_rate = sample_rate
+        self.error_sample_rate = error_sample_rate
+        self.rotate_rows = rotate_rows
+        self.compression = compression
+        self.sampled_out = 0
+        self.buffer = WriteBehindBuffer(self._write, max_items=max_events, batch_size=batch_size,
+                                        flush_interval=flush_interval, name='prediction-log')
+        self._writer = None
+        self._writer_rows = 0
+        self._arrow_schema = None
+
+    def record(self, variant, version, client, prediction=None, cached=False, latency=None, error=None):
+        """
+        Journalise (selon le taux d'échantillonnage) une prédiction ou une erreur.
+
+        args:
+        - variant / version: variante et version du modèle.
+        - client: dictionnaire des champs du client (`model_dump()`).
+        - prediction: valeur prédite (None en cas d'erreur).
+        - cached: True si la prédiction vient du cache.
+        - latency: durée de traitement en secondes.
+        - error: message d'erreur (None en cas de succès).
+        """
+        rate = self.sample_rate if error is None else self.error_sample_rate
+        if rate < 1 and random() >= rate:
+            self.sampled_out += 1
+            return False
+        return self.buffer.put((time_ns() // 1000, variant, version, prediction, cached, latency, error, client))
+
+    def close(self, timeout=None):
+        """Écrit les événements en attente et ferme le fichier courant."""
+        self.buffer.close(timeout)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def stats(self):
+        return {**self.buffer.stats(), 'sampled_out': self.sampled_out,
+                'sample_rate': self.sample_rate, 'error_sample_rate': self.error_sample_rate}
+
+    def _schema(self):
+        import pyarrow as pa
+
+        if self._arrow_schema is None:
+            types = {int: pa.int64(), float: pa.float64(), bool: pa.bool_(), str: pa.string()}
+            self._arrow_schema = pa.schema(
+                [('timestamp', pa.timestamp('us', tz='UTC')), ('variant', pa.string()), ('version', pa.string()),
+                 ('prediction', pa.float64()), ('cached', pa.bool_()), ('latency_ms', pa.float64()), ('error', pa.string())]
+                + [(name, pa.string() if get_origin(annotation) is Literal else types[annotation])
+                   for name, annotation in self.client_fields.items()])
+        return self._arrow_schema
+
+    def _write(self, events):
+        """Convertit un lot d'événements en colonnes et l'ajoute au fichier courant (thread de fond)."""
+        import pyarrow as pa
+
+        timestamps, variants, versions, predictions, cached, latencies, errors, clients = zip(*events)
+        columns = {
+            'timestamp': timestamps,
+            'variant': variants,
+            'version': versions,
+            'prediction': predictions,
+            'cached': cached,
+            'latency_ms': [latency * 1e3 if latency is not None else None for latency in latencies],
+            'error': errors,
+        }
+        for name in self.client_fields:
+            columns[name] = [client.get(name) for client in clients]
+        schema = self._schema()
+        batch = pa.record_batch([pa.array(columns[field.name], type=field.type) for field in schema], schema=schema)
+
+        if self._writer is None or self._writer_rows >= self.rotate_rows:
+            self._open_writer(schema)
+        self._writer.write_batch(batch)
+        self._writer_rows += batch.num_rows
+
+    def _open_writer(self, schema):
+        import pyarrow as pa
+
+        if self._writer is not None:
+            self._writer.close()
+        os.makedirs(self.directory, exist_ok=True)
+        path = join(self.directory, f"predictions-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.arrow")
+        self._writer = pa.ipc.new_stream(path, schema, options=pa.ipc.IpcWriteOptions(compression=self.compression))
+        self._writer_rows = 0
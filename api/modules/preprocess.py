@@ -3,10 +3,43 @@ from sklearn.model_selection import train_test_split
 from sklearn.impute import SimpleImputer
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
+from datetime import date, datetime, timedelta
+import numpy as np
 import pandas as pd
 from loguru import logger
 
-from api.utils.helpers import replace_by_dict
+# Colonnes supprimées selon le type de preprocessing
+STRICT_DROPPED_COLS = ('id', 'sexe', 'taille', 'poids', 'smoker')
+LOOSE_DROPPED_COLS = ('id',)
+
+# Tranches d'âge (intervalles fermés à droite : ]17, 30], ]30, 45], ...)
+AGE_BINS = np.array([17, 30, 45, 60, 100])
+AGE_LABELS = ['18-29', '30-44', '45-59', '60+']
+
+ECONOMY_BASED_REGIONS = {
+    'region_parisienne' : ['Île-de-France'],
+    'regions_industrielles': ['Hauts-de-France', 'Grand-Est', 'Bourgogne-Franche-Comté'],
+    'regions_tertiaires': ['Bretagne', 'Pays-de-la-Loire', 'Centre-Val-de-Loire', 'Normandie'],
+    'regions_touristiques_services': ['Nouvelle-Aquitaine', 'Occitanie', 'Auvergne-Rhône-Alpes', 'PACA', 'Corse'],
+}
+# Table région -> groupe précalculée (équivalent de `replace_by_dict` en une recherche)
+REGION_LOOKUP = {region: group for group, regions in ECONOMY_BASED_REGIONS.items() for region in regions}
+
+DAYS_PER_MONTH = 30
+
+MISSING_INDICATOR_COLS = ['historique_credits', 'score_credit', 'loyer_mensuel', 'situation_familiale', 'quotient_caf', 'nb_enfants']
+
+# Colonnes des pipelines du preprocessor, selon le type de preprocessing
+MISSING_VALUE_COLS = ['historique_credits_missing_value', 'score_credit_missing_value',
+                      'loyer_mensuel_missing_value', 'situation_familiale_missing_value',
+                      'quotient_caf_missing_value', 'nb_enfants_missing_value']
+STRICT_NUMERICAL_COLS = ['revenu_estime_mois', 'risque_personnel', 'loyer_mensuel', 'historique_credits',
+                         'score_credit', 'quotient_caf', 'nb_enfants', 'anciennete_mois']
+STRICT_CATEGORICAL_COLS = ['age_group', 'sport_licence', 'niveau_etude', 'region', 'situation_familiale'] + MISSING_VALUE_COLS
+LOOSE_NUMERICAL_COLS = ['age', 'taille', 'poids'] + STRICT_NUMERICAL_COLS
+LOOSE_CATEGORICAL_COLS = ['smoker', 'sport_licence', 'niveau_etude', 'region', 'situation_familiale'] + MISSING_VALUE_COLS
+
+TARGET_COL = 'montant_pret'
 
 def split(X, y, test_size=0.2, random_state=42):
     '''
@@ -29,6 +62,8 @@ def apply_manual_transformations(df, ethically_strict=True):
     """
     Applique les transformations de données manuelles (non-pipeline) à un DataFrame.
     Cette fonction peut être utilisée seule pour préparer les données pour une prédiction.
+    Pour un client unique sous forme de dictionnaire, `transform_record()` produit le
+    même résultat sans passer par pandas.
 
     args:
     - df: DataFrame d'entrée.
@@ -37,76 +72,134 @@ def apply_manual_transformations(df, ethically_strict=True):
     returns:
     - DataFrame avec les transformations manuelles appliquées.
     """
-    df = df.copy()
+    # Les colonnes sont traitées comme des tableaux NumPy puis assemblées en un seul
+    # DataFrame : pas de copie ni d'insertion de colonne intermédiaire.
 
     # Étape 1: Suppression des colonnes
-    if ethically_strict:
-        cols_to_drop = ['id', 'sexe', 'taille', 'poids', 'smoker']
-    else:
-        cols_to_drop = ['id']
-    
-    for col in cols_to_drop:
-        if col in df.columns:
-            df = df.drop(columns=col)
+    dropped_cols = STRICT_DROPPED_COLS if ethically_strict else LOOSE_DROPPED_COLS
+    columns = {col: df[col].to_numpy() for col in df.columns if col not in dropped_cols}
 
     # Étape 2: Catégorisation de l'âge (uniquement en mode strict)
-    if ethically_strict and 'age' in df.columns:
-        bins = [17, 30, 45, 60, 100]
-        labels = ['18-29', '30-44', '45-59', '60+']
-        df['age_group'] = pd.cut(df['age'], bins=bins, labels=labels, right=True)
-        df = df.drop(columns='age')
+    if ethically_strict and 'age' in columns:
+        columns['age_group'] = _age_groups(columns.pop('age'))
 
     # Étape 3: Regroupement des régions
-    if 'region' in df.columns:
-        economy_based_regions = {
-            'region_parisienne' : ['Île-de-France'],
-            'regions_industrielles': ['Hauts-de-France', 'Grand-Est', 'Bourgogne-Franche-Comté'],
-            'regions_tertiaires': ['Bretagne', 'Pays-de-la-Loire', 'Centre-Val-de-Loire', 'Normandie'],
-            'regions_touristiques_services': ['Nouvelle-Aquitaine', 'Occitanie', 'Auvergne-Rhône-Alpes', 'PACA', 'Corse'],
-        }
-        df['region'] = df['region'].apply(lambda x: replace_by_dict(x, economy_based_regions))
+    if 'region' in columns:
+        columns['region'] = _group_regions(columns['region'])
 
     # Étape 4: Transformation de la date de création en ancienneté
-    if 'date_creation_compte' in df.columns:
-        df['date_creation_compte'] = pd.to_datetime(df['date_creation_compte'], errors='coerce')
-        df['anciennete_mois'] = ((pd.Timestamp.now() - df['date_creation_compte']) / pd.Timedelta(days=30)).astype(int)
-        df = df.drop(columns='date_creation_compte')
+    if 'date_creation_compte' in columns:
+        dates = pd.to_datetime(columns.pop('date_creation_compte'), errors='coerce')
+        columns['anciennete_mois'] = ((pd.Timestamp.now() - dates) / pd.Timedelta(days=DAYS_PER_MONTH)).astype(int).to_numpy()
 
     # Étape 5: Création des indicateurs de valeurs manquantes
-    cols_for_missing_indicator = ['historique_credits', 'score_credit', 'loyer_mensuel', 'situation_familiale', 'quotient_caf', 'nb_enfants']
-    for col in cols_for_missing_indicator:
-        if col in df.columns:
-            df[f'{col}_missing_value'] = df[col].isna().astype(int)
+    for col in MISSING_INDICATOR_COLS:
+        if col in columns:
+            columns[f'{col}_missing_value'] = pd.isna(columns[col]).astype(int)
 
     # Étape 6: Traitement des valeurs aberrantes
-    if 'loyer_mensuel' in df.columns:
-        df['loyer_mensuel'] = df['loyer_mensuel'].mask(df['loyer_mensuel'] < 0)
-    
+    if 'loyer_mensuel' in columns:
+        loyers = columns['loyer_mensuel']
+        # Colonne objet (ex. uniquement des None) : comparaison pandas, qui ignore les valeurs manquantes
+        negative = (pd.Series(loyers) < 0).to_numpy() if loyers.dtype == object else loyers < 0
+        if negative.any():
+            columns['loyer_mensuel'] = np.where(negative, np.nan, loyers)
+
     # Étape 7: S'assurer que les noms de colonnes sont des chaînes de caractères
-    df.rename(str, axis='columns', inplace=True)
+    return pd.DataFrame({str(col): values for col, values in columns.items()}, index=df.index)
 
-    return df
+def transform_record(record, ethically_strict=True, now=None):
+    """
+    Équivalent de `apply_manual_transformations()` pour un seul client sous forme de
+    dictionnaire, sans pandas. Le résultat peut être passé directement à un
+    preprocessor compilé (voir `api.modules.compiled_preprocessor`).
 
-def preprocessing(df):
-    '''
-    Applique les transformations manuelles puis crée et entraîne un preprocessor
-    pour le cas "ethically strict".
-    '''
-    # Appliquer les transformations manuelles
-    df_manual = apply_manual_transformations(df, ethically_strict=True)
+    args:
+    - record: dictionnaire des champs du client.
+    - ethically_strict: Booléen pour choisir entre le preprocessing strict ou lâche.
+    - now: date de référence pour l'ancienneté (maintenant par défaut).
+
+    returns:
+    - dictionnaire avec les transformations manuelles appliquées.
+    """
+    dropped_cols = STRICT_DROPPED_COLS if ethically_strict else LOOSE_DROPPED_COLS
+    result = {key: value for key, value in record.items() if key not in dropped_cols}
 
-    # Définir les listes de colonnes pour la pipeline
-    numerical_cols = ['revenu_estime_mois', 'risque_personnel', 'loyer_mensuel', 'historique_credits',
-                       'score_credit', 'quotient_caf', 'nb_enfants', 'anciennete_mois']
-    categorical_cols = ['age_group', 'sport_licence', 'niveau_etude', 'region', 'situation_familiale',
-                        'historique_credits_missing_value', 'score_credit_missing_value', 
-                        'loyer_mensuel_missing_value', 'situation_familiale_missing_value',
-                        'quotient_caf_missing_value', 'nb_enfants_missing_value']
+    if ethically_strict and 'age' in result:
+        result['age_group'] = _age_group(result.pop('age'))
 
-    # Filtrer les listes pour ne garder que les colonnes présentes
-    numerical_cols = [col for col in numerical_cols if col in df_manual.columns]
-    categorical_cols = [col for col in categorical_cols if col in df_manual.columns]
+    if 'region' in result:
+        result['region'] = REGION_LOOKUP.get(result['region'], result['region'])
 
+    if 'date_creation_compte' in result:
+        result['anciennete_mois'] = months_since(result.pop('date_creation_compte'), now)
+
+    for col in MISSING_INDICATOR_COLS:
+        if col in result:
+            result[f'{col}_missing_value'] = int(_is_missing(result[col]))
+
+    loyer = result.get('loyer_mensuel')
+    if not _is_missing(loyer) and loyer < 0:
+        result['loyer_mensuel'] = np.nan
+
+    return {str(key): value for key, value in result.items()}
+
+def months_since(date_value, now=None):
+    """
+    Ancienneté en mois (de 30 jours, tronquée) d'une date de création de compte.
+
+    raises:
+    - ValueError si la date est absente ou illisible.
+    """
+    if isinstance(date_value, datetime):
+        created_at = date_value
+    elif isinstance(date_value, date):
+        created_at = datetime(date_value.year, date_value.month, date_value.day)
+    else:
+        try:
+            created_at = datetime.fromisoformat(str(date_value))
+        except ValueError:
+            # Formats non ISO : même interprétation que pd.to_datetime
+            created_at = pd.to_datetime(date_value, errors='coerce')
+            if pd.isna(created_at):
+                raise ValueError(f'Date de création de compte invalide : {date_value!r}')
+            created_at = created_at.to_pydatetime()
+    return int(((now or datetime.now()) - created_at) / timedelta(days=DAYS_PER_MONTH))
+
+def _age_groups(ages):
+    """Catégorisation vectorisée de l'âge, identique à `pd.cut(ages, AGE_BINS, labels=AGE_LABELS)`."""
+    codes = np.searchsorted(AGE_BINS, np.asarray(ages, dtype=np.float64), side='left') - 1
+    codes[(codes < 0) | (codes >= len(AGE_LABELS))] = -1
+    return pd.Categorical.from_codes(codes, categories=AGE_LABELS, ordered=True)
+
+def _group_regions(regions):
+    """Regroupement vectorisé des régions : une recherche par valeur distincte."""
+    codes, uniques = pd.factorize(regions)
+    grouped = np.asarray(regions, dtype=object).copy()
+    known = codes >= 0
+    grouped[known] = np.array([REGION_LOOKUP.get(region, region) for region in uniques], dtype=object)[codes[known]]
+    return grouped
+
+def _age_group(age):
+    if _is_missing(age):
+        return np.nan
+    code = int(np.searchsorted(AGE_BINS, age, side='left')) - 1
+    return AGE_LABELS[code] if 0 <= code < len(AGE_LABELS) else np.nan
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+def pipeline_columns(columns, ethically_strict=True):
+    """
+    Retourne les colonnes numériques et catégorielles du preprocessor présentes
+    parmi `columns` (colonnes après transformations manuelles).
+    """
+    numerical_cols = STRICT_NUMERICAL_COLS if ethically_strict else LOOSE_NUMERICAL_COLS
+    categorical_cols = STRICT_CATEGORICAL_COLS if ethically_strict else LOOSE_CATEGORICAL_COLS
+    return [col for col in numerical_cols if col in columns], [col for col in categorical_cols if col in columns]
+
+def build_preprocessor(numerical_cols, categorical_cols):
+    """Crée le preprocessor (non entraîné) commun aux cas "ethically strict" et "ethically loose"."""
     # Définir les pipelines
     num_pipeline = Pipeline([
         ('imputer', SimpleImputer(strategy='mean')), 
@@ -118,14 +211,26 @@ def preprocessing(df):
     ])
 
     # Créer le preprocessor
-    preprocessor = ColumnTransformer([
+    return ColumnTransformer([
         ('num', num_pipeline, numerical_cols),
         ('cat', cat_pipeline, categorical_cols)
     ], remainder='passthrough')
 
+def preprocessing(df):
+    '''
+    Applique les transformations manuelles puis crée et entraîne un preprocessor
+    pour le cas "ethically strict".
+    '''
+    # Appliquer les transformations manuelles
+    df_manual = apply_manual_transformations(df, ethically_strict=True)
+
+    # Listes de colonnes de la pipeline présentes dans les données
+    numerical_cols, categorical_cols = pipeline_columns(df_manual.columns, ethically_strict=True)
+    preprocessor = build_preprocessor(numerical_cols, categorical_cols)
+
     # Séparer les données et entraîner le preprocessor
-    X = df_manual.drop(columns=['montant_pret'])
-    y = df_manual['montant_pret']
+    X = df_manual.drop(columns=[TARGET_COL])
+    y = df_manual[TARGET_COL]
     X_processed = preprocessor.fit_transform(X)
     
     return X_processed, y, preprocessor
@@ -138,37 +243,13 @@ def ethically_loose_preprocessing(df):
     # Appliquer les transformations manuelles
     df_manual = apply_manual_transformations(df, ethically_strict=False)
 
-    # Définir les listes de colonnes pour la pipeline
-    numerical_cols = ['age', 'taille', 'poids', 'revenu_estime_mois', 'risque_personnel', 'loyer_mensuel', 'historique_credits',
-                       'score_credit', 'quotient_caf', 'nb_enfants', 'anciennete_mois']
-    categorical_cols = ['smoker', 'sport_licence', 'niveau_etude', 'region', 'situation_familiale',
-                        'historique_credits_missing_value', 'score_credit_missing_value', 
-                        'loyer_mensuel_missing_value', 'situation_familiale_missing_value',
-                        'quotient_caf_missing_value', 'nb_enfants_missing_value']
-
-    # Filtrer les listes pour ne garder que les colonnes présentes
-    numerical_cols = [col for col in numerical_cols if col in df_manual.columns]
-    categorical_cols = [col for col in categorical_cols if col in df_manual.columns]
-
-    # Définir les pipelines
-    num_pipeline = Pipeline([
-        ('imputer', SimpleImputer(strategy='mean')), 
-        ('scaler', StandardScaler())
-    ])
-    cat_pipeline = Pipeline([
-        ('imputer', SimpleImputer(strategy='most_frequent')),
-        ('encoder', OneHotEncoder(handle_unknown='ignore', sparse_output=False))
-    ])
-
-    # Créer le preprocessor
-    preprocessor = ColumnTransformer([
-        ('num', num_pipeline, numerical_cols),
-        ('cat', cat_pipeline, categorical_cols)
-    ], remainder='passthrough')
+    # Listes de colonnes de la pipeline présentes dans les données
+    numerical_cols, categorical_cols = pipeline_columns(df_manual.columns, ethically_strict=False)
+    preprocessor = build_preprocessor(numerical_cols, categorical_cols)
 
     # Séparer les données et entraîner le preprocessor
-    X = df_manual.drop(columns=['montant_pret'])
-    y = df_manual['montant_pret']
+    X = df_manual.drop(columns=[TARGET_COL])
+    y = df_manual[TARGET_COL]
     X_processed = preprocessor.fit_transform(X)
     
     return X_processed, y, preprocessor
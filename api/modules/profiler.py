@@ -0,0 +1,79 @@
+import sys
+from collections import Counter
+from os.path import basename
+from threading import Event, Thread, get_ident
+
+# Feuilles de pile d'un thread au repos : attente d'une tâche, d'un verrou, d'un événement réseau,
+# du writer de loguru (enqueue=True) ou du thread de connexion d'aiosqlite
+IDLE_FRAMES = {
+    ('threading.py', 'wait'),
+    ('selectors.py', 'select'),
+    ('queue.py', 'get'),
+    ('thread.py', '_worker'),
+    ('connection.py', '_recv'),
+    ('core.py', '_connection_worker_thread'),
+}
+
+class SamplingProfiler:
+    """
+    Profileur par échantillonnage, à utiliser sur une seule requête.
+
+    Un thread de fond relève toutes les `interval` secondes la pile Python de
+    chaque thread du processus (`sys._current_frames()`), ce qui couvre la boucle
+    asyncio comme les threads d'inférence. Les threads au repos sont ignorés. Le
+    coût est porté par le thread d'échantillonnage, pas par le code profilé ; les
+    workers d'un pool de processus ne sont pas visibles.
+
+    args:
+    - interval: période d'échantillonnage en secondes.
+    - max_depth: nombre maximal de frames conservées par pile.
+    """
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self._stop = Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self._thread = Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def _run(self):
+        own_thread = get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append((basename(code.co_filename), code.co_name, frame.f_lineno))
+                    frame = frame.f_back
+                if stack and stack[0][:2] not in IDLE_FRAMES:
+                    self.samples[';'.join(f'{function} ({filename}:{line})' for filename, function, line in reversed(stack))] += 1
+
+    def collapsed(self):
+        """Piles repliées (`f1;f2;f3 N` par ligne), lisibles par flamegraph.pl ou speedscope."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
+
+    def top(self, n=20):
+        """Les `n` fonctions les plus souvent en cours d'exécution, avec leur nombre d'échantillons."""
+        leaves = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(n)
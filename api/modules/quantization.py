@@ -0,0 +1,127 @@
+import os
+from hashlib import blake2b
+from os.path import splitext
+
+import numpy as np
+
+from api.modules.numpy_backend import ACTIVATIONS, NumpyModel
+
+PRECISIONS = ('float32', 'float16', 'int8')
+INT8_MAX = 127
+
+def quantized_weights_path(model_path, precision):
+    """Chemin de l'archive quantifiée associée à un fichier `.keras` (ex. `x_model.int8.npz`)."""
+    return f'{splitext(model_path)[0]}.{precision}.npz'
+
+def weights_digest(model):
+    """Empreinte des poids float32 d'un `NumpyModel`, pour détecter une archive quantifiée périmée."""
+    digest = blake2b(digest_size=8)
+    for kernel, bias in zip(model.kernels, model.biases):
+        digest.update(np.ascontiguousarray(kernel, dtype=np.float32).tobytes())
+        digest.update(np.ascontiguousarray(bias, dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+class Int8NumpyModel(NumpyModel):
+    """
+    Réseau dense dont les noyaux sont quantifiés en int8 (symétrique, une échelle
+    par neurone de sortie) et gardés en int8 en mémoire.
+
+    Seuls les poids sont quantifiés : chaque couche calcule `(X @ noyau_int8) × échelle`
+    en float32, le produit matriciel convertissant les entiers à la volée. Les entrées
+    ne sont ni arrondies ni écrêtées, et aucune calibration n'est nécessaire.
+
+    args:
+    - kernels: noyaux quantifiés (entiers int8).
+    - kernel_scales: échelle de chaque colonne des noyaux.
+    - biases / activations: comme `NumpyModel`.
+    """
+    def __init__(self, kernels, kernel_scales, biases, activations):
+        super().__init__(kernels, biases, activations, weights_dtype=np.int8)
+        self.kernel_scales = [np.asarray(scale, dtype=np.float32) for scale in kernel_scales]
+
+    @property
+    def weights_nbytes(self):
+        return super().weights_nbytes + sum(scale.nbytes for scale in self.kernel_scales)
+
+    def predict(self, X, **kwargs):
+        outputs = np.asarray(X, dtype=self.dtype)
+        if outputs.ndim == 1:
+            outputs = outputs.reshape(1, -1)
+        if outputs.shape[1] != self.input_dim:
+            raise ValueError(f'Expected {self.input_dim} input features, got {outputs.shape[1]}')
+        for kernel, scale, bias, activation in zip(self.kernels, self.kernel_scales, self.biases, self.activations):
+            outputs = outputs @ kernel
+            outputs *= scale
+            outputs += bias
+            outputs = ACTIVATIONS[activation](outputs)
+        return outputs
+
+def quantize_model(model, precision):
+    """
+    Version en précision réduite d'un `NumpyModel` float32.
+
+    - float16 : noyaux arrondis et gardés en float16 (calculs en float32).
+    - int8 : noyaux quantifiés par colonne (échelle = max |w| / 127) et gardés en int8.
+
+    args:
+    - model: `NumpyModel` float32.
+    - precision: 'float32', 'float16' ou 'int8'.
+
+    returns:
+    - `NumpyModel` (float32, float16) ou `Int8NumpyModel`.
+    """
+    if precision == 'float32':
+        return model
+    if precision == 'float16':
+        return NumpyModel(model.kernels, model.biases, model.activations, weights_dtype=np.float16)
+    if precision != 'int8':
+        raise ValueError(f'Précision inconnue : {precision}')
+
+    kernels, kernel_scales = [], []
+    for kernel in model.kernels:
+        scale = np.abs(kernel).max(axis=0) / INT8_MAX
+        scale[scale == 0] = 1.0
+        kernels.append(np.clip(np.rint(kernel / scale), -INT8_MAX, INT8_MAX).astype(np.int8))
+        kernel_scales.append(scale.astype(np.float32))
+    return Int8NumpyModel(kernels, kernel_scales, model.biases, model.activations)
+
+def export_quantized_model(model, path, precision, source_digest):
+    """
+    Écrit un modèle quantifié dans une archive `.npz` (écriture atomique), avec
+    l'empreinte des poids float32 dont il est issu.
+    """
+    arrays = {'activations': np.array(model.activations), 'precision': np.array(precision),
+              'source_digest': np.array(source_digest)}
+    for index, bias in enumerate(model.biases):
+        arrays[f'bias_{index}'] = bias
+        arrays[f'kernel_{index}'] = model.kernels[index]
+        if isinstance(model, Int8NumpyModel):
+            arrays[f'kernel_scale_{index}'] = model.kernel_scales[index]
+    tmp_path = f'{path}.tmp.npz'
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+def load_quantized_model(path, source_digest=None):
+    """
+    Charge une archive produite par `export_quantized_model`.
+
+    args:
+    - path: chemin de l'archive.
+    - source_digest: empreinte des poids float32 actuels ; si elle diffère de celle
+      de l'archive, l'archive est périmée et le chargement est refusé.
+
+    raises:
+    - ValueError si l'archive est périmée.
+    """
+    with np.load(path, allow_pickle=False) as archive:
+        if source_digest is not None and str(archive['source_digest']) != source_digest:
+            raise ValueError(f"{path} a été quantifié à partir d'autres poids : relancer api.scripts.quantize_models")
+        precision = str(archive['precision'])
+        activations = [str(activation) for activation in archive['activations']]
+        kernels = [archive[f'kernel_{index}'] for index in range(len(activations))]
+        biases = [archive[f'bias_{index}'] for index in range(len(activations))]
+        if precision == 'int8':
+            return Int8NumpyModel(kernels, [archive[f'kernel_scale_{index}'] for index in range(len(activations))],
+                                  biases, activations)
+    return NumpyModel(kernels, biases, activations, weights_dtype=np.float16 if precision == 'float16' else None)
@@ -0,0 +1,52 @@
+from time import monotonic
+
+class Readiness:
+    """
+    État de préparation du processus, distinct de sa vivacité : le processus est
+    vivant dès qu'il répond, prêt une fois le warm-up (imports lourds et chargement
+    de la variante active) terminé.
+
+    États : 'starting' (warm-up en cours), 'ready', 'failed' (warm-up en erreur) et
+    'degraded' (warm-up terminé mais variante active indisponible : le processus n'est
+    pas prêt, mais une autre variante peut être activée ou demandée explicitement).
+    """
+    def __init__(self, clock=monotonic):
+        self._clock = clock
+        self.started_at = clock()
+        self.state = 'starting'
+        self.error = None
+        self.warm_up_seconds = None
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    @property
+    def warmed_up(self):
+        """True une fois le warm-up terminé, variante active disponible ou non"""
+        return self.state in ('ready', 'degraded')
+
+    def mark_ready(self):
+        if self.warm_up_seconds is None:
+            self.warm_up_seconds = self._clock() - self.started_at
+        self.error = None
+        self.state = 'ready'
+
+    def mark_degraded(self, err):
+        self.warm_up_seconds = self._clock() - self.started_at
+        self.error = str(err)
+        self.state = 'degraded'
+
+    def mark_failed(self, err):
+        self.warm_up_seconds = self._clock() - self.started_at
+        self.error = str(err)
+        self.state = 'failed'
+
+    def describe(self):
+        return {
+            'state': self.state,
+            'ready': self.ready,
+            'error': self.error,
+            'uptime_seconds': self._clock() - self.started_at,
+            'warm_up_seconds': self.warm_up_seconds,
+        }
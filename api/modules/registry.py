@@ -0,0 +1,266 @@
+from glob import glob
+from os.path import basename, exists, join
+from threading import Lock
+from time import perf_counter
+
+import numpy as np
+from loguru import logger
+
+from api.modules.metrics import unobserved_stages
+from api.modules.numpy_backend import load_model, numpy_weights_path
+from api.modules.quantization import quantized_weights_path
+from api.utils.helpers import artifact_version
+
+MODEL_SUFFIX = '_model.keras'
+PREPROCESSOR_SUFFIX = '_preprocessor.pkl'
+
+# Champs utilisés uniquement par le preprocessing "ethically loose" et absents de ClientSchema :
+# ils sont transmis comme manquants et donc imputés par le preprocessor.
+LOOSE_ONLY_FIELDS = ('sexe', 'taille', 'poids', 'smoker')
+
+WARMUP_CLIENT = {
+    'age': 35,
+    'sport_licence': True,
+    'niveau_etude': 'bac',
+    'region': 'Bretagne',
+    'revenu_estime_mois': 2500,
+    'situation_familiale': 'marié',
+    'historique_credits': 2.0,
+    'risque_personnel': 0.5,
+    'score_credit': 600.0,
+    'loyer_mensuel': 800.0,
+    'montant_pret': 0.0,
+    'date_creation_compte': '2022-01-01',
+    'nb_enfants': 1,
+    'quotient_caf': 200.0,
+}
+WARMUP_BATCH_SIZE = 8
+
+class ModelUnavailableError(RuntimeError):
+    """Le couple modèle/preprocessor demandé ne peut pas être chargé ou échoue au warm-up."""
+
+class ModelEntry:
+    """Couple modèle/preprocessor chargé, prêt à servir des prédictions."""
+    def __init__(self, variant, model_path, preprocessor_path, version, model, preprocessor):
+        self.variant = variant
+        self.model_path = model_path
+        self.preprocessor_path = preprocessor_path
+        self.version = version
+        self.model = model
+        self.preprocessor = preprocessor
+        self.ethically_strict = 'loose' not in variant
+        self.load_seconds = None
+
+    def predict_records(self, records):
+        from api.modules.inference import predict_records
+
+        if not self.ethically_strict:
+            records = [{**dict.fromkeys(LOOSE_ONLY_FIELDS), **record} for record in records]
+        return predict_records(records, self.preprocessor, self.model, ethically_strict=self.ethically_strict)
+
+    def predict_frame(self, df):
+        from api.modules.inference import predict_frame
+
+        if not self.ethically_strict:
+            df = df.assign(**{col: None for col in LOOSE_ONLY_FIELDS if col not in df.columns})
+        return predict_frame(df, self.preprocessor, self.model, ethically_strict=self.ethically_strict)
+
+    def warm_up(self):
+        """Exécute une prédiction sur un lot factice et vérifie la forme et la validité du résultat."""
+        # Prédiction factice : hors des métriques des étapes de /api/predict
+        with unobserved_stages():
+            predictions = np.asarray(self.predict_records([dict(WARMUP_CLIENT) for _ in range(WARMUP_BATCH_SIZE)]))
+        if predictions.shape != (WARMUP_BATCH_SIZE,) or not np.all(np.isfinite(predictions)):
+            raise ValueError(f'Prédictions de warm-up invalides : forme {predictions.shape}')
+
+    def describe(self):
+        return {
+            'variant': self.variant,
+            'model_path': self.model_path,
+            'preprocessor_path': self.preprocessor_path,
+            'version': self.version,
+            'ethically_strict': self.ethically_strict,
+            'load_seconds': self.load_seconds,
+        }
+
+class ModelRegistry:
+    """
+    Registre des couples modèle/preprocessor disponibles dans `models/`.
+
+    Les variantes (ex. 'ethically_strict', 'new_ethically_loose') sont découvertes à
+    partir des fichiers `<variante>_model.keras` et `<variante>_preprocessor.pkl`,
+    chargées à la première utilisation puis soumises à un warm-up avant de servir.
+    `activate()` bascule la variante active de façon atomique : les requêtes en cours
+    conservent la référence de l'entrée qu'elles ont obtenue.
+
+    args:
+    - models_dir: dossier des artefacts.
+    - default_variant: variante active au démarrage.
+    - inference_backend: 'keras' ou 'numpy'.
+    - preprocessor_backend: 'sklearn' ou 'compiled'.
+    - inference_precision: 'float32', ou 'float16' / 'int8' (archives quantifiées, backend 'numpy').
+    """
+    def __init__(self, models_dir, default_variant, inference_backend='keras', preprocessor_backend='sklearn',
+                 inference_precision='float32'):
+        self.models_dir = models_dir
+        self.inference_backend = inference_backend
+        self.inference_precision = inference_precision
+        self.preprocessor_backend = preprocessor_backend
+        self._paths = {}
+        self._entries = {}
+        self._previous = {}
+        self._errors = {}
+        self._failed_versions = {}
+        self._locks = {}
+        self._registry_lock = Lock()
+        self._active_variant = default_variant
+        self.discover()
+
+    @property
+    def active_variant(self):
+        return self._active_variant
+
+    def discover(self):
+        """Recense les couples modèle/preprocessor présents dans le dossier des modèles."""
+        for preprocessor_path in sorted(glob(join(self.models_dir, f'*{PREPROCESSOR_SUFFIX}'))):
+            variant = basename(preprocessor_path)[:-len(PREPROCESSOR_SUFFIX)]
+            model_path = join(self.models_dir, f'{variant}{MODEL_SUFFIX}')
+            if exists(model_path) or exists(numpy_weights_path(model_path)):
+                self.register(variant, model_path, preprocessor_path)
+
+    def register(self, variant, model_path, preprocessor_path):
+        with self._registry_lock:
+            self._paths[variant] = (model_path, preprocessor_path)
+            self._locks.setdefault(variant, Lock())
+
+    def get(self, variant=None):
+        """
+        Retourne l'entrée chargée d'une variante (la variante active par défaut),
+        en la chargeant et en la réchauffant si nécessaire.
+
+        raises:
+        - KeyError si la variante est inconnue.
+        - ModelUnavailableError si le chargement ou le warm-up échoue.
+        """
+        variant = variant or self._active_variant
+        entry = self._entries.get(variant)
+        if entry is not None:
+            return entry
+        if variant not in self._paths:
+            raise KeyError(variant)
+        with self._locks[variant]:
+            entry = self._entries.get(variant)
+            if entry is None:
+                # Pas de nouvelle tentative tant que des artefacts en échec n'ont pas été remplacés
+                if self._failed_versions.get(variant) == self._checked_version(variant):
+                    raise ModelUnavailableError(f'Variante {variant} indisponible : {self._errors[variant]}')
+                entry = self._load(variant)
+                self._store(entry)
+        return entry
+
+    def reload(self, variant):
+        """Charge une variante, ou la recharge si ses fichiers ont changé depuis le dernier chargement."""
+        if variant not in self._paths:
+            raise KeyError(variant)
+        with self._locks[variant]:
+            entry = self._entries.get(variant)
+            if entry is None or entry.version != self._checked_version(variant):
+                entry = self._load(variant)
+                self._store(entry)
+        return entry
+
+    def resolve(self, variant, version):
+        """
+        Retourne l'entrée d'une variante dans la version demandée si elle est encore en
+        mémoire (entrée courante ou tout juste remplacée), sinon l'entrée courante,
+        rechargée si les fichiers ont changé. Permet aux workers d'inférence de ne
+        recevoir que des références (variante, version) sérialisables.
+        """
+        for entry in (self._entries.get(variant), self._previous.get(variant)):
+            if entry is not None and entry.version == version:
+                return entry
+        return self.reload(variant)
+
+    def activate(self, variant):
+        """
+        Charge (ou recharge si les fichiers ont changé), réchauffe puis active une variante.
+        La variante active précédente reste servie tant que la nouvelle n'est pas prête.
+        """
+        entry = self.reload(variant)
+        self._active_variant = variant
+        logger.info(f'Active model variant is now {variant} (version {entry.version})')
+        return entry
+
+    def variants(self):
+        return [
+            {
+                'variant': variant,
+                'model_path': model_path,
+                'preprocessor_path': preprocessor_path,
+                'loaded': variant in self._entries,
+                'active': variant == self._active_variant,
+                'version': self._entries[variant].version if variant in self._entries else None,
+                'error': self._errors.get(variant),
+            }
+            for variant, (model_path, preprocessor_path) in sorted(self._paths.items())
+        ]
+
+    def _store(self, entry):
+        # L'entrée remplacée reste résolvable pour les lots déjà en file
+        previous = self._entries.get(entry.variant)
+        if previous is not None:
+            self._previous[entry.variant] = previous
+        self._entries[entry.variant] = entry
+
+    def _model_file(self, model_path):
+        if self.inference_precision != 'float32':
+            return quantized_weights_path(model_path, self.inference_precision)
+        return numpy_weights_path(model_path) if self.inference_backend == 'numpy' else model_path
+
+    def _version(self, variant):
+        model_path, preprocessor_path = self._paths[variant]
+        return artifact_version(self._model_file(model_path), preprocessor_path)
+
+    def _checked_version(self, variant):
+        """
+        Version des artefacts d'une variante.
+
+        raises:
+        - ModelUnavailableError (échec enregistré) si un fichier est absent ou illisible.
+        """
+        try:
+            return self._version(variant)
+        except OSError as err:
+            self._errors[variant] = str(err)
+            self._failed_versions[variant] = None
+            logger.error(f'Model variant {variant} artifacts are unavailable: {err}')
+            raise ModelUnavailableError(f'Variante {variant} indisponible : {err}') from err
+
+    def _load(self, variant):
+        # Imports différés (pandas, scikit-learn, joblib) : le processus peut démarrer avant le premier chargement
+        from api.modules.compiled_preprocessor import load_preprocessor
+
+        model_path, preprocessor_path = self._paths[variant]
+        started = perf_counter()
+        entry_version = None
+        try:
+            entry_version = self._version(variant)
+            entry = ModelEntry(
+                variant=variant,
+                model_path=model_path,
+                preprocessor_path=preprocessor_path,
+                version=entry_version,
+                model=load_model(model_path, backend=self.inference_backend, precision=self.inference_precision),
+                preprocessor=load_preprocessor(preprocessor_path, backend=self.preprocessor_backend),
+            )
+            entry.warm_up()
+        except Exception as err:
+            self._errors[variant] = str(err)
+            self._failed_versions[variant] = entry_version
+            logger.error(f'Failed to load model variant {variant}: {err}')
+            raise ModelUnavailableError(f'Variante {variant} indisponible : {err}') from err
+        self._errors.pop(variant, None)
+        self._failed_versions.pop(variant, None)
+        entry.load_seconds = perf_counter() - started
+        logger.info(f'Loaded and warmed up model variant {variant} in {entry.load_seconds:.2f}s')
+        return entry
@@ -0,0 +1,174 @@
+import multiprocessing
+import os
+import random
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from math import ceil
+from os.path import join
+from time import perf_counter
+
+from api.modules.orchestrator import default_threads_per_worker, limit_threads
+
+# Espace de recherche par défaut : l'architecture actuelle (64/32, Adam 1e-3, lots de 32) en fait partie
+DEFAULT_SPACE = {
+    'units': [[32], [64, 32], [128, 64], [128, 64, 32]],
+    'learning_rate': [0.0003, 0.001, 0.003],
+    'batch_size': [32, 128],
+    'epochs': 30,
+}
+
+def sample_configs(space, n_trials=None, seed=42):
+    """
+    Configurations à essayer : la grille complète de l'espace de recherche, ou
+    `n_trials` configurations tirées au hasard dans cette grille.
+
+    args:
+    - space: dictionnaire {'units': [...], 'learning_rate': [...], 'batch_size': [...]}.
+    - n_trials: nombre maximal de configurations (toutes si None).
+    - seed: graine du tirage.
+
+    returns:
+    - liste de dictionnaires {'units', 'learning_rate', 'batch_size'}.
+    """
+    grid = [{'units': list(units), 'learning_rate': float(learning_rate), 'batch_size': int(batch_size)}
+            for units, learning_rate, batch_size in product(space['units'], space['learning_rate'], space['batch_size'])]
+    if n_trials is not None and n_trials < len(grid):
+        grid = random.Random(seed).sample(grid, n_trials)
+    return grid
+
+def rung_budgets(min_epochs, max_epochs, eta=3):
+    """Nombre d'époques cumulé à atteindre à chaque palier : min_epochs, min_epochs × eta, ... jusqu'à max_epochs."""
+    budgets = [min(min_epochs, max_epochs)]
+    while budgets[-1] < max_epochs:
+        budgets.append(min(budgets[-1] * eta, max_epochs))
+    return budgets
+
+def run_trial(trial, features_path, work_dir, epochs, options):
+    """
+    Entraîne (ou reprend) un essai dans le worker courant jusqu'à `epochs` époques
+    cumulées, avec arrêt anticipé sur la perte de validation. Le modèle (poids et
+    état de l'optimiseur) est sauvegardé entre deux paliers.
+
+    args:
+    - trial: essai {'id', 'config', 'epochs_done', 'best_val_loss'}.
+    - features_path: dossier de l'entrée du cache de features.
+    - work_dir: dossier des modèles intermédiaires.
+    - epochs: nombre d'époques cumulé à atteindre.
+    - options: options communes (patience, validation_fraction, seed).
+
+    returns:
+    - essai mis à jour (époques faites, pertes de validation, arrêt anticipé).
+    """
+    started = perf_counter()
+    import numpy as np
+    import tensorflow as tf
+
+    from api.modules.datasets import validation_mask
+    from api.modules.feature_store import FeatureSet
+    from api.modules.models import create_nn_model, train_model
+
+    tf.keras.utils.set_random_seed(options['seed'] + trial['id'])
+    features = FeatureSet(features_path)
+    in_validation = validation_mask(features.ids, options['validation_fraction'])
+    X_train, y_train = features.X[~in_validation], features.y[~in_validation]
+    X_val, y_val = features.X[in_validation], features.y[in_validation]
+
+    config = trial['config']
+    model_path = join(work_dir, f"trial_{trial['id']}.keras")
+    if trial['epochs_done']:
+        model = tf.keras.models.load_model(model_path)
+    else:
+        model = create_nn_model(X_train.shape[1], units=tuple(config['units']), learning_rate=config['learning_rate'])
+
+    early_stopping = tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=options['patience'],
+                                                      restore_best_weights=True)
+    model, history = train_model(model, X_train, y_train, X_val=X_val, y_val=y_val, epochs=epochs,
+                                 batch_size=config['batch_size'], initial_epoch=trial['epochs_done'],
+                                 callbacks=[early_stopping])
+    # Un essai qui diverge (taux d'apprentissage trop fort) est classé dernier
+    val_losses = [float(loss) if np.isfinite(loss) else float('inf') for loss in history.history['val_loss']]
+    model.save(model_path)
+
+    best_val_loss = min([loss for loss in val_losses + [trial['best_val_loss']] if loss is not None])
+    return {
+        **trial,
+        'epochs_done': trial['epochs_done'] + len(val_losses),
+        'val_losses': trial['val_losses'] + val_losses,
+        'best_val_loss': float(best_val_loss),
+        'best_epoch': int(np.argmin(trial['val_losses'] + val_losses)) + 1,
+        'stopped': bool(early_stopping.stopped_epoch) or trial['epochs_done'] + len(val_losses) < epochs,
+        'seconds': trial['seconds'] + perf_counter() - started,
+    }
+
+def successive_halving(configs, features_path, options, work_dir, min_epochs=3, max_epochs=30, eta=3, workers=None,
+                       threads_per_worker=None):
+    """
+    Recherche d'hyperparamètres par divisions successives (successive halving).
+
+    Tous les essais sont entraînés `min_epochs` époques, en parallèle dans des
+    processus ; seul le meilleur tiers (1/eta) selon la perte de validation est
+    poursuivi jusqu'au palier suivant (budget × eta), et ainsi de suite jusqu'à
+    `max_epochs`. Un essai arrêté par l'arrêt anticipé n'est plus entraîné mais
+    reste classé avec sa meilleure perte. Tous les essais lisent la même matrice de
+    features projetée en mémoire.
+
+    args:
+    - configs: configurations à essayer (voir `sample_configs()`).
+    - features_path: dossier de l'entrée du cache de features.
+    - options: options communes de `run_trial()`.
+    - work_dir: dossier des modèles intermédiaires (supprimé à la fin).
+    - min_epochs / max_epochs / eta: budgets des paliers.
+    - workers / threads_per_worker: nombre de processus et threads de calcul par processus.
+
+    returns:
+    - liste des essais, du meilleur au moins bon, avec le palier atteint ('rung').
+    """
+    budgets = rung_budgets(min_epochs, max_epochs, eta)
+    trials = [{'id': index, 'config': config, 'epochs_done': 0, 'val_losses': [], 'best_val_loss': None,
+               'best_epoch': None, 'stopped': False, 'rung': 0, 'seconds': 0.0} for index, config in enumerate(configs)]
+    workers = workers or min(len(trials), os.cpu_count() or 1)
+    threads_per_worker = threads_per_worker or default_threads_per_worker(workers)
+    os.makedirs(work_dir, exist_ok=True)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=limit_threads, initargs=(threads_per_worker,)) as pool:
+            active = list(trials)
+            for rung, budget in enumerate(budgets):
+                futures = {pool.submit(run_trial, trial, features_path, work_dir, budget, options): trial['id']
+                           for trial in active if not trial['stopped']}
+                for future in as_completed(futures):
+                    trial = future.result()
+                    trials[trial['id']] = trial
+                    print(f"🔎 Essai {trial['id']} palier {rung} ({trial['epochs_done']} époques) : "
+                          f"val_loss {trial['best_val_loss']:.1f}{' (arrêt anticipé)' if trial['stopped'] else ''}")
+
+                for trial in active:
+                    # Un essai arrêté plus tôt mais encore parmi les meilleurs atteint aussi ce palier
+                    trials[trial['id']]['rung'] = rung
+                ranked = sorted((trials[trial['id']] for trial in active), key=lambda trial: trial['best_val_loss'])
+                active = ranked[:max(1, ceil(len(ranked) / eta))]
+                if rung + 1 < len(budgets):
+                    print(f"✂️ Palier {rung} : {len(active)} essai(s) sur {len(ranked)} poursuivi(s)")
+                if all(trial['stopped'] for trial in active):
+                    break
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return sorted(trials, key=lambda trial: (-trial['rung'], trial['best_val_loss']))
+
+def best_config(trial, mode, window):
+    """
+    Configuration prête pour `api.scripts.train_variants --config` : architecture,
+    taux d'apprentissage, taille des lots et nombre d'époques (celui de la meilleure
+    perte de validation de l'essai).
+    """
+    return {
+        **trial['config'],
+        'epochs': trial['best_epoch'],
+        'mode': mode,
+        'window': window,
+        'val_loss': trial['best_val_loss'],
+        'trial': trial['id'],
+    }
@@ -0,0 +1,151 @@
+from io import BytesIO
+from typing import Literal, get_args, get_origin
+import json
+
+import numpy as np
+
+# Représentations textuelles acceptées pour un booléen (mêmes règles que pydantic, plus oui/non)
+BOOL_STRINGS = {
+    'true': True, 't': True, 'yes': True, 'y': True, 'on': True, '1': True, '1.0': True, 'oui': True,
+    'false': False, 'f': False, 'no': False, 'n': False, 'off': False, '0': False, '0.0': False, 'non': False,
+}
+
+# Champs texte qui doivent contenir une date lisible (même lecture que `apply_manual_transformations`)
+DATE_FIELDS = ('date_creation_compte',)
+
+CSV_CONTENT_TYPES = ('text/csv', 'application/csv')
+ARROW_STREAM_CONTENT_TYPES = ('application/vnd.apache.arrow.stream',)
+ARROW_FILE_CONTENT_TYPES = ('application/vnd.apache.arrow.file',)
+
+def parse_clients_payload(body, content_type):
+    """
+    Convertit le corps d'une requête de prédiction par lot en DataFrame.
+
+    Formats acceptés :
+    - JSON : liste d'objets clients, ou objet `{"clients": [...]}`.
+    - CSV : une ligne d'en-tête puis un client par ligne.
+    - Arrow IPC : format stream ou fichier.
+
+    args:
+    - body: contenu brut de la requête (bytes).
+    - content_type: valeur de l'en-tête Content-Type.
+
+    returns:
+    - DataFrame avec un index 0..n-1 correspondant à l'ordre d'entrée.
+
+    raises:
+    - ValueError si le contenu ne peut pas être lu.
+    """
+    import pandas as pd
+
+    media_type = (content_type or 'application/json').split(';')[0].strip().lower()
+
+    if media_type in CSV_CONTENT_TYPES:
+        df = pd.read_csv(BytesIO(body))
+    elif media_type in ARROW_STREAM_CONTENT_TYPES + ARROW_FILE_CONTENT_TYPES:
+        import pyarrow as pa
+
+        reader = pa.ipc.open_stream if media_type in ARROW_STREAM_CONTENT_TYPES else pa.ipc.open_file
+        df = reader(pa.BufferReader(body)).read_pandas()
+    elif media_type == 'application/json':
+        payload = json.loads(body or b'[]')
+        if isinstance(payload, dict):
+            payload = payload.get('clients')
+        if not isinstance(payload, list) or not all(isinstance(row, dict) for row in payload):
+            raise ValueError('Le corps JSON doit être une liste de clients ou un objet {"clients": [...]}')
+        df = pd.DataFrame.from_records(payload)
+    else:
+        raise ValueError(f'Content-Type non supporté : {media_type}')
+
+    return df.reset_index(drop=True)
+
+def validate_frame(df, schema):
+    """
+    Valide toutes les lignes d'un DataFrame contre un schéma pydantic en un seul
+    passage vectorisé (une opération par colonne et non par ligne).
+
+    args:
+    - df: DataFrame d'entrée, indexé de 0 à n-1.
+    - schema: classe pydantic dont les champs sont des int, float, bool, str ou Literal.
+
+    returns:
+    - DataFrame des lignes valides, typées, en conservant leur index d'origine.
+    - liste des erreurs `{'index': i, 'errors': [{'field': ..., 'message': ...}]}` triée par index.
+    """
+    import pandas as pd
+
+    n_rows = len(df)
+    columns = {}
+    invalid_rows = np.zeros(n_rows, dtype=bool)
+    field_errors = []
+
+    for name, field in schema.model_fields.items():
+        if name not in df.columns:
+            invalid_rows[:] = True
+            field_errors.append((name, np.ones(n_rows, dtype=bool), 'champ requis'))
+            continue
+
+        column = df[name]
+        missing = column.isna().to_numpy()
+        values, invalid, message = _coerce_column(column, field.annotation)
+        if name in DATE_FIELDS:
+            invalid = invalid | pd.isna(pd.to_datetime(values, errors='coerce')).to_numpy()
+            message = 'date attendue'
+        invalid = invalid & ~missing
+
+        columns[name] = values
+        invalid_rows |= missing | invalid
+        if missing.any():
+            field_errors.append((name, missing, 'champ requis'))
+        if invalid.any():
+            field_errors.append((name, invalid, message))
+
+    errors = {}
+    for name, mask, message in field_errors:
+        for index in np.flatnonzero(mask):
+            errors.setdefault(int(index), []).append({'field': name, 'message': message})
+
+    valid = pd.DataFrame(columns, index=df.index)[~invalid_rows]
+    for name, field in schema.model_fields.items():
+        if name not in valid.columns:
+            continue
+        if field.annotation is int:
+            valid[name] = valid[name].astype('int64')
+        elif field.annotation is bool:
+            valid[name] = valid[name].astype(bool)
+
+    return valid, [{'index': index, 'errors': errors[index]} for index in sorted(errors)]
+
+def _coerce_column(column, annotation):
+    """
+    Convertit une colonne vers le type attendu.
+
+    returns:
+    - valeurs converties, masque des valeurs invalides, message d'erreur.
+    """
+    import pandas as pd
+
+    if get_origin(annotation) is Literal:
+        allowed = get_args(annotation)
+        return column, ~column.isin(allowed).to_numpy(), f'valeur attendue parmi {list(allowed)}'
+
+    if annotation is bool:
+        if pd.api.types.is_bool_dtype(column):
+            return column, np.zeros(len(column), dtype=bool), ''
+        values = column.astype(str).str.strip().str.lower().map(BOOL_STRINGS)
+        return values, values.isna().to_numpy(), 'booléen attendu'
+
+    if annotation in (int, float):
+        if pd.api.types.is_bool_dtype(column):
+            return column, np.ones(len(column), dtype=bool), f'{annotation.__name__} attendu'
+        values = pd.to_numeric(column, errors='coerce')
+        invalid = values.isna().to_numpy()
+        if annotation is int:
+            invalid |= (values.fillna(0) % 1 != 0).to_numpy()
+            return values, invalid, 'entier attendu'
+        return values.astype('float64'), invalid, 'nombre attendu'
+
+    if annotation is str:
+        return column.astype(str), np.zeros(len(column), dtype=bool), ''
+
+    raise TypeError(f'Type de champ non supporté pour la validation par lot : {annotation}')
@@ -0,0 +1,148 @@
+from collections import deque
+from threading import Condition, Event, Lock, Thread
+from time import monotonic, perf_counter, sleep
+
+from loguru import logger
+
+from api.modules.metrics import Histogram
+
+FLUSH_SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+# Politiques appliquées quand la file est pleine
+OVERFLOW_POLICIES = ('drop_new', 'drop_oldest', 'block')
+
+class WriteBehindBuffer:
+    """
+    File bornée en mémoire vidée par lots dans un thread de fond (write-behind).
+
+    `put()` ne fait qu'ajouter l'élément à la file et ne bloque jamais sur
+    l'écriture : un disque ou une base lents ne retardent pas l'appelant. Le thread
+    de fond appelle `flush(items)` dès que `batch_size` éléments sont en attente, ou
+    au plus tard toutes les `flush_interval` secondes. Quand la file est pleine,
+    `overflow` décide de l'élément perdu (compté dans `dropped`) :
+
+    - 'drop_new' : le nouvel élément est rejeté ;
+    - 'drop_oldest' : le plus ancien élément en attente est retiré ;
+    - 'block' : `put()` attend une place au plus `block_timeout` secondes, puis
+      rejette le nouvel élément (à n'utiliser que hors de la boucle asyncio).
+
+    Un lot dont l'écriture échoue est retenté `retries` fois, puis perdu (compté
+    dans `failed`) et l'erreur journalisée.
+
+    args:
+    - flush: fonction synchrone `list -> None`, appelée uniquement depuis le thread de fond.
+    - max_items: nombre maximal d'éléments en attente.
+    - batch_size: nombre maximal d'éléments passés à un appel de `flush`.
+    - flush_interval: délai maximal (en secondes) avant l'écriture d'un élément.
+    - name: nom du thread de fond (journaux, profils).
+    - overflow: politique de file pleine, parmi `OVERFLOW_POLICIES`.
+    - block_timeout: attente maximale d'une place avec `overflow='block'`.
+    - retries: nouvelles tentatives d'écriture d'un lot en échec (attente doublée à chaque fois).
+    """
+    def __init__(self, flush, max_items=100000, batch_size=1000, flush_interval=1.0, name='write-behind',
+                 overflow='drop_new', block_timeout=1.0, retries=0):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}, expected one of {OVERFLOW_POLICIES}")
+        self.flush = flush
+        self.max_items = max(1, int(max_items))
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.name = name
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.retries = retries
+        self.flush_seconds = Histogram(FLUSH_SECONDS_BUCKETS)
+        self.accepted = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._items = deque()
+        self._lock = Lock()
+        self._space = Condition(self._lock)
+        self._wakeup = Event()
+        self._closing = False
+        self._thread = None
+
+    @property
+    def pending(self):
+        return len(self._items)
+
+    def put(self, item):
+        """Met un élément en file ; retourne False s'il est rejeté (file pleine ou fermée)."""
+        with self._lock:
+            if self.overflow == 'block' and len(self._items) >= self.max_items and not self._closing:
+                self._wakeup.set()
+                deadline = monotonic() + self.block_timeout
+                while len(self._items) >= self.max_items and not self._closing and monotonic() < deadline:
+                    self._space.wait(deadline - monotonic())
+            if self._closing:
+                self.dropped += 1
+                return False
+            if len(self._items) >= self.max_items:
+                self.dropped += 1
+                if self.overflow != 'drop_oldest':
+                    return False
+                self._items.popleft()
+            self._items.append(item)
+            self.accepted += 1
+            pending = len(self._items)
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def close(self, timeout=None):
+        """Refuse les nouveaux éléments, écrit ceux en attente puis arrête le thread de fond."""
+        with self._lock:
+            self._closing = True
+            thread = self._thread
+            self._space.notify_all()
+        self._wakeup.set()
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning(f'{self.name}: {len(self._items)} items still pending after {timeout}s')
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._drain()
+            if self._closing:
+                self._drain()
+                return
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                batch = [self._items.popleft() for _ in range(min(self.batch_size, len(self._items)))]
+                self._space.notify_all()
+            if not batch:
+                return
+            started = perf_counter()
+            for attempt in range(self.retries + 1):
+                try:
+                    self.flush(batch)
+                    self.written += len(batch)
+                    break
+                except Exception as err:
+                    if attempt == self.retries:
+                        self.failed += len(batch)
+                        logger.error(f'{self.name}: failed to write {len(batch)} items: {err}')
+                    else:
+                        logger.warning(f'{self.name}: write of {len(batch)} items failed, retrying: {err}')
+                        sleep(0.1 * 2 ** attempt)
+            self.flush_seconds.observe(perf_counter() - started)
+
+    def stats(self):
+        return {
+            'pending': self.pending,
+            'max_items': self.max_items,
+            'overflow': self.overflow,
+            'accepted': self.accepted,
+            'dropped': self.dropped,
+            'written': self.written,
+            'failed': self.failed,
+            'flush_seconds': self.flush_seconds.snapshot(),
+        }
@@ -0,0 +1,235 @@
+import json
+import math
+
+from sqlalchemy import Float, Integer, and_, func, insert, literal, or_, select, union_all
+
+from api.database import SessionLocal
+from api.models import Client as ClientModel
+
+CLIENT_FIELDS = tuple(column.name for column in ClientModel.__table__.columns)
+
+# Colonnes indexées sur lesquelles GET /api/clients peut filtrer
+FILTERABLE_FIELDS = ('region', 'niveau_etude', 'situation_familiale')
+
+# Colonnes numériques agrégeables par GET /api/clients/stats
+NUMERIC_FIELDS = tuple(column.name for column in ClientModel.__table__.columns
+                       if isinstance(column.type, (Integer, Float)) and column.name != 'id')
+DEFAULT_STATS_FIELDS = ('montant_pret', 'revenu_estime_mois')
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+MAX_QUANTILES = 9
+# Tolérance d'arrondi du rang ceil(q·n) des quantiles (ex. 0.3 · 10 = 3.0000000000000004)
+QUANTILE_RANK_EPSILON = 1e-9
+
+def parse_fields(fields):
+    """
+    Convertit la projection demandée ('age,region') en liste de colonnes.
+    L'id est toujours inclus : il sert de curseur de pagination.
+
+    raises:
+    - ValueError si un champ est inconnu.
+    """
+    if not fields:
+        return list(CLIENT_FIELDS)
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in CLIENT_FIELDS]
+    if unknown:
+        raise ValueError(f"Champs inconnus : {', '.join(unknown)}")
+    return ['id'] + [name for name in dict.fromkeys(names) if name != 'id']
+
+def clients_query(fields, filters=None, cursor=None, limit=None):
+    """
+    Construit la requête des clients triés par id, à partir du curseur (id exclu).
+
+    args:
+    - fields: colonnes à sélectionner.
+    - filters: dictionnaire {colonne filtrable: valeur}, les valeurs None sont ignorées.
+    - cursor: dernier id de la page précédente.
+    - limit: nombre maximal de lignes.
+    """
+    query = select(*[ClientModel.__table__.c[name] for name in fields])
+    for name, value in (filters or {}).items():
+        if value is not None:
+            query = query.where(ClientModel.__table__.c[name] == value)
+    if cursor is not None:
+        query = query.where(ClientModel.id > cursor)
+    query = query.order_by(ClientModel.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def read_clients_page(db, fields, filters=None, cursor=None, limit=100):
+    """
+    Lit une page de clients par pagination sur l'id (keyset).
+
+    returns:
+    - (liste de dictionnaires, curseur de la page suivante ou None)
+    """
+    rows = db.execute(clients_query(fields, filters, cursor, limit + 1)).mappings().all()
+    clients = [dict(row) for row in rows[:limit]]
+    next_cursor = clients[-1]['id'] if len(rows) > limit else None
+    return clients, next_cursor
+
+def parse_stats_params(fields=None, quantiles=None):
+    """
+    Convertit les champs ('montant_pret,age') et quantiles ('0.5,0.9') demandés.
+
+    raises:
+    - ValueError si un champ n'est pas numérique ou si un quantile n'est pas dans ]0, 1].
+    """
+    names = [name.strip() for name in fields.split(',') if name.strip()] if fields else list(DEFAULT_STATS_FIELDS)
+    unknown = [name for name in names if name not in NUMERIC_FIELDS]
+    if unknown:
+        raise ValueError(f"Champs non agrégeables : {', '.join(unknown)} (champs possibles : {', '.join(NUMERIC_FIELDS)})")
+    if quantiles is None:
+        values = list(DEFAULT_QUANTILES)
+    else:
+        values = sorted({float(value) for value in quantiles.split(',') if value.strip()})
+    if any(not 0 < value <= 1 for value in values) or len(values) > MAX_QUANTILES:
+        raise ValueError(f"Quantiles attendus dans ]0, 1], {MAX_QUANTILES} au plus")
+    return list(dict.fromkeys(names)), values
+
+def aggregate_clients(db, group_by=None, fields=DEFAULT_STATS_FIELDS, quantiles=DEFAULT_QUANTILES, filters=None):
+    """
+    Effectif, moyenne, minimum, maximum et quantiles de colonnes numériques des
+    clients, par valeur de `group_by`, calculés par la base de données.
+
+    Les quantiles sont ceux du rang le plus proche (plus petite valeur dont la part
+    cumulée atteint q) : `percentile_disc` sous PostgreSQL ; sur les autres backends,
+    la valeur de rang ceil(q·n) de chaque groupe, obtenue pour tous les champs et
+    tous les quantiles par une seule requête (voir `_quantile_values`).
+
+    Coût : une requête d'agrégats, plus une requête de quantiles hors PostgreSQL.
+    Chacune parcourt toutes les lignes filtrées de chaque champ (O(n) par champ), en
+    ordre d'index (regroupement, colonne) ou (colonne) quand il existe, sinon après
+    un tri en O(n·log n) ; seules les lignes des rangs demandés sont renvoyées.
+
+    args:
+    - db: session synchrone.
+    - group_by: colonne de regroupement parmi `FILTERABLE_FIELDS`, ou None pour toute la table.
+    - fields: colonnes numériques agrégées.
+    - quantiles: quantiles demandés, dans ]0, 1].
+    - filters: dictionnaire {colonne filtrable: valeur}, les valeurs None sont ignorées.
+
+    returns:
+    - liste de groupes {group_by: valeur, 'count': n, champ: {'count', 'mean', 'min', 'max', 'quantiles'}}.
+    """
+    table = ClientModel.__table__
+    group = table.c[group_by] if group_by else None
+    conditions = [table.c[name] == value for name, value in (filters or {}).items() if value is not None]
+    postgres = db.get_bind().dialect.name == 'postgresql'
+
+    columns = [func.count().label('count')]
+    for name in fields:
+        column = table.c[name]
+        columns += [func.count(column).label(f'{name}__count'), func.avg(column).label(f'{name}__mean'),
+                    func.min(column).label(f'{name}__min'), func.max(column).label(f'{name}__max')]
+        if postgres:
+            columns += [func.percentile_disc(q).within_group(column).label(f'{name}__q{index}')
+                        for index, q in enumerate(quantiles)]
+    query = select(*([group.label('group')] if group is not None else []), *columns).where(*conditions)
+    if group is not None:
+        query = query.group_by(group).order_by(group)
+    rows = db.execute(query).mappings().all()
+    if not postgres and rows:
+        quantile_values = _quantile_values(db, table, fields, quantiles, group, conditions)
+
+    groups = []
+    for row in rows:
+        key = row['group'] if group is not None else None
+        result = {group_by: key} if group_by else {}
+        result['count'] = row['count']
+        for name in fields:
+            count = row[f'{name}__count']
+            if postgres:
+                values = [row[f'{name}__q{index}'] for index in range(len(quantiles))]
+            else:
+                # Rang ceil(q·n) calculé à partir de l'effectif du groupe
+                values = [quantile_values.get((name, key, _quantile_rank(q, count))) if count else None
+                          for q in quantiles]
+            result[name] = {
+                'count': count,
+                'mean': row[f'{name}__mean'],
+                'min': row[f'{name}__min'],
+                'max': row[f'{name}__max'],
+                'quantiles': dict(zip(map(str, quantiles), values)),
+            }
+        groups.append(result)
+    return groups
+
+def _quantile_rank(q, count):
+    """Rang (à partir de 1) du quantile `q` parmi `count` valeurs : ceil(q·n), à une erreur d'arrondi près."""
+    return max(1, math.ceil(q * count - QUANTILE_RANK_EPSILON))
+
+def _quantile_values(db, table, fields, quantiles, group, conditions):
+    """
+    Valeurs de rang ceil(q·n) de chaque champ, dans chaque groupe, en une requête :
+    par champ, ROW_NUMBER() et COUNT() OVER (PARTITION BY regroupement ORDER BY
+    colonne) numérotent les valeurs non nulles, et seules les lignes dont le numéro
+    est le rang d'un des quantiles sont conservées (UNION ALL des champs).
+
+    returns:
+    - dictionnaire {(champ, valeur du groupe, rang): valeur}.
+    """
+    parts = []
+    for name in fields:
+        column = table.c[name]
+        partition = {'partition_by': group} if group is not None else {}
+        numbered = (select((group if group is not None else literal(None)).label('group'), column.label('value'),
+                           func.row_number().over(order_by=column, **partition).label('rank'),
+                           func.count().over(**partition).label('n'))
+                    .where(column.isnot(None), *conditions)
+                    .subquery())
+        # rang = ceil(q·n - ε) : plus petit entier r tel que r >= q·n - ε
+        ranks = [and_(numbered.c.rank >= q * numbered.c.n - QUANTILE_RANK_EPSILON,
+                      numbered.c.rank < q * numbered.c.n - QUANTILE_RANK_EPSILON + 1) for q in quantiles]
+        parts.append(select(literal(name).label('field'), numbered.c.group, numbered.c.rank, numbered.c.value)
+                     # Rang 1 : quantiles si petits que ceil(q·n - ε) vaut 0
+                     .where(or_(numbered.c.rank == 1, *ranks)))
+    query = parts[0] if len(parts) == 1 else union_all(*parts)
+    return {(row.field, row.group, row.rank): row.value for row in db.execute(query)}
+
+def stream_clients_ndjson(fields, filters=None, cursor=None, limit=None, chunk_size=1000):
+    """
+    Générateur NDJSON (un client JSON par ligne) lisant la table par morceaux de
+    `chunk_size` lignes via un curseur côté serveur : la mémoire reste constante
+    quelle que soit la taille de la table.
+
+    La session est ouverte par le générateur lui-même, car celle de la dépendance
+    `get_db` est fermée avant l'envoi du corps de la réponse.
+    """
+    db = SessionLocal()
+    try:
+        query = clients_query(fields, filters, cursor, limit).execution_options(stream_results=True, yield_per=chunk_size)
+        for partition in db.execute(query).mappings().partitions():
+            yield ''.join(json.dumps(dict(row), ensure_ascii=False) + '\n' for row in partition)
+    finally:
+        db.close()
+
+def insert_clients(db, records, chunk_size=1000):
+    """
+    Insère des clients par lots de `chunk_size` lignes (INSERT multi-lignes ou
+    executemany selon le pilote) dans une seule transaction.
+
+    Le pilote synchrone est utilisé volontairement : avec aiosqlite, chaque ligne
+    renvoyée par RETURNING traverse le thread du pilote et l'import est ~8x plus lent.
+
+    args:
+    - db: session synchrone.
+    - records: liste de dictionnaires de champs validés.
+    - chunk_size: nombre de lignes par instruction.
+
+    returns:
+    - ids des clients créés, dans l'ordre de `records`.
+    """
+    # Insert au niveau de la table (Core) : évite la construction des objets ORM
+    table = ClientModel.__table__
+    statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    ids = []
+    try:
+        for start in range(0, len(records), chunk_size):
+            ids.extend(db.execute(statement, records[start:start + chunk_size]).scalars().all())
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return ids
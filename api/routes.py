@@ -1,82 +1,451 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+from time import perf_counter
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from loguru import logger
-import joblib
-import pandas as pd
-import tensorflow as tf
+from pydantic import ValidationError
 
-from api.modules.models import model_predict
-from api.database import get_db
+from api.database import engine, get_db, get_async_db
 from api.models import Client as ClientModel
 from api.schemas import Client as ClientSchema
-from api.config import DEFAULT_MODEL_PATH, DEFAULT_PREPROCESSOR_PATH
-from api.modules.preprocess import apply_manual_transformations
+from api.config import PREDICT_BATCH_MAX_SIZE, PREDICT_BATCH_MAX_WAIT_MS, PREDICT_BATCH_MAX_ROWS, PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_SECONDS, INFERENCE_QUEUE_SIZE, INFERENCE_TIMEOUT_SECONDS, INFERENCE_RETRY_AFTER_SECONDS, PREDICTION_LOG_ENABLED, PREDICTION_LOG_DIR, PREDICTION_LOG_SAMPLE_RATE, PREDICTION_LOG_ERROR_SAMPLE_RATE, PREDICTION_LOG_BUFFER_SIZE, PREDICTION_LOG_FLUSH_INTERVAL_SECONDS, PREDICTION_LOG_ROTATE_ROWS, PREDICTION_AUDIT_ENABLED, PREDICTION_AUDIT_BUFFER_SIZE, PREDICTION_AUDIT_BATCH_SIZE, PREDICTION_AUDIT_FLUSH_INTERVAL_SECONDS, PREDICTION_AUDIT_OVERFLOW, PREDICTION_AUDIT_BLOCK_TIMEOUT_SECONDS, PREDICTION_AUDIT_RETRIES, DRIFT_MONITOR_ENABLED, DRIFT_WINDOW_ROWS, DRIFT_SKETCH_SIZE, DRIFT_MIN_ROWS, DRIFT_BUFFER_SIZE, CLIENTS_PAGE_SIZE, CLIENTS_PAGE_MAX_SIZE, CLIENTS_STREAM_CHUNK_SIZE, CLIENTS_STATS_CACHE_SIZE, CLIENTS_STATS_CACHE_TTL_SECONDS, CLIENTS_BULK_CHUNK_SIZE, CLIENTS_BULK_MAX_ROWS
+from api.modules.batching import MicroBatcher
+from api.modules.cache import PredictionCache, QueryResultCache
+from api.modules.drift import DriftTracker
+from api.modules.executor import SaturatedError
+from api.modules.metrics import metrics, timed_stage
+from api.modules.prediction_audit import PredictionAuditStore
+from api.modules.prediction_log import PredictionLog
+from api.modules.registry import ModelUnavailableError
+from api.modules.validation import parse_clients_payload, validate_frame
+from api.queries import parse_fields, parse_stats_params, read_clients_page, stream_clients_ndjson, insert_clients, aggregate_clients
+from api.serving import registry, executor, readiness, predict_clients, predict_frame
 
 router = APIRouter(prefix='/api')
 
-preprocessor = joblib.load(DEFAULT_PREPROCESSOR_PATH)
-model = tf.keras.models.load_model(DEFAULT_MODEL_PATH)
+# Routes d'exploitation servies hors du préfixe /api (GET /metrics pour Prometheus)
+monitoring_router = APIRouter()
+
+batcher = MicroBatcher(predict_clients,
+                       max_batch_size=PREDICT_BATCH_MAX_SIZE,
+                       max_wait_ms=PREDICT_BATCH_MAX_WAIT_MS,
+                       max_concurrency=executor.max_workers,
+                       executor=executor,
+                       max_queue=INFERENCE_QUEUE_SIZE)
+
+prediction_cache = PredictionCache(max_size=PREDICTION_CACHE_SIZE, ttl_seconds=PREDICTION_CACHE_TTL_SECONDS)
+
+clients_stats_cache = QueryResultCache(max_size=CLIENTS_STATS_CACHE_SIZE, ttl_seconds=CLIENTS_STATS_CACHE_TTL_SECONDS)
+
+prediction_log = PredictionLog(PREDICTION_LOG_DIR, ClientSchema,
+                               sample_rate=PREDICTION_LOG_SAMPLE_RATE if PREDICTION_LOG_ENABLED else 0.0,
+                               error_sample_rate=PREDICTION_LOG_ERROR_SAMPLE_RATE if PREDICTION_LOG_ENABLED else 0.0,
+                               max_events=PREDICTION_LOG_BUFFER_SIZE,
+                               flush_interval=PREDICTION_LOG_FLUSH_INTERVAL_SECONDS,
+                               rotate_rows=PREDICTION_LOG_ROTATE_ROWS)
+
+prediction_audit = PredictionAuditStore(engine,
+                                        max_rows=PREDICTION_AUDIT_BUFFER_SIZE,
+                                        batch_size=PREDICTION_AUDIT_BATCH_SIZE,
+                                        flush_interval=PREDICTION_AUDIT_FLUSH_INTERVAL_SECONDS,
+                                        overflow=PREDICTION_AUDIT_OVERFLOW,
+                                        block_timeout=PREDICTION_AUDIT_BLOCK_TIMEOUT_SECONDS,
+                                        retries=PREDICTION_AUDIT_RETRIES,
+                                        enabled=PREDICTION_AUDIT_ENABLED)
+
+drift_tracker = DriftTracker(max_items=DRIFT_BUFFER_SIZE, window_rows=DRIFT_WINDOW_ROWS, sketch_size=DRIFT_SKETCH_SIZE,
+                             min_rows=DRIFT_MIN_ROWS, enabled=DRIFT_MONITOR_ENABLED)
+
+def serving_metrics():
+    """Statistiques du micro-batching, de l'executor et du cache, au format des collecteurs de `metrics`"""
+    batching, executor_stats, cache, log = batcher.metrics(), executor.stats(), prediction_cache.stats(), prediction_log.stats()
+    audit, stats_cache = prediction_audit.stats(), clients_stats_cache.stats()
+    return [
+        ('predict_batch_size', 'histogram', 'Taille des micro-lots de /api/predict', [({}, batching['batch_size'])]),
+        ('predict_queue_wait_seconds', 'histogram', "Attente d'un client avant le traitement de son micro-lot",
+         [({}, batching['queue_wait_seconds'])]),
+        ('predict_queue_depth', 'gauge', 'Clients en attente de micro-lot', [({}, batching['queue_depth'])]),
+        ('inference_executor_in_flight', 'gauge', "Tâches admises dans l'executor d'inférence", [({}, executor_stats['in_flight'])]),
+        ('inference_executor_capacity', 'gauge', "Capacité d'admission de l'executor d'inférence", [({}, executor_stats['capacity'])]),
+        ('inference_executor_tasks_total', 'counter', "Tâches de l'executor d'inférence par issue",
+         [({'outcome': outcome}, executor_stats[outcome]) for outcome in ('completed', 'rejected', 'timeouts')]),
+        ('prediction_cache_entries', 'gauge', 'Prédictions en cache', [({}, cache['size'])]),
+        ('prediction_cache_lookups_total', 'counter', 'Consultations du cache de prédictions',
+         [({'result': 'hit'}, cache['hits']), ({'result': 'miss'}, cache['misses'])]),
+        ('prediction_cache_evictions_total', 'counter', 'Prédictions retirées du cache',
+         [({'reason': 'capacity'}, cache['evictions']), ({'reason': 'ttl'}, cache['expirations'])]),
+        ('prediction_log_events_total', 'counter', 'Événements du journal des prédictions par issue',
+         [({'outcome': outcome}, log[outcome]) for outcome in ('written', 'dropped', 'failed', 'sampled_out')]),
+        ('prediction_log_pending', 'gauge', "Événements du journal des prédictions en attente d'écriture", [({}, log['pending'])]),
+        ('prediction_log_flush_seconds', 'histogram', "Durée d'écriture d'un lot du journal des prédictions",
+         [({}, log['flush_seconds'])]),
+        ('clients_stats_cache_lookups_total', 'counter', 'Consultations du cache des agrégats de clients',
+         [({'result': 'hit'}, stats_cache['hits']), ({'result': 'miss'}, stats_cache['misses'])]),
+        ('clients_stats_cache_invalidations_total', 'counter', 'Invalidations du cache des agrégats de clients (écritures)',
+         [({}, stats_cache['invalidations'])]),
+        ('prediction_audit_rows_total', 'counter', "Lignes d'audit des prédictions par issue",
+         [({'outcome': outcome}, audit[outcome]) for outcome in ('written', 'dropped', 'failed')]),
+        ('prediction_audit_pending', 'gauge', "Lignes d'audit en attente d'insertion", [({}, audit['pending'])]),
+        ('prediction_audit_flush_seconds', 'histogram', "Durée d'insertion d'un lot de lignes d'audit",
+         [({}, audit['flush_seconds'])]),
+    ]
+
+metrics.add_collector(serving_metrics)
+
+def drift_metrics():
+    """Scores de dérive de la fenêtre courante, par version de modèle et par colonne"""
+    scores_by_name = {name: [] for name in ('mean_shift', 'std_ratio', 'psi', 'ks', 'unseen_rate')}
+    rows, significant = [], []
+    for report in drift_tracker.report().values():
+        model = {'variant': report['variant'], 'version': report['version']}
+        rows.append((model, report['current']['rows']))
+        significant.append((model, int(report['current']['status'] == 'significant')))
+        for feature, scores in {**report['current']['numeric'], **report['current']['categorical']}.items():
+            for name, samples in scores_by_name.items():
+                if scores.get(name) is not None:
+                    samples.append(({**model, 'feature': feature}, scores[name]))
+    return [
+        ('drift_window_rows', 'gauge', 'Clients de la fenêtre de suivi de dérive courante', rows),
+        ('drift_significant', 'gauge', 'Dérive significative sur au moins une colonne de la fenêtre courante (0 ou 1)', significant),
+        ('drift_mean_shift', 'gauge', 'Écart de moyenne au preprocessor, en écarts-types', scores_by_name['mean_shift']),
+        ('drift_std_ratio', 'gauge', "Rapport de l'écart-type à celui du preprocessor", scores_by_name['std_ratio']),
+        ('drift_psi', 'gauge', 'PSI de la fenêtre courante par rapport à la précédente', scores_by_name['psi']),
+        ('drift_ks', 'gauge', 'Statistique de Kolmogorov-Smirnov de la fenêtre courante par rapport à la précédente', scores_by_name['ks']),
+        ('drift_unseen_category_rate', 'gauge', "Part des valeurs catégorielles inconnues de l'encodeur", scores_by_name['unseen_rate']),
+    ]
+
+metrics.add_collector(drift_metrics)
+
+def saturated_error(err):
+    """Réponse 503 invitant le client à réessayer quand l'inférence est saturée"""
+    logger.warning(f'Inference rejected: {err}')
+    return HTTPException(status_code=503,
+                         detail=f"Service saturé, réessayez plus tard: {err}",
+                         headers={'Retry-After': str(INFERENCE_RETRY_AFTER_SECONDS)})
+
+async def audit_predictions(record, *args, rows=1, **kwargs):
+    """
+    Enregistre des prédictions dans la table d'audit (`prediction_audit.record` ou
+    `record_many`), dans un thread seulement si la file pleine peut faire attendre.
+    """
+    if prediction_audit.would_block(rows):
+        await run_in_threadpool(record, *args, **kwargs)
+    else:
+        record(*args, **kwargs)
+
+def timeout_error():
+    return HTTPException(status_code=504, detail=f"Prediction timed out after {INFERENCE_TIMEOUT_SECONDS}s")
+
+async def get_model_entry(variant: Optional[str] = None):
+    """Résout la variante de modèle demandée (la variante active par défaut), une fois le warm-up terminé"""
+    if not readiness.warmed_up:
+        raise HTTPException(status_code=503,
+                            detail=f"Service en cours de démarrage ({readiness.state}), réessayez plus tard",
+                            headers={'Retry-After': str(INFERENCE_RETRY_AFTER_SECONDS)})
+    try:
+        return await run_in_threadpool(registry.get, variant)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model variant: {variant}")
+    except ModelUnavailableError as err:
+        raise HTTPException(status_code=503, detail=str(err))
 
 @router.get('/')
 async def hello_world():
-    return {'message': 'Hello, world!'}
+    return {'message': 'Hello, world!', 'live': True, 'ready': readiness.ready}
+
+@router.get('/health/live')
+async def liveness():
+    """Vivacité : le processus répond, même pendant le warm-up"""
+    return {'status': 'live'}
+
+@router.get('/health/ready')
+async def readiness_probe():
+    """Préparation : 200 une fois le warm-up terminé, 503 avant (ou s'il a échoué, ou si la variante active est indisponible)"""
+    if not readiness.ready:
+        return JSONResponse(status_code=503, content=readiness.describe())
+    return readiness.describe()
 
 @router.get('/clients')
-async def read_clients(db: Session = Depends(get_db)):
-    """Récupère tous les clients de la base de données"""
+def read_clients(request: Request,
+                 limit: Optional[int] = Query(None, ge=1, le=CLIENTS_PAGE_MAX_SIZE),
+                 cursor: Optional[int] = None,
+                 fields: Optional[str] = None,
+                 region: Optional[str] = None,
+                 niveau_etude: Optional[str] = None,
+                 situation_familiale: Optional[str] = None,
+                 format: Optional[Literal['json', 'ndjson']] = None,
+                 db: Session = Depends(get_db)):
+    """
+    Récupère les clients de la base de données, triés par id.
+
+    - `limit` / `cursor` : pagination par id, `cursor` étant le `next_cursor` de la page précédente.
+    - `fields` : liste de champs séparés par des virgules (l'id est toujours renvoyé).
+    - `region`, `niveau_etude`, `situation_familiale` : filtres sur colonnes indexées.
+    - `format=ndjson` (ou `Accept: application/x-ndjson`) : flux d'un client JSON par ligne,
+      sans limite par défaut, lu par morceaux avec un curseur côté serveur.
+    """
+    try:
+        columns = parse_fields(fields)
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=str(err))
+    filters = {'region': region, 'niveau_etude': niveau_etude, 'situation_familiale': situation_familiale}
+
+    if format == 'ndjson' or (format is None and 'application/x-ndjson' in request.headers.get('accept', '')):
+        return StreamingResponse(stream_clients_ndjson(columns, filters, cursor, limit, chunk_size=CLIENTS_STREAM_CHUNK_SIZE),
+                                 media_type='application/x-ndjson')
     try:
-        clients = db.query(ClientModel).all()
-        return {'clients': clients, 'count': len(clients)}
+        clients, next_cursor = read_clients_page(db, columns, filters, cursor, limit or CLIENTS_PAGE_SIZE)
+        return {'clients': clients, 'count': len(clients), 'next_cursor': next_cursor}
     except Exception as err:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des clients: {str(err)}")
 
+@router.get('/clients/stats')
+def read_clients_stats(group_by: Optional[Literal['region', 'niveau_etude', 'situation_familiale']] = None,
+                       fields: Optional[str] = None,
+                       quantiles: Optional[str] = None,
+                       region: Optional[str] = None,
+                       niveau_etude: Optional[str] = None,
+                       situation_familiale: Optional[str] = None,
+                       cache: bool = True,
+                       db: Session = Depends(get_db)):
+    """
+    Agrégats des clients calculés par la base de données.
+
+    - `group_by` : `region`, `niveau_etude` ou `situation_familiale` (toute la table par défaut).
+    - `fields` : colonnes numériques séparées par des virgules (`montant_pret,revenu_estime_mois` par défaut).
+    - `quantiles` : quantiles séparés par des virgules, dans ]0, 1] (`0.25,0.5,0.75` par défaut).
+    - `region`, `niveau_etude`, `situation_familiale` : filtres.
+    - `cache=false` : ignorer le cache (vidé à chaque écriture de clients).
+    """
+    try:
+        columns, quantile_values = parse_stats_params(fields, quantiles)
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=str(err))
+    filters = {'region': region, 'niveau_etude': niveau_etude, 'situation_familiale': situation_familiale}
+
+    cache_key = clients_stats_cache.key(group_by, columns, quantile_values, filters)
+    groups = clients_stats_cache.get(cache_key) if cache else None
+    cached = groups is not None
+    if not cached:
+        try:
+            groups = aggregate_clients(db, group_by, columns, quantile_values, filters)
+        except Exception as err:
+            raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des agrégats: {str(err)}")
+        clients_stats_cache.put(cache_key, groups)
+    return {'group_by': group_by, 'fields': columns, 'quantiles': quantile_values, 'groups': groups, 'cached': cached}
+
+@router.post('/clients/bulk')
+async def create_clients_bulk(request: Request, db: Session = Depends(get_db)):
+    """
+    Crée des clients en masse à partir d'une liste JSON, d'un CSV ou d'un flux Arrow IPC.
+    Les lignes valides sont insérées par lots dans une seule transaction ; les ids sont
+    retournés dans l'ordre d'entrée et les lignes invalides obtiennent `null` et une erreur détaillée.
+    """
+    try:
+        df = await run_in_threadpool(parse_clients_payload, await request.body(), request.headers.get('content-type'))
+    except Exception as err:
+        raise HTTPException(status_code=400, detail=f"Payload illisible: {err}")
+    if len(df) > CLIENTS_BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {len(df)} rows (max {CLIENTS_BULK_MAX_ROWS})")
+
+    valid_clients, errors = await run_in_threadpool(validate_frame, df, ClientSchema)
+    ids = [None] * len(df)
+    if len(valid_clients):
+        try:
+            created_ids = await run_in_threadpool(insert_clients, db, valid_clients.to_dict('records'), CLIENTS_BULK_CHUNK_SIZE)
+        except Exception as err:
+            logger.error(f'Bulk insert of {len(valid_clients)} clients failed: {err}')
+            raise HTTPException(status_code=500, detail=f"Erreur lors de l'import des clients: {err}")
+        clients_stats_cache.invalidate()
+        for index, client_id in zip(valid_clients.index, created_ids):
+            ids[index] = client_id
+
+    logger.info(f'bulk insert: {len(valid_clients)} clients créés, {len(errors)} lignes invalides')
+    return {'ids': ids, 'errors': errors, 'count': len(df), 'created': len(valid_clients)}
+
 @router.get('/clients/{client_id}')
-async def read_client(client_id: int, db: Session = Depends(get_db)):
+async def read_client(client_id: int, db: AsyncSession = Depends(get_async_db)):
     """Récupère un client par son id dans la base de données"""
     try:
-        client = db.query(ClientModel).filter(ClientModel.id == client_id).first()
+        client = await db.get(ClientModel, client_id)
         if not client:
             logger.warning(f'Client with id {client_id} not found.')
             raise HTTPException(status_code=404, detail=f"Client with id {client_id} not found")
         return {'clients': client}
+    except HTTPException:
+        raise
     except Exception as err:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération de client {str(client_id)}: {str(err)}")
 
 @router.post('/clients')
 async def create_client(client_data: ClientSchema
-, db: Session = Depends(get_db)):
+, db: AsyncSession = Depends(get_async_db)):
     """Crée un client en base de données"""
     db_client = ClientModel(**client_data.model_dump())
     db.add(db_client)
-    db.commit()
-    db.refresh(db_client)
+    await db.commit()
+    clients_stats_cache.invalidate()
     logger.info(f"Created item: {db_client.id}")
     return db_client
 
 @router.delete("/clients/{client_id}")
-async def delete_client(client_id: int, db: Session = Depends(get_db)):
+async def delete_client(client_id: int, db: AsyncSession = Depends(get_async_db)):
     """Supprime un client existant dans la base de données"""
-    client = db.query(ClientModel).filter(ClientModel.id == client_id).first()
+    client = await db.get(ClientModel, client_id)
     if client is None:
         logger.warning(f"Client with id {client_id} not found for deletion.")
         raise HTTPException(status_code=404, detail="Client not found")
-    db.delete(client)
-    db.commit()
+    await db.delete(client)
+    await db.commit()
+    clients_stats_cache.invalidate()
     logger.info(f"Deleted client with id: {client_id}")
     return {"message": f"Client with id {client_id} deleted"}
 
-@router.post("/predict")
-async def predict(client_data: ClientSchema, db: Session = Depends(get_db)):
+async def record_prediction_error(entry, client, started, error):
+    """Journalise et audite une prédiction de /api/predict en erreur"""
+    latency = perf_counter() - started
+    prediction_log.record(entry.variant, entry.version, client, latency=latency, error=error)
+    await audit_predictions(prediction_audit.record, 'predict', entry.variant, entry.version, client, latency=latency, error=error)
+
+async def validated_client(request: Request):
+    """Valide le corps de /api/predict en chronométrant l'étape 'validation' (même réponse 422 que FastAPI)"""
+    try:
+        body = await request.json()
+    except json.JSONDecodeError as err:
+        raise RequestValidationError([{'type': 'json_invalid', 'loc': ('body', err.pos), 'msg': 'JSON decode error',
+                                       'input': {}, 'ctx': {'error': err.msg}}])
+    with timed_stage('validation'):
+        try:
+            return ClientSchema.model_validate(body)
+        except ValidationError as err:
+            raise RequestValidationError([{**error, 'loc': ('body', *error['loc'])}
+                                          for error in err.errors(include_url=False)])
+
+@router.post("/predict", openapi_extra={'requestBody': {'required': True, 'content': {
+    'application/json': {'schema': ClientSchema.model_json_schema(ref_template='#/components/schemas/{model}')}}}})
+async def predict(entry=Depends(get_model_entry), client_data: ClientSchema = Depends(validated_client)):
     """Prédit le risque de crédit pour un client donné"""
+    started = perf_counter()
+    client = client_data.model_dump()
     try:
-        df = pd.DataFrame([client_data.model_dump()])
-        manually_processed_client = apply_manual_transformations(df)
-        processed_client = preprocessor.transform(manually_processed_client)
-        prediction_array = model_predict(model, processed_client)
-        prediction_value = round(prediction_array[0],2)
-        logger.info(f'prediction: {prediction_value} avec le client suivant : {client_data}')
-        return {'prediction': str(prediction_value)}
+        cache_key = prediction_cache.key(client, entry.version)
+        prediction = prediction_cache.get(cache_key)
+        cached = prediction is not None
+        if not cached:
+            prediction = await asyncio.wait_for(batcher.submit((entry.variant, entry.version, client)), INFERENCE_TIMEOUT_SECONDS)
+            prediction_cache.put(cache_key, prediction)
+        prediction_value = round(prediction,2)
+        latency = perf_counter() - started
+        with timed_stage('logging'):
+            prediction_log.record(entry.variant, entry.version, client, prediction=float(prediction), cached=cached,
+                                  latency=latency)
+            await audit_predictions(prediction_audit.record, 'predict', entry.variant, entry.version, client,
+                                    prediction=float(prediction), cached=cached, latency=latency)
+            drift_tracker.observe(entry, client)
+        return {'prediction': str(prediction_value), 'variant': entry.variant}
+    except SaturatedError as err:
+        await record_prediction_error(entry, client, started, 'saturated')
+        raise saturated_error(err)
+    except asyncio.TimeoutError:
+        await record_prediction_error(entry, client, started, 'timeout')
+        raise timeout_error()
     except Exception as e:
-        logger.error(f'Prediction processing error for profile {client_data.model_dump()}: {e}')
+        logger.error(f'Prediction processing error with model variant {entry.variant}: {e}')
+        await record_prediction_error(entry, client, started, str(e))
         detail_message = f"Something went wrong during prediction: {e}"
         raise HTTPException(status_code=500, detail=detail_message)
+
+
+@router.post("/predict/batch")
+async def predict_batch(request: Request, entry=Depends(get_model_entry)):
+    """
+    Prédit un lot de clients envoyé en JSON (liste de clients), CSV ou Arrow IPC.
+    Les prédictions sont retournées dans l'ordre d'entrée ; les lignes invalides
+    obtiennent `null` et une erreur détaillée sans faire échouer le reste du lot.
+    """
+    try:
+        df = await run_in_threadpool(parse_clients_payload, await request.body(), request.headers.get('content-type'))
+    except Exception as err:
+        raise HTTPException(status_code=400, detail=f"Payload illisible: {err}")
+    if len(df) > PREDICT_BATCH_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {len(df)} rows (max {PREDICT_BATCH_MAX_ROWS})")
+
+    started = perf_counter()
+    with timed_stage('validation'):
+        valid_clients, errors = await run_in_threadpool(validate_frame, df, ClientSchema)
+    predictions = [None] * len(df)
+    if len(valid_clients):
+        try:
+            results = await executor.run(predict_frame, entry.variant, entry.version, valid_clients,
+                                         timeout=INFERENCE_TIMEOUT_SECONDS)
+        except SaturatedError as err:
+            raise saturated_error(err)
+        except asyncio.TimeoutError:
+            raise timeout_error()
+        except Exception as e:
+            logger.error(f'Batch prediction processing error for {len(valid_clients)} clients: {e}')
+            raise HTTPException(status_code=500, detail=f"Something went wrong during prediction: {e}")
+        failed = {int(index): value for index, value in zip(valid_clients.index, results) if isinstance(value, Exception)}
+        if failed:
+            logger.warning(f'Batch prediction: {len(failed)} of {len(valid_clients)} clients failed')
+            errors = sorted(errors + [{'index': index, 'errors': [{'field': None, 'message': f'Erreur de prédiction: {err}'}]}
+                                      for index, err in failed.items()], key=lambda error: error['index'])
+            predicted = ~valid_clients.index.isin(list(failed))
+            valid_clients = valid_clients[predicted]
+            results = [value for value, keep in zip(results, predicted) if keep]
+        for index, value in zip(valid_clients.index, results):
+            predictions[index] = round(float(value), 2)
+        if len(valid_clients):
+            drift_tracker.observe(entry, valid_clients)
+        if prediction_audit.enabled and len(valid_clients):
+            await audit_predictions(prediction_audit.record_many, 'predict_batch', entry.variant, entry.version,
+                                    valid_clients.to_dict('records'), [float(value) for value in results],
+                                    latency=perf_counter() - started, rows=len(valid_clients))
+
+    logger.info(f'batch prediction: {len(valid_clients)} clients prédits, {len(errors)} lignes invalides')
+    return {'predictions': predictions, 'errors': errors, 'count': len(df), 'variant': entry.variant}
+
+@router.get("/predict/metrics")
+async def predict_metrics():
+    """Expose les métriques du micro-batching (taille des lots, attente en file), de l'executor et du cache"""
+    return {**batcher.metrics(), 'executor': executor.stats(), 'cache': prediction_cache.stats()}
+
+@monitoring_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    """Expose toutes les métriques (étapes de prédiction, routes, requêtes SQL, micro-batching, executor, cache) au format texte de Prometheus"""
+    return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+@router.get("/drift")
+async def drift_report(variant: Optional[str] = None):
+    """
+    Dérive des clients prédits par rapport aux statistiques du preprocessor, par
+    version de modèle : fenêtre courante et dernière fenêtre complète (PSI et KS par
+    colonne numérique, fréquences et valeurs inconnues par colonne catégorielle).
+    """
+    return {'enabled': drift_tracker.enabled, 'models': await run_in_threadpool(drift_tracker.report, variant),
+            'queue': {key: value for key, value in drift_tracker.stats().items() if key != 'flush_seconds'}}
+
+@router.get("/admin/models")
+async def list_models():
+    """Liste les variantes de modèle connues et la variante active"""
+    return {'active': registry.active_variant, 'variants': registry.variants()}
+
+@router.post("/admin/models/{variant}/activate")
+async def activate_model(variant: str):
+    """Charge, réchauffe puis active une variante sans interrompre les requêtes en cours"""
+    try:
+        entry = await run_in_threadpool(registry.activate, variant)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model variant: {variant}")
+    except ModelUnavailableError as err:
+        raise HTTPException(status_code=409, detail=str(err))
+    if readiness.state == 'degraded':
+        readiness.mark_ready()
+    prediction_cache.clear()
+    return {'active': entry.describe()}
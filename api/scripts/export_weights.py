@@ -0,0 +1,71 @@
+import sys
+from glob import glob
+from os.path import basename, exists, join
+
+import joblib
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from api.modules.models import model_predict
+from api.modules.numpy_backend import export_keras_model, load_numpy_model, numpy_weights_path
+from api.modules.preprocess import TARGET_COL, apply_manual_transformations
+from api.modules.registry import LOOSE_ONLY_FIELDS, MODEL_SUFFIX, PREPROCESSOR_SUFFIX
+
+PARITY_DATA_PATH = join('.', 'data', 'raw_new_data.csv')
+PARITY_SAMPLES = 1000
+PARITY_RTOL = 1e-4
+PARITY_ATOL = 1e-2
+
+def load_parity_inputs(preprocessor, ethically_strict, data_path=PARITY_DATA_PATH, n_samples=PARITY_SAMPLES):
+    """
+    Prépare de vrais clients (valeurs manquantes comprises) avec le preprocessor du modèle,
+    comme à l'inférence (voir `ModelEntry.predict_frame`) : champs absents de l'API mis à
+    manquant pour le preprocessing "ethically loose", transformations manuelles puis
+    `preprocessor.transform`.
+    """
+    df = pd.read_csv(data_path, nrows=n_samples).drop(columns=[TARGET_COL])
+    if not ethically_strict:
+        df = df.assign(**{col: None for col in LOOSE_ONLY_FIELDS})
+    X = preprocessor.transform(apply_manual_transformations(df, ethically_strict=ethically_strict))
+    return np.asarray(X, dtype=np.float32)
+
+def check_parity(keras_model, numpy_model, X):
+    """
+    Compare les prédictions Keras et NumPy sur des clients préprocessés.
+
+    returns:
+    - écart absolu maximal, et booléen indiquant si la tolérance est respectée.
+    """
+    expected = model_predict(keras_model, X)
+    actual = model_predict(numpy_model, X)
+    max_error = float(np.max(np.abs(expected - actual)))
+    return max_error, bool(np.allclose(actual, expected, rtol=PARITY_RTOL, atol=PARITY_ATOL))
+
+def export_all(models_dir=join('.', 'models')):
+    """Exporte et vérifie chaque couple `<variante>_model.keras` / `<variante>_preprocessor.pkl` de `models_dir`."""
+    failures = 0
+    for model_path in sorted(glob(join(models_dir, '*' + MODEL_SUFFIX))):
+        preprocessor_path = model_path[:-len(MODEL_SUFFIX)] + PREPROCESSOR_SUFFIX
+        if not exists(preprocessor_path):
+            print(f"⚠️ {model_path} ignoré : pas de preprocessor {preprocessor_path}")
+            continue
+        keras_model = tf.keras.models.load_model(model_path)
+        X = load_parity_inputs(joblib.load(preprocessor_path), ethically_strict='loose' not in basename(model_path))
+        weights_path = export_keras_model(keras_model, numpy_weights_path(model_path))
+        numpy_model = load_numpy_model(weights_path)
+        if X.shape[1] != numpy_model.input_dim:
+            failures += 1
+            print(f"❌ {model_path} : {numpy_model.input_dim} entrées attendues, le preprocessor en produit {X.shape[1]}")
+            continue
+        max_error, ok = check_parity(keras_model, numpy_model, X)
+        if ok:
+            print(f"✅ {model_path} -> {weights_path} (écart max : {max_error:.2e})")
+        else:
+            failures += 1
+            print(f"❌ {model_path} : écart max {max_error:.2e} hors tolérance")
+    return failures
+
+if __name__ == "__main__":
+    print(f"{' Export des poids NumPy ':=^60}")
+    sys.exit(1 if export_all() else 0)
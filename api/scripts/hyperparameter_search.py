@@ -0,0 +1,99 @@
+"""
+Recherche d'hyperparamètres (couches, taux d'apprentissage, taille des lots, époques)
+par divisions successives et arrêt anticipé, essais en parallèle sur les features en
+cache. La meilleure configuration est écrite dans un fichier JSON utilisable par
+`api.scripts.train_variants --config` (et donc `training.py --config`) :
+
+    python -m api.scripts.hyperparameter_search --mode strict --window first_10000
+    python -m api.scripts.hyperparameter_search --space space.json --trials 12 --max-epochs 60
+    python api/scripts/training.py --config models/best_config.json
+"""
+import argparse
+import json
+import sys
+from os.path import join
+from tempfile import mkdtemp
+
+from api.modules.feature_store import FEATURE_STORE_DIR, FeatureStore, client_features
+from api.modules.orchestrator import MODES, parse_window
+from api.modules.search import DEFAULT_SPACE, best_config, sample_configs, successive_halving
+
+EXPERIMENT = "Hyperparameter search for the loan prediction model"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Recherche d'hyperparamètres du modèle de prédiction")
+    parser.add_argument('--mode', choices=MODES, default='strict', help="Preprocessing utilisé")
+    parser.add_argument('--window', default='first_10000', help="Fenêtre de données : all, first_N ou last_N")
+    parser.add_argument('--space', help="Espace de recherche (JSON : units, learning_rate, batch_size, epochs)")
+    parser.add_argument('--trials', type=int, help="Nombre de configurations tirées dans la grille (toutes par défaut)")
+    parser.add_argument('--min-epochs', type=int, default=3, help="Budget du premier palier")
+    parser.add_argument('--max-epochs', type=int, help="Budget du dernier palier (par défaut, `epochs` de l'espace)")
+    parser.add_argument('--eta', type=int, default=3, help="Seul 1/eta des essais passe au palier suivant")
+    parser.add_argument('--patience', type=int, default=3, help="Patience de l'arrêt anticipé (époques)")
+    parser.add_argument('--validation-fraction', type=float, default=0.2)
+    parser.add_argument('--workers', type=int, help="Nombre de processus (par défaut, le nombre de cœurs)")
+    parser.add_argument('--threads-per-worker', type=int, help="Threads de calcul par processus (par défaut, cœurs / workers)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--feature-store', default=FEATURE_STORE_DIR, help="Dossier du cache de features")
+    parser.add_argument('--output', default=join('.', 'models', 'best_config.json'), help="Fichier de la meilleure configuration")
+    parser.add_argument('--experiment', default=EXPERIMENT, help="Nom de l'expérience MLflow")
+    parser.add_argument('--no-mlflow', action='store_true', help="Ne pas journaliser les essais dans MLflow")
+    args = parser.parse_args(argv)
+    try:
+        parse_window(args.window)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.eta < 2:
+        parser.error("--eta doit être au moins 2")
+    return args
+
+def log_trials(trials, experiment, mode, window):
+    """Journalise chaque essai dans son propre run MLflow (courbe de val_loss par époque)."""
+    import mlflow
+
+    mlflow.set_experiment(experiment)
+    for trial in trials:
+        with mlflow.start_run(run_name=f"trial_{trial['id']}"):
+            mlflow.log_params({**trial['config'], 'mode': mode, 'window': window})
+            for epoch, loss in enumerate(trial['val_losses'], start=1):
+                mlflow.log_metric("val_loss", loss, step=epoch)
+            mlflow.log_metric("best_val_loss", trial['best_val_loss'])
+            mlflow.log_metric("epochs", trial['epochs_done'])
+            mlflow.set_tag("Search Info", f"palier {trial['rung']}{', arrêt anticipé' if trial['stopped'] else ''}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    from api.database import engine
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space, encoding='utf-8') as space_file:
+            space = {**DEFAULT_SPACE, **json.load(space_file)}
+    configs = sample_configs(space, args.trials, seed=args.seed)
+    max_epochs = args.max_epochs or space['epochs']
+
+    first_n, last_n = parse_window(args.window)
+    features = client_features(engine, ethically_strict=args.mode == 'strict', first_n=first_n, last_n=last_n,
+                               store=FeatureStore(args.feature_store))
+    print(f"🧪 {len(configs)} configurations, paliers de {args.min_epochs} à {max_epochs} époques (eta={args.eta})")
+
+    options = {'patience': args.patience, 'validation_fraction': args.validation_fraction, 'seed': args.seed}
+    trials = successive_halving(configs, features.path, options, work_dir=mkdtemp(prefix='search-'),
+                                min_epochs=args.min_epochs, max_epochs=max_epochs, eta=args.eta,
+                                workers=args.workers, threads_per_worker=args.threads_per_worker)
+    if not args.no_mlflow:
+        log_trials(trials, args.experiment, args.mode, args.window)
+
+    print(f"{'essai':>6} | {'palier':>6} | {'époques':>7} | {'val_loss':>12} | configuration")
+    for trial in trials:
+        print(f"{trial['id']:>6} | {trial['rung']:>6} | {trial['epochs_done']:>7} | {trial['best_val_loss']:>12.1f} | {trial['config']}")
+
+    config = best_config(trials[0], args.mode, args.window)
+    with open(args.output, 'w', encoding='utf-8') as output:
+        json.dump(config, output, indent=2)
+    print(f"✅ Meilleure configuration (essai {config['trial']}) écrite dans {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    print(" Recherche d'hyperparamètres ".center(60, '='))
+    sys.exit(main())
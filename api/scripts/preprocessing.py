@@ -1,18 +1,29 @@
+import argparse
 import pandas as pd
 from api.database import engine
 import joblib
 from os.path import join as join
 
 from api.modules.preprocess import preprocessing, ethically_loose_preprocessing
+from api.modules.incremental_preprocess import fit_preprocessor_incremental, iter_client_chunks
 
-df = pd.read_sql_table(
-    table_name='clients',
-    con=engine,
-    parse_dates=['date_creation_compte'],
-)
+parser = argparse.ArgumentParser(description="Entraîne les preprocessors strict et lâche sur la table clients")
+parser.add_argument('--chunk-size', type=int, default=50000, help="Taille des morceaux lus en base")
+parser.add_argument('--in-memory', action='store_true', help="Charge toute la table en mémoire (ancien mode)")
+args = parser.parse_args()
 
-_, _, preprocessor = preprocessing(df)
-_, _, ethically_loose_preprocessor = ethically_loose_preprocessing(df)
+if args.in_memory:
+    df = pd.read_sql_table(
+        table_name='clients',
+        con=engine,
+        parse_dates=['date_creation_compte'],
+    )
+
+    _, _, preprocessor = preprocessing(df)
+    _, _, ethically_loose_preprocessor = ethically_loose_preprocessing(df)
+else:
+    preprocessor = fit_preprocessor_incremental(iter_client_chunks(engine, args.chunk_size), ethically_strict=True)
+    ethically_loose_preprocessor = fit_preprocessor_incremental(iter_client_chunks(engine, args.chunk_size), ethically_strict=False)
 
 joblib.dump(preprocessor, join(".", "models", "ethically_strict_preprocessor.pkl"))
-joblib.dump(ethically_loose_preprocessor, join(".", "models", "ethically_loose_preprocessor.pkl"))
\ No newline at end of file
+joblib.dump(ethically_loose_preprocessor, join(".", "models", "ethically_loose_preprocessor.pkl"))
@@ -0,0 +1,191 @@
+"""
+Exporte des versions en précision réduite (float16, int8) des modèles de `models/`
+à partir de leurs poids NumPy (`api.scripts.export_weights`), évaluées sur un
+échantillon de la table `clients`.
+
+Pour chaque modèle et chaque précision, le script affiche la latence et le débit
+de `model_predict`, la mémoire occupée par les poids ainsi que l'écart de MSE, MAE
+et R² (`evaluate_performance`) par rapport au modèle float32. Une version dont la
+précision se dégrade au-delà des seuils, ou qui n'est ni plus rapide ni plus petite
+en mémoire (plus rapide seulement avec `--require-speedup`), n'est pas écrite (et
+une ancienne version est supprimée) : l'API ne peut donc pas la servir avec
+`INFERENCE_PRECISION`.
+
+    python -m api.scripts.quantize_models
+    python -m api.scripts.quantize_models --precision int8 --max-r2-drop 0.005 --report models/quantization.json
+    python -m api.scripts.quantize_models --require-speedup
+"""
+import argparse
+import json
+import os
+import sys
+from glob import glob
+from os.path import exists, getsize, join
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+
+from api.benchmarks.run import measure, median_seconds
+from api.modules.evaluate import evaluate_performance
+from api.modules.models import model_predict
+from api.modules.numpy_backend import load_numpy_model
+from api.modules.preprocess import TARGET_COL, apply_manual_transformations
+from api.modules.quantization import export_quantized_model, quantize_model, quantized_weights_path, weights_digest
+
+EVALUATION_ROWS = 10000
+# Dégradations maximales acceptées : baisse absolue du R², hausse relative de la MAE
+MAX_R2_DROP = 0.01
+MAX_MAE_INCREASE = 0.02
+LATENCY_BATCH_SIZES = (1, 1024)
+
+def sample_clients(engine, n_rows, seed=42):
+    """
+    Échantillon systématique de `n_rows` clients (un id sur k, sur toute la table),
+    reproductible d'un lancement à l'autre, dans un ordre mélangé par `seed`.
+    """
+    from api.models import Client as ClientModel
+
+    table = ClientModel.__table__
+    with engine.connect() as connection:
+        total = connection.execute(select(func.count()).select_from(table)).scalar_one()
+        step = max(1, total // n_rows)
+        df = pd.read_sql(select(table).where(table.c.id % step == 0).order_by(table.c.id).limit(n_rows), connection)
+    df = df.dropna(subset=[TARGET_COL])
+    return df.iloc[np.random.default_rng(seed).permutation(len(df))].reset_index(drop=True)
+
+def preprocessed(df, preprocessor, ethically_strict):
+    """Matrice d'entrée du modèle et cible d'un échantillon de clients."""
+    X = preprocessor.transform(apply_manual_transformations(df.drop(columns=[TARGET_COL]), ethically_strict))
+    return np.asarray(X, dtype=np.float32), df[TARGET_COL].to_numpy()
+
+def latencies(model, X):
+    """Meilleur temps par appel de `model_predict` pour chaque taille de lot."""
+    results = {}
+    for batch_size in LATENCY_BATCH_SIZES:
+        batch = np.resize(X, (batch_size, X.shape[1]))
+        results[batch_size] = measure(lambda: model_predict(model, batch), rows=batch_size, repeat=5)
+    return results
+
+def quantize_variant(weights_path, preprocessor_path, sample, precisions, args):
+    """
+    Quantifie un modèle dans chaque précision, compare ses performances, sa latence
+    et sa mémoire au modèle float32 et n'écrit que les versions acceptées.
+
+    returns:
+    - liste de rapports, un par précision.
+    """
+    import joblib
+
+    ethically_strict = 'loose' not in weights_path
+    preprocessor = joblib.load(preprocessor_path)
+    X, y = preprocessed(sample, preprocessor, ethically_strict)
+
+    model = load_numpy_model(weights_path)
+    reference = evaluate_performance(y, model_predict(model, X))
+    reference_latency = latencies(model, X)
+    model_path = weights_path[:-len('.npz')] + '.keras'
+
+    reports = []
+    for precision in precisions:
+        quantized = quantize_model(model, precision)
+        performance = evaluate_performance(y, model_predict(quantized, X))
+        quantized_latency = latencies(quantized, X)
+        r2_drop = reference['R²'] - performance['R²']
+        mae_increase = (performance['MAE'] - reference['MAE']) / reference['MAE']
+        speedups = {batch_size: median_seconds(reference_latency[batch_size]) / median_seconds(quantized_latency[batch_size])
+                    for batch_size in LATENCY_BATCH_SIZES}
+        faster = all(speedup > 1 for speedup in speedups.values())
+        smaller = quantized.weights_nbytes < model.weights_nbytes
+        accepted = (r2_drop <= args.max_r2_drop and mae_increase <= args.max_mae_increase
+                    and (faster if args.require_speedup else faster or smaller))
+
+        path = quantized_weights_path(model_path, precision)
+        if accepted:
+            export_quantized_model(quantized, path, precision, weights_digest(model))
+        elif exists(path):
+            os.remove(path)
+        reports.append({
+            'model': weights_path,
+            'precision': precision,
+            'path': path if accepted else None,
+            'accepted': accepted,
+            'evaluation_rows': len(y),
+            'float32': reference,
+            'quantized': performance,
+            'delta': {metric: performance[metric] - reference[metric] for metric in reference},
+            'mae_increase': mae_increase,
+            'r2_drop': r2_drop,
+            'faster': faster,
+            'smaller': smaller,
+            'latency': {
+                str(batch_size): {
+                    'float32_seconds': median_seconds(reference_latency[batch_size]),
+                    'quantized_seconds': median_seconds(quantized_latency[batch_size]),
+                    'speedup': speedups[batch_size],
+                    'quantized_rows_per_second': batch_size / median_seconds(quantized_latency[batch_size]),
+                }
+                for batch_size in LATENCY_BATCH_SIZES
+            },
+            'weights_bytes': {'float32': model.weights_nbytes, 'quantized': quantized.weights_nbytes},
+            'file_bytes': {'float32': getsize(weights_path), 'quantized': getsize(path) if accepted else None},
+        })
+    return reports
+
+def print_report(report):
+    status = '✅' if report['accepted'] else '❌ refusé'
+    latency = ' | '.join(f"lot {batch_size} : x{values['speedup']:.2f} ({values['quantized_rows_per_second']:,.0f} lignes/s)"
+                         for batch_size, values in report['latency'].items())
+    memory = report['weights_bytes']
+    print(f"{status} {report['model']} {report['precision']} : "
+          f"ΔMSE {report['delta']['MSE']:+.1f}, ΔMAE {report['delta']['MAE']:+.2f} ({report['mae_increase']:+.2%}), "
+          f"ΔR² {report['delta']['R²']:+.5f} | {latency} | poids {memory['float32']:,} -> {memory['quantized']:,} octets")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export des modèles en précision réduite (float16, int8)")
+    parser.add_argument('--models-dir', default=join('.', 'models'), help="Dossier des modèles (archives .npz float32)")
+    parser.add_argument('--precision', action='append', choices=('float16', 'int8'),
+                        help="Précision à produire (cumulable, toutes par défaut)")
+    parser.add_argument('--evaluation-rows', type=int, default=EVALUATION_ROWS, help="Clients utilisés pour comparer les métriques")
+    parser.add_argument('--max-r2-drop', type=float, default=MAX_R2_DROP, help="Baisse maximale du R² (absolue)")
+    parser.add_argument('--max-mae-increase', type=float, default=MAX_MAE_INCREASE, help="Hausse maximale de la MAE (0.02 = 2 %%)")
+    parser.add_argument('--require-speedup', action='store_true',
+                        help="Refuser une version plus lente que le float32 (par défaut, des poids plus petits en mémoire suffisent)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--report', help="Écrire le rapport dans ce fichier JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    from api.database import engine
+
+    sample = sample_clients(engine, args.evaluation_rows, seed=args.seed)
+    if sample.empty:
+        print("❌ Aucun client pour évaluer les modèles")
+        return 1
+
+    reports, failures = [], 0
+    for weights_path in sorted(glob(join(args.models_dir, '*_model.npz'))):
+        preprocessor_path = weights_path[:-len('_model.npz')] + '_preprocessor.pkl'
+        if not exists(preprocessor_path):
+            print(f"⚠️ {weights_path} ignoré : pas de preprocessor {preprocessor_path}")
+            continue
+        try:
+            variant_reports = quantize_variant(weights_path, preprocessor_path, sample, args.precision or ['float16', 'int8'], args)
+        except Exception as e:
+            failures += 1
+            print(f"❌ {weights_path} : {e}")
+            continue
+        for report in variant_reports:
+            print_report(report)
+            failures += not report['accepted']
+        reports.extend(variant_reports)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as report_file:
+            json.dump(reports, report_file, indent=2, ensure_ascii=False)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    print(f"{' Quantification des modèles ':=^60}")
+    sys.exit(main())
@@ -1,18 +1,31 @@
+import argparse
 import pandas as pd
 from api.database import engine
 import joblib
 from os.path import join as join
 
 from api.modules.preprocess import preprocessing, ethically_loose_preprocessing
+from api.modules.incremental_preprocess import fit_preprocessor_incremental, iter_client_chunks
 
-df = pd.read_sql_table(
-    table_name='clients',
-    con=engine,
-    parse_dates=['date_creation_compte'],
-)
+LAST_N_CLIENTS = 10000
 
-_, _, preprocessor = preprocessing(df.tail(10000))
-_, _, ethically_loose_preprocessor = ethically_loose_preprocessing(df.tail(10000))
+parser = argparse.ArgumentParser(description="Ré-entraîne les preprocessors strict et lâche sur les clients les plus récents")
+parser.add_argument('--chunk-size', type=int, default=50000, help="Taille des morceaux lus en base")
+parser.add_argument('--in-memory', action='store_true', help="Charge toute la table en mémoire (ancien mode)")
+args = parser.parse_args()
+
+if args.in_memory:
+    df = pd.read_sql_table(
+        table_name='clients',
+        con=engine,
+        parse_dates=['date_creation_compte'],
+    )
+
+    _, _, preprocessor = preprocessing(df.tail(LAST_N_CLIENTS))
+    _, _, ethically_loose_preprocessor = ethically_loose_preprocessing(df.tail(LAST_N_CLIENTS))
+else:
+    preprocessor = fit_preprocessor_incremental(iter_client_chunks(engine, args.chunk_size, last_n=LAST_N_CLIENTS), ethically_strict=True)
+    ethically_loose_preprocessor = fit_preprocessor_incremental(iter_client_chunks(engine, args.chunk_size, last_n=LAST_N_CLIENTS), ethically_strict=False)
 
 joblib.dump(preprocessor, join(".", "models", "new_ethically_strict_preprocessor.pkl"))
-joblib.dump(ethically_loose_preprocessor, join(".", "models", "new_ethically_loose_preprocessor.pkl"))
\ No newline at end of file
+joblib.dump(ethically_loose_preprocessor, join(".", "models", "new_ethically_loose_preprocessor.pkl"))
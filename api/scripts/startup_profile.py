@@ -0,0 +1,110 @@
+"""
+Profil du démarrage de l'API, dans des processus neufs :
+
+- temps d'import de `api.main` par paquet (`python -X importtime`) et modules lourds
+  chargés dès l'import ;
+- temps jusqu'à la vivacité (fin du démarrage du lifespan, connexions acceptées) et
+  jusqu'à l'état prêt (fin du warm-up).
+
+Les mesures sont comparées aux objectifs : la commande échoue si l'un d'eux est dépassé.
+
+    python -m api.scripts.startup_profile
+    python -m api.scripts.startup_profile --no-fast-startup --top 30
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+
+IMPORT_TARGET_SECONDS = 1.5
+LIVE_TARGET_SECONDS = 2.0
+READY_TARGET_SECONDS = 30.0
+# Modules qui ne doivent pas être importés avant le warm-up en mode FAST_STARTUP
+HEAVY_MODULES = ('tensorflow', 'keras', 'pandas', 'sklearn', 'scipy', 'joblib', 'pyarrow')
+
+STARTUP_SNIPPET = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+from api.main import app
+from api.serving import readiness
+imported = time.perf_counter()
+heavy = [name for name in {heavy!r} if name in sys.modules]
+
+async def start():
+    async with app.router.lifespan_context(app):
+        live = time.perf_counter()
+        while readiness.state == 'starting':
+            await asyncio.sleep(0.01)
+        return live, time.perf_counter()
+
+live, ready = asyncio.run(start())
+print(json.dumps({{'import_seconds': imported - started, 'live_seconds': live - started, 'ready_seconds': ready - started,
+                  'state': readiness.state, 'error': readiness.error, 'heavy_modules_at_import': heavy}}))
+"""
+
+def import_profile(env):
+    """
+    Temps d'import de `api.main` (secondes) cumulé et par paquet de premier niveau,
+    d'après la sortie de `python -X importtime`.
+    """
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import api.main'],
+                               env=env, capture_output=True, text=True, check=True)
+    by_package, total = Counter(), 0.0
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        by_package[name.split('.')[0]] += int(self_us) / 1e6
+        if name == 'api.main':
+            total = int(cumulative_us) / 1e6
+    return total, by_package
+
+def startup_timings(env):
+    """Temps jusqu'à la fin de l'import, la vivacité et l'état prêt, mesurés dans un processus neuf."""
+    completed = subprocess.run([sys.executable, '-c', STARTUP_SNIPPET.format(heavy=HEAVY_MODULES)],
+                               env=env, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Profil du temps de démarrage de l'API")
+    parser.add_argument('--no-fast-startup', action='store_true', help="Mesurer le démarrage sans FAST_STARTUP")
+    parser.add_argument('--top', type=int, default=15, help="Nombre de paquets affichés")
+    parser.add_argument('--import-target', type=float, default=IMPORT_TARGET_SECONDS, help="Objectif d'import de api.main (s)")
+    parser.add_argument('--live-target', type=float, default=LIVE_TARGET_SECONDS, help="Objectif de vivacité (s)")
+    parser.add_argument('--ready-target', type=float, default=READY_TARGET_SECONDS, help="Objectif d'état prêt (s)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    fast_startup = not args.no_fast_startup
+    env = {**os.environ, 'FAST_STARTUP': 'true' if fast_startup else 'false'}
+
+    import_seconds, by_package = import_profile(env)
+    print(f"📦 Import de api.main : {import_seconds:.3f} s (-X importtime), par paquet :")
+    for package, seconds in by_package.most_common(args.top):
+        print(f"   {package:<30} {seconds * 1e3:>9.1f} ms")
+
+    timings = startup_timings(env)
+    checks = [
+        ('import', timings['import_seconds'], args.import_target),
+        ('vivacité', timings['live_seconds'], args.live_target),
+        ('prêt', timings['ready_seconds'], args.ready_target),
+    ]
+    failures = 0
+    for name, seconds, target in checks:
+        ok = seconds <= target
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {name:<10} {seconds:>7.3f} s (objectif {target:.1f} s)")
+    if timings['state'] != 'ready':
+        failures += 1
+        print(f"❌ Warm-up en échec : {timings['error']}")
+    if fast_startup and timings['heavy_modules_at_import']:
+        failures += 1
+        print(f"❌ Modules lourds importés au démarrage : {', '.join(timings['heavy_modules_at_import'])}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    print(f"{' Profil de démarrage ':=^60}")
+    sys.exit(main())
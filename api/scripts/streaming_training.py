@@ -0,0 +1,110 @@
+"""
+Entraîne (ou ré-entraîne à partir d'un modèle existant) un modèle sur tout
+l'historique des clients, lu par morceaux depuis la base ou un fichier Parquet :
+preprocessor entraîné en flux, puis `tf.data.Dataset` mélangé, en lots et préchargé.
+Les matrices préprocessées sont mises en cache sur disque (voir
+`api.modules.feature_store`) et réutilisées tant que les données et le code de
+preprocessing ne changent pas.
+
+    python -m api.scripts.streaming_training --variant ethically_strict
+    python -m api.scripts.streaming_training --variant new_ethically_loose --loose --base-model ethically_loose
+    python -m api.scripts.streaming_training --export-parquet data/clients.parquet
+    python -m api.scripts.streaming_training --variant ethically_strict --parquet data/clients.parquet
+"""
+import argparse
+from os.path import join
+
+import joblib
+
+from api.database import engine
+from api.modules.datasets import export_chunks_to_parquet, iter_parquet_chunks, make_array_dataset, make_dataset, predict_dataset
+from api.modules.evaluate import evaluate_performance
+from api.modules.feature_store import FEATURE_STORE_DIR, FeatureStore, client_features, parquet_watermark
+from api.modules.incremental_preprocess import fit_preprocessor_incremental, iter_client_chunks
+from api.modules.models import train_model, create_nn_model, create_nn_model_based_on
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Entraînement en flux sur la table clients")
+    parser.add_argument('--variant', default='ethically_strict', help="Nom des artefacts produits dans models/")
+    parser.add_argument('--loose', action='store_true', help="Preprocessing \"ethically loose\"")
+    parser.add_argument('--base-model', help="Variante dont les poids compatibles sont repris")
+    parser.add_argument('--parquet', help="Lire les clients depuis ce fichier Parquet plutôt que la base")
+    parser.add_argument('--export-parquet', help="Exporter la table clients dans ce fichier Parquet puis quitter")
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--shuffle-buffer', type=int, default=10000)
+    parser.add_argument('--validation-fraction', type=float, default=0.2)
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--feature-store', default=FEATURE_STORE_DIR, help="Dossier du cache de features")
+    parser.add_argument('--no-feature-store', action='store_true', help="Préprocesser en flux à chaque époque, sans cache")
+    parser.add_argument('--refresh-features', action='store_true', help="Recalculer les features même si elles sont en cache")
+    parser.add_argument('--no-mlflow', action='store_true', help="Ne pas journaliser l'entraînement dans MLflow")
+    return parser.parse_args()
+
+def main(args):
+    if args.export_parquet:
+        n_rows = export_chunks_to_parquet(iter_client_chunks(engine, args.chunk_size), args.export_parquet)
+        print(f"✅ {n_rows} clients exportés dans {args.export_parquet}")
+        return
+
+    ethically_strict = not args.loose
+    dataset_options = dict(validation_fraction=args.validation_fraction)
+    if args.no_feature_store:
+        def chunk_factory():
+            if args.parquet:
+                return iter_parquet_chunks(args.parquet, args.chunk_size)
+            return iter_client_chunks(engine, args.chunk_size)
+
+        preprocessor = fit_preprocessor_incremental(chunk_factory(), ethically_strict=ethically_strict)
+        dataset_options.update(ethically_strict=ethically_strict)
+        train_dataset = make_dataset(chunk_factory, preprocessor, subset='train', batch_size=args.batch_size,
+                                     shuffle_buffer=args.shuffle_buffer, **dataset_options)
+        validation_dataset = make_dataset(chunk_factory, preprocessor, subset='validation', batch_size=1024, **dataset_options)
+    else:
+        store = FeatureStore(args.feature_store)
+        if args.parquet:
+            features = store.materialize(lambda: iter_parquet_chunks(args.parquet, args.chunk_size), ethically_strict,
+                                         parquet_watermark(args.parquet), refresh=args.refresh_features)
+        else:
+            features = client_features(engine, ethically_strict, chunk_size=args.chunk_size, store=store,
+                                       refresh=args.refresh_features)
+        preprocessor = features.preprocessor
+        arrays = (features.X, features.y, features.ids)
+        train_dataset = make_array_dataset(*arrays, subset='train', batch_size=args.batch_size,
+                                           shuffle_buffer=args.shuffle_buffer, **dataset_options)
+        validation_dataset = make_array_dataset(*arrays, subset='validation', batch_size=1024, **dataset_options)
+    print(f"✅ Preprocessor entraîné ({len(preprocessor.get_feature_names_out())} features)")
+
+    input_dim = len(preprocessor.get_feature_names_out())
+    if args.base_model:
+        import tensorflow as tf
+        base_model = tf.keras.models.load_model(join('.', 'models', f'{args.base_model}_model.keras'))
+        model = create_nn_model_based_on(base_model=base_model, input_dim=input_dim)
+    else:
+        model = create_nn_model(input_dim=input_dim)
+
+    model, history = train_model(model, train_dataset, X_val=validation_dataset, epochs=args.epochs, verbose=1)
+    y_true, y_pred = predict_dataset(model, validation_dataset)
+    perf = evaluate_performance(y_true, y_pred)
+    print(f"📊 Validation ({len(y_true)} clients) : R² {perf['R²']:.3f} | MSE {perf['MSE']:.1f} | MAE {perf['MAE']:.1f}")
+
+    if not args.no_mlflow:
+        import mlflow
+
+        mlflow.set_experiment("Training loan prediction model on the full clients history")
+        with mlflow.start_run():
+            mlflow.log_params(vars(args))
+            mlflow.log_metric("R²", perf['R²'])
+            mlflow.log_metric("MSE", perf['MSE'])
+            mlflow.log_metric("MAE", perf['MAE'])
+            mlflow.set_tag("Data Processing Info", "Ethically loose preprocessing" if args.loose else "Ethically strict preprocessing")
+            mlflow.set_tag("Training Info", f"{args.epochs} epochs, streaming tf.data")
+
+    # Sauvegarde du modèle complet et de son preprocessor
+    model.save(join('.', 'models', f'{args.variant}_model.keras'))
+    joblib.dump(preprocessor, join('.', 'models', f'{args.variant}_preprocessor.pkl'))
+    print(f"✅ Modèle et preprocessor sauvegardés sous models/{args.variant}_*")
+
+if __name__ == "__main__":
+    print(f"{' Entraînement en flux ':=^60}")
+    main(parse_args())
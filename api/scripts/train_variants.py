@@ -0,0 +1,114 @@
+"""
+Entraîne plusieurs variantes de modèle en parallèle, une par processus, à partir du
+cache de features. Chaque variante produit `models/{nom}_model.keras`,
+`models/{nom}_preprocessor.pkl` et un run MLflow, avec le modèle enregistré dans le
+registre de modèles MLflow (voir REGISTERED_MODEL_NAMES).
+
+Une variante s'écrit `NOM:MODE[:FENÊTRE[:MODÈLE_DE_BASE]]`, avec MODE `strict` ou
+`loose` et FENÊTRE `all`, `first_N` ou `last_N` :
+
+    python -m api.scripts.train_variants ethically_strict:strict:first_10000 ethically_loose:loose:first_10000
+    python -m api.scripts.train_variants new_ethically_strict:strict:last_10000:ethically_strict
+    python -m api.scripts.train_variants --preset training --preset retraining
+    python -m api.scripts.train_variants --preset training --config models/best_config.json
+"""
+import argparse
+import json
+import sys
+from os.path import join
+
+from api.modules.feature_store import FEATURE_STORE_DIR, FeatureStore
+from api.modules.models import DEFAULT_LEARNING_RATE, DEFAULT_UNITS
+from api.modules.orchestrator import parse_variant, train_variants
+
+PRESETS = {
+    # Ancien contenu de api/scripts/training.py
+    'training': ['ethically_strict:strict:first_10000', 'ethically_loose:loose:first_10000'],
+    # Ancien contenu de api/scripts/retraining.py
+    'retraining': ['new_ethically_strict:strict:last_10000:ethically_strict',
+                   'new_ethically_loose:loose:last_10000:ethically_loose'],
+}
+EXPERIMENT = "Training loan prediction model with data from brief 0"
+# Noms des modèles enregistrés dans le registre MLflow par les anciens scripts ;
+# les autres variantes sont enregistrées sous leur propre nom
+REGISTERED_MODEL_NAMES = {
+    'ethically_strict': 'loan-prediction-ethical-model',
+    'ethically_loose': 'loan-prediction-ethical-model',
+    'new_ethically_strict': 'new_loan-prediction-ethical-model',
+    'new_ethically_loose': 'new-loan-prediction-ethical-model',
+}
+
+def load_config(path):
+    """Lit les hyperparamètres (units, learning_rate, batch_size, epochs) d'un fichier de configuration."""
+    with open(path, encoding='utf-8') as config_file:
+        config = json.load(config_file)
+    return {key: config[key] for key in ('units', 'learning_rate', 'batch_size', 'epochs') if key in config}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Entraînement parallèle de plusieurs variantes de modèle")
+    parser.add_argument('variants', nargs='*', help="Variantes NOM:MODE[:FENÊTRE[:MODÈLE_DE_BASE]]")
+    parser.add_argument('--preset', action='append', choices=sorted(PRESETS), default=[],
+                        help="Lot de variantes prédéfini (cumulable)")
+    parser.add_argument('--workers', type=int, help="Nombre de processus (par défaut, un par variante dans la limite des cœurs)")
+    parser.add_argument('--threads-per-worker', type=int, help="Threads de calcul par processus (par défaut, cœurs / workers)")
+    parser.add_argument('--config', help="Hyperparamètres issus de api.scripts.hyperparameter_search (fichier JSON)")
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--models-dir', default=join('.', 'models'), help="Dossier des artefacts produits")
+    parser.add_argument('--feature-store', default=FEATURE_STORE_DIR, help="Dossier du cache de features")
+    parser.add_argument('--experiment', default=EXPERIMENT, help="Nom de l'expérience MLflow")
+    parser.add_argument('--no-mlflow', action='store_true', help="Ne pas journaliser les entraînements dans MLflow")
+    parser.add_argument('--summary', help="Écrire les résultats dans ce fichier JSON")
+    args = parser.parse_args(argv)
+    if args.config:
+        # Les hyperparamètres du fichier remplacent les valeurs par défaut, pas les options explicites
+        args.hyperparameters = load_config(args.config)
+        parser.set_defaults(**{key: value for key, value in args.hyperparameters.items() if key in ('epochs', 'batch_size')})
+        args = parser.parse_args(argv, namespace=argparse.Namespace(hyperparameters=args.hyperparameters))
+    else:
+        args.hyperparameters = {}
+
+    texts = [text for preset in args.preset for text in PRESETS[preset]] + args.variants
+    if not texts:
+        parser.error("aucune variante (arguments positionnels ou --preset)")
+    try:
+        args.specs = [parse_variant(text) for text in texts]
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    from api.database import engine
+
+    options = {
+        'epochs': args.epochs,
+        'batch_size': args.batch_size,
+        'units': args.hyperparameters.get('units', DEFAULT_UNITS),
+        'learning_rate': args.hyperparameters.get('learning_rate', DEFAULT_LEARNING_RATE),
+        'test_size': args.test_size,
+        'seed': args.seed,
+        'models_dir': args.models_dir,
+        'experiment': args.experiment,
+        'mlflow': not args.no_mlflow,
+        'registered_model_names': REGISTERED_MODEL_NAMES,
+    }
+    results = train_variants(args.specs, engine, options, workers=args.workers,
+                             threads_per_worker=args.threads_per_worker, store=FeatureStore(args.feature_store))
+
+    print(f"{'variante':>24} | {'R²':>6} | {'MAE':>10} | {'durée':>7}")
+    for result in results:
+        if 'error' in result:
+            print(f"{result['name']:>24} | échec : {result['error']}")
+        else:
+            print(f"{result['name']:>24} | {result['R²']:>6.3f} | {result['MAE']:>10.1f} | {result['seconds']:>6.1f}s")
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as summary:
+            json.dump(results, summary, indent=2, ensure_ascii=False)
+    return 1 if any('error' in result for result in results) else 0
+
+if __name__ == "__main__":
+    print(f"{' Entraînement des variantes ':=^60}")
+    sys.exit(main())
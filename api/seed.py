@@ -1,76 +1,147 @@
+from os.path import abspath, getmtime, getsize
+from time import perf_counter
+
 import pandas as pd
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, MetaData, Table, delete, func, select
 
 from api.database import engine, create_db_tables
 from api.models import *
 
-def import_csv_to_db(csv_path, table_name, if_exists='append'):
+PROHIBITED_COLS = ['nom', 'prenom', 'nationalité_francaise'] # colonnes enfreignant la RGPD
+DATE_COLS = ['date_creation_compte']
+BOOL_VALUES = {'oui': True, 'non': False}
+CHUNK_SIZE = 50000
+
+def import_csv_to_db(csv_path, table_name, if_exists='append', chunk_size=CHUNK_SIZE):
     """
-    Importe un CSV directement en base
-    
+    Importe un CSV en base par morceaux, sans jamais le charger en entier en mémoire.
+
+    Seules les colonnes de la table sont lues, avec des types explicites déduits du
+    schéma ; les colonnes booléennes de la table sont converties depuis 'oui'/'non'
+    et les dates sont normalisées au format ISO (AAAA-MM-JJ) pour une colonne texte.
+    Chaque morceau est inséré en executemany, dans la même transaction que la mise
+    à jour de son point de reprise : après un échec, relancer l'import reprend au
+    premier morceau non importé. Le point de reprise est supprimé une fois l'import
+    terminé, si bien qu'un nouvel import du même CSV repart de zéro.
+
     Args:
         csv_path: Chemin vers le fichier CSV
         table_name: Nom de la table en base
-        if_exists: 'append', 'replace', ou 'fail'
+        if_exists: 'append' (reprend un import interrompu), 'replace' (vide la table et repart de zéro) ou 'fail'
+        chunk_size: Nombre de lignes par morceau
     """
     try:
-        df = pd.read_csv(csv_path)
-
-        prohibited_cols = ['nom', 'prenom', 'nationalité_francaise'] # colonnes enfreignant la RGPD
-        df = df.drop(columns=prohibited_cols)
-
-        oui_non_cols = get_oui_non_columns(df)
-        df = df.assign(**{col: df[col].str.lower().map(convert_to_bool) for col in oui_non_cols})
-        
-        df['date_creation_compte'] = pd.to_datetime(df['date_creation_compte'], errors='coerce')
-        
-        df.to_sql(
-            name=table_name,
-            con=engine,
-            if_exists=if_exists,
-            index=False,
-            method='multi',
-            chunksize=1000
-        )
-        
-        print(f"✅ Import réussi: {len(df)} lignes dans {table_name}")
-        
+        table = Table(table_name, MetaData(), autoload_with=engine)
+        header = pd.read_csv(csv_path, nrows=0).columns
+        columns = [col for col in header if col in table.columns and col not in PROHIBITED_COLS]
+        bool_cols = [col for col in columns if isinstance(table.columns[col].type, Boolean)]
+
+        source = f'{abspath(csv_path)}:{table_name}'
+        fingerprint = f'{getsize(csv_path)}:{getmtime(csv_path)}'
+        rows_done = prepare_import(table, source, fingerprint, if_exists)
+        if rows_done:
+            print(f"⏩ Reprise de l'import après {rows_done} lignes déjà importées")
+
+        reader = pd.read_csv(csv_path, usecols=columns, dtype=csv_dtypes(table, columns), chunksize=chunk_size)
+        started = perf_counter()
+        rows_read = imported = 0
+        for chunk in reader:
+            chunk_start, rows_read = rows_read, rows_read + len(chunk)
+            if rows_read <= rows_done:
+                continue
+            chunk = chunk.iloc[max(0, rows_done - chunk_start):]
+            records = to_records(chunk, table, bool_cols)
+            with engine.begin() as connection:
+                connection.execute(table.insert(), records)
+                connection.execute(SeedCheckpoint.__table__.update()
+                                   .where(SeedCheckpoint.source == source)
+                                   .values(rows_done=rows_read))
+            imported += len(records)
+            print(f"📦 {rows_read} lignes importées ({imported / (perf_counter() - started):.0f} lignes/s)")
+        with engine.begin() as connection:
+            connection.execute(delete(SeedCheckpoint.__table__).where(SeedCheckpoint.source == source))
+
+        elapsed = perf_counter() - started
+        print(f"✅ Import réussi: {imported} lignes dans {table_name} en {elapsed:.1f}s ({imported / elapsed if elapsed else 0:.0f} lignes/s)")
+
     except Exception as e:
         print(f"❌ Erreur lors de l'import: {e}")
         raise
 
-def convert_to_bool(value):
+def prepare_import(table, source, fingerprint, if_exists):
     """
-    Convertit différentes représentations en booléen
+    Initialise le point de reprise de l'import et retourne le nombre de lignes déjà importées.
+    Seul un import inachevé est repris : le point de reprise d'un import terminé est
+    supprimé, et celui d'une table vidée depuis (ex. `clear_table`) est remis à zéro.
     """
-    if pd.isna(value):
-        return None
-    
-    return str(value).lower().strip() == 'oui'
+    checkpoints = SeedCheckpoint.__table__
+    with engine.begin() as connection:
+        if if_exists == 'replace':
+            connection.execute(delete(table))
+            connection.execute(delete(checkpoints).where(checkpoints.c.source == source))
+        elif if_exists == 'fail' and connection.execute(select(func.count()).select_from(table)).scalar():
+            raise ValueError(f"La table {table.name} n'est pas vide")
 
-def get_oui_non_columns(df):
+        checkpoint = connection.execute(select(checkpoints).where(checkpoints.c.source == source)).first()
+        if checkpoint is None:
+            connection.execute(checkpoints.insert().values(source=source, fingerprint=fingerprint, rows_done=0))
+            return 0
+        if connection.execute(select(table).limit(1)).first() is None:
+            connection.execute(checkpoints.update().where(checkpoints.c.source == source)
+                               .values(fingerprint=fingerprint, rows_done=0))
+            return 0
+        if checkpoint.fingerprint != fingerprint:
+            raise ValueError(f"Le CSV a changé depuis l'import interrompu ({checkpoint.rows_done} lignes importées), "
+                             "relancer avec if_exists='replace'")
+        return checkpoint.rows_done
+
+def csv_dtypes(table, columns):
+    """
+    Types de lecture explicites déduits des colonnes de la table : les booléens sont
+    lus comme chaînes puis convertis, les entiers acceptent les valeurs manquantes.
+    """
+    dtypes = {}
+    for col in columns:
+        column_type = table.columns[col].type
+        if isinstance(column_type, Boolean):
+            dtypes[col] = 'string'
+        elif isinstance(column_type, Integer):
+            dtypes[col] = 'Int64'
+        elif isinstance(column_type, Float):
+            dtypes[col] = 'float64'
+        else:
+            dtypes[col] = 'string'
+    return dtypes
+
+def to_records(chunk, table, bool_cols):
     """
-    Retourne les colonnes booléennes du DataFrame
+    Convertit un morceau du CSV en liste de dictionnaires prêts pour l'insertion
+    (booléens et dates convertis, valeurs manquantes en None).
     """
-    oui_non_columns = []
-    for col in df.columns:
-        unique_values = df[col].dropna().unique()
-        if set(unique_values).issubset({'oui', 'non'}):
-            oui_non_columns.append(col)
-    return oui_non_columns
+    chunk = chunk.assign(**{col: chunk[col].str.strip().str.lower().map(BOOL_VALUES) for col in bool_cols})
+    for col in DATE_COLS:
+        if col in chunk.columns:
+            dates = pd.to_datetime(chunk[col], errors='coerce')
+            # Table créée par l'ancien import (to_sql) : colonne DATETIME plutôt que texte
+            typed = isinstance(table.columns[col].type, (Date, DateTime))
+            chunk = chunk.assign(**{col: dates.astype(object) if typed else dates.dt.strftime('%Y-%m-%d')})
+    # Conversion colonne par colonne en objets Python, bien plus rapide que ligne par ligne
+    values = [chunk[col].astype(object).where(chunk[col].notna(), None).tolist() for col in chunk.columns]
+    return [dict(zip(chunk.columns, row)) for row in zip(*values)]
 
 def seed_database(csv_path, table):
     """
     Fonction principale de seeding
     """
     print("🌱 Début du seeding...")
-    
+
     create_db_tables()
-    
+
     try:
         import_csv_to_db(csv_path, table, if_exists='append')
-        
+
         print("✅ Seeding terminé avec succès!")
-        
+
     except Exception as e:
         print(f"❌ Erreur durant le seeding: {e}")
 
@@ -81,4 +152,4 @@ if __name__ == "__main__":
     print("Précisez la table de destination :")
     table = input().strip()
     seed_database(csv_path, table)
-    print(f"{' Fin du seeding ':=^60}")
\ No newline at end of file
+    print(f"{' Fin du seeding ':=^60}")
@@ -0,0 +1,82 @@
+from importlib import import_module
+
+from api.config import DEFAULT_MODEL_PATH, DEFAULT_PREPROCESSOR_PATH, DEFAULT_MODEL_PATHS_SET, DEFAULT_MODEL_VARIANT, MODELS_DIR, INFERENCE_BACKEND, INFERENCE_PRECISION, PREPROCESSOR_BACKEND, INFERENCE_EXECUTOR, INFERENCE_WORKERS, INFERENCE_QUEUE_SIZE
+from api.modules.batching import process_items
+from api.modules.executor import BoundedExecutor
+from api.modules.readiness import Readiness
+from api.modules.registry import ModelRegistry, ModelUnavailableError
+
+# Registre des modèles du processus courant : celui de l'API en mode 'thread',
+# un registre par worker (chargé à la demande) en mode 'process'.
+registry = ModelRegistry(MODELS_DIR,
+                         default_variant=DEFAULT_MODEL_VARIANT,
+                         inference_backend=INFERENCE_BACKEND,
+                         preprocessor_backend=PREPROCESSOR_BACKEND,
+                         inference_precision=INFERENCE_PRECISION)
+# Fichiers de MODEL_FILENAME / PREPROCESSOR_FILENAME (ou *_PATH) seulement s'ils sont donnés, ou si la
+# variante n'a pas été découverte : MODEL_VARIANT seul sert le couple trouvé dans MODELS_DIR
+if DEFAULT_MODEL_PATHS_SET or DEFAULT_MODEL_VARIANT not in {item['variant'] for item in registry.variants()}:
+    registry.register(DEFAULT_MODEL_VARIANT, DEFAULT_MODEL_PATH, DEFAULT_PREPROCESSOR_PATH)
+
+# Prêt une fois `warm_up()` terminé : jusque-là, les routes de prédiction répondent 503
+readiness = Readiness()
+
+# Modules chargés par le warm-up plutôt qu'à l'import de l'API ou à la première requête
+WARM_UP_MODULES = ('pandas', 'api.modules.validation', 'api.modules.inference', 'api.modules.compiled_preprocessor')
+
+def warm_up():
+    """
+    Importe les modules lourds puis charge et réchauffe la variante active (bloquant).
+
+    raises:
+    - ModelUnavailableError si la variante active ne peut pas être chargée.
+    """
+    for module in WARM_UP_MODULES:
+        import_module(module)
+    registry.get()
+
+def warm_up_worker():
+    """Charge la variante active au démarrage d'un worker de processus"""
+    try:
+        registry.get()
+    except ModelUnavailableError:
+        pass
+
+executor = BoundedExecutor(INFERENCE_EXECUTOR,
+                           max_workers=INFERENCE_WORKERS,
+                           max_queue=INFERENCE_QUEUE_SIZE,
+                           initializer=warm_up_worker if INFERENCE_EXECUTOR == 'process' else None)
+
+def predict_clients(items):
+    """
+    Prédit un lot de clients, regroupés par variante de modèle.
+
+    args:
+    - items: liste de triplets (variante, version, client), sérialisables pour
+      pouvoir être envoyés à un pool de processus.
+
+    returns:
+    - liste des prédictions, alignée sur `items`.
+    """
+    predictions = [None] * len(items)
+    positions_by_model = {}
+    for position, (variant, version, _) in enumerate(items):
+        positions_by_model.setdefault((variant, version), []).append(position)
+    for (variant, version), positions in positions_by_model.items():
+        entry = registry.resolve(variant, version)
+        values = entry.predict_records([items[position][2] for position in positions])
+        for position, value in zip(positions, values):
+            predictions[position] = value
+    return predictions
+
+def predict_frame(variant, version, df):
+    """
+    Prédit un DataFrame de clients validés avec la variante de modèle demandée.
+    Si le lot échoue, chaque ligne est prédite seule (voir `process_items`) afin
+    qu'une ligne invalide ne fasse pas échouer les autres.
+
+    returns:
+    - liste alignée sur les lignes de `df` : prédiction, ou exception de la ligne.
+    """
+    entry = registry.resolve(variant, version)
+    return process_items(lambda positions: list(entry.predict_frame(df.iloc[positions])), list(range(len(df))))
@@ -11,4 +11,19 @@ def detect_outliers(dataframe, column):
     IQR = Q3 - Q1
 
     return dataframe[(dataframe[column] >= (Q1 - 1.5 * IQR)) & 
-                   (dataframe[column] <= (Q3 + 1.5 * IQR))]
\ No newline at end of file
+                   (dataframe[column] <= (Q3 + 1.5 * IQR))]
+
+def artifact_version(*paths):
+    """
+    Identifiant court d'un ensemble de fichiers (nom, taille et date de modification),
+    qui change dès qu'un des artefacts est remplacé sur le disque.
+    """
+    from hashlib import blake2b
+    from os import stat
+    from os.path import basename
+
+    digest = blake2b(digest_size=8)
+    for path in paths:
+        info = stat(path)
+        digest.update(f'{basename(path)}:{info.st_size}:{info.st_mtime_ns};'.encode('utf-8'))
+    return digest.hexdigest()